@@ -0,0 +1,294 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Time and measure the memory of each pipeline stage at several input scales
+"""
+
+from airtight.cli import configure_commandline
+import json
+import logging
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import tracemalloc
+
+from pleiades_sidebar import dataset
+from pleiades_sidebar.generator import Generator
+from pleiades_sidebar.pleiades import PleiadesDataset
+from pleiades_sidebar.registry import DATASETS
+from pleiades_sidebar.synthetic import (
+    NAMESPACES,
+    PLEIADES_BASE_URI,
+    SyntheticCorpus,
+)
+from pleiades_sidebar.writer import SidebarWriter
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS_DIR = Path(__file__).parent
+# places in the synthetic corpus at scale 1 (each partner dataset has as many items)
+BASE_PLACES = 100
+# datasets are loaded offline (the synthetic WHG file's JSON-LD context is inline)
+DATASET_OPTIONS = {"offline": True}
+BASELINES_VERSION = 1
+DEFAULT_LOG_LEVEL = logging.WARNING
+OPTIONAL_ARGUMENTS = [
+    [
+        "-l",
+        "--loglevel",
+        "NOTSET",
+        "desired logging level ("
+        + "case-insensitive string: DEBUG, INFO, WARNING, or ERROR",
+        False,
+    ],
+    ["-v", "--verbose", False, "verbose output (logging level == INFO)", False],
+    [
+        "-w",
+        "--veryverbose",
+        False,
+        "very verbose output (logging level == DEBUG)",
+        False,
+    ],
+    [
+        "-s",
+        "--scales",
+        "1,10",
+        "comma-separated multiples of the base synthetic corpus to benchmark",
+        False,
+    ],
+    [
+        "-n",
+        "--repeat",
+        3,
+        "number of timed runs of each stage (the fastest is reported)",
+        False,
+    ],
+    [
+        "-b",
+        "--baselines",
+        str(BENCHMARKS_DIR / "baselines.json"),
+        "stored baseline results to compare against",
+        False,
+    ],
+    [
+        "-u",
+        "--update",
+        False,
+        "store this run's results as the baselines instead of comparing",
+        False,
+    ],
+    [
+        "-t",
+        "--tolerance",
+        0.5,
+        "allowed fractional slowdown against the baseline before failing",
+        False,
+    ],
+    [
+        "-m",
+        "--memtolerance",
+        0.1,
+        "allowed fractional growth in peak memory against the baseline",
+        False,
+    ],
+    ["-o", "--output", "", "also write the results as JSON to this file", False],
+]
+POSITIONAL_ARGUMENTS = [
+    # each row is a list with 3 elements: name, type, help
+]
+# timing differences smaller than this are noise, whatever the tolerance
+MIN_SECONDS_DELTA = 0.02
+
+
+def measure(run, setup=None, repeat: int = 3) -> dict:
+    """
+    Time run() repeat times and measure its peak memory in one more, traced, run
+
+    setup: called before each run (untimed); its return value is passed to run
+    """
+    seconds = list()
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        start = perf_counter()
+        count = run(*args)
+        seconds.append(perf_counter() - start)
+    args = () if setup is None else (setup(),)
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(seconds), 6), "peak_bytes": peak, "count": count}
+
+
+def benchmark_scale(scale: int, workpath: Path, repeat: int) -> dict:
+    """Build a synthetic corpus at one scale and benchmark each stage against it"""
+    results = dict()
+    corpus = SyntheticCorpus(places=BASE_PLACES * scale)
+    paths = corpus.write(workpath / "corpus", namespaces=NAMESPACES)
+
+    for ns in NAMESPACES:
+        dataset_class = DATASETS[ns]
+        path = paths[ns]
+        results[f"{ns}.load"] = measure(
+            lambda: len(dataset_class(path=path, refresh=True, **DATASET_OPTIONS)),
+            repeat=repeat,
+        )
+        results[f"{ns}.from_cache"] = measure(
+            lambda: len(dataset_class(path=path, use_cache=True, **DATASET_OPTIONS)),
+            repeat=repeat,
+        )
+
+    puris = [PLEIADES_BASE_URI + pid for pid in corpus.pids]
+
+    def get_places(pleiades):
+        for puri in puris:
+            pleiades.get(puri)
+        return len(puris)
+
+    results["pleiades.get"] = measure(
+        get_places, setup=lambda: PleiadesDataset(paths["pleiades"]), repeat=repeat
+    )
+
+    def new_generator():
+        return Generator(
+            NAMESPACES, paths=paths, use_cached=True, dataset_options=DATASET_OPTIONS
+        )
+
+    results["generate"] = measure(
+        lambda g: len(g.generate()[0]), setup=new_generator, repeat=repeat
+    )
+
+    sidebar, unreciprocated = new_generator().generate()
+    runs = iter(range(repeat + 1))
+
+    def write_output(outpath):
+        # as scripts/generate.py does, into a new directory each time
+        writer = SidebarWriter(outpath)
+        outpath.mkdir(parents=True)
+        stats = writer.write(sidebar)
+        for ns, ditems in unreciprocated.items():
+            array = writer.open_array(outpath / f"unreciprocated_{ns}.json")
+            for ditem_lpf in ditems:
+                array.append(ditem_lpf)
+            array.close()
+        writer.save_index()
+        return stats["written"]
+
+    results["write"] = measure(
+        write_output, setup=lambda: workpath / f"out{next(runs)}", repeat=repeat
+    )
+    return results
+
+
+def compare(results: dict, baselines: dict, tolerance: float, memtolerance: float):
+    """Get a message for each stage that is slower or larger than its baseline allows"""
+    regressions = list()
+    for scale, stages in results.items():
+        for stage, result in stages.items():
+            try:
+                baseline = baselines[scale][stage]
+            except KeyError:
+                logger.warning(f"No baseline for {stage} at scale {scale}")
+                continue
+            if result["count"] != baseline["count"]:
+                regressions.append(
+                    f"{stage} x{scale}: processed {result['count']:,} items "
+                    f"(baseline {baseline['count']:,})"
+                )
+            limit = baseline["seconds"] * (1 + tolerance)
+            if (
+                result["seconds"] > limit
+                and result["seconds"] - baseline["seconds"] > MIN_SECONDS_DELTA
+            ):
+                regressions.append(
+                    f"{stage} x{scale}: {result['seconds']:.4f}s "
+                    f"(baseline {baseline['seconds']:.4f}s)"
+                )
+            if result["peak_bytes"] > baseline["peak_bytes"] * (1 + memtolerance):
+                regressions.append(
+                    f"{stage} x{scale}: peak {result['peak_bytes']:,} bytes "
+                    f"(baseline {baseline['peak_bytes']:,} bytes)"
+                )
+    return regressions
+
+
+def main(**kwargs):
+    """
+    main function
+    """
+    scales = [int(s) for s in kwargs["scales"].split(",")]
+    repeat = int(kwargs["repeat"])
+    baselines_path = Path(kwargs["baselines"]).expanduser().resolve()
+    results = dict()
+    with TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        # keep the benchmark's dataset caches away from the user's own
+        dataset.user_cache_dir = lambda *args, **kwargs: str(tmp)
+        for scale in scales:
+            workpath = tmp / f"x{scale}"
+            workpath.mkdir()
+            results[str(scale)] = benchmark_scale(scale, workpath, repeat)
+    for scale, stages in results.items():
+        for stage, result in stages.items():
+            print(
+                f"x{scale:<5} {stage:<30} {result['seconds']:>10.4f}s "
+                f"{result['peak_bytes']:>14,} bytes {result['count']:>10,} items"
+            )
+    if kwargs["output"]:
+        with open(kwargs["output"], "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        del f
+    if kwargs["update"]:
+        try:
+            with open(baselines_path, "r", encoding="utf-8") as f:
+                baselines = json.load(f)["scales"]
+            del f
+        except FileNotFoundError:
+            baselines = dict()
+        baselines.update(results)
+        with open(baselines_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": BASELINES_VERSION, "scales": baselines},
+                f,
+                indent=4,
+                sort_keys=True,
+            )
+        del f
+        print(f"Updated baselines in {baselines_path}")
+        return
+    try:
+        with open(baselines_path, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+        del f
+    except FileNotFoundError:
+        print(f"No baselines at {baselines_path}; run with --update to store them")
+        return
+    if baselines.get("version") != BASELINES_VERSION:
+        raise RuntimeError(f"Unsupported baselines version in {baselines_path}")
+    regressions = compare(
+        results,
+        baselines["scales"],
+        float(kwargs["tolerance"]),
+        float(kwargs["memtolerance"]),
+    )
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baselines")
+
+
+if __name__ == "__main__":
+    main(
+        **configure_commandline(
+            OPTIONAL_ARGUMENTS, POSITIONAL_ARGUMENTS, DEFAULT_LOG_LEVEL
+        )
+    )
@@ -0,0 +1,83 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Build or update the consolidated Pleiades reference index
+"""
+
+from airtight.cli import configure_commandline
+import logging
+from os import environ
+from pathlib import Path
+from pleiades_sidebar.pleiades_index import PleiadesIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+OPTIONAL_ARGUMENTS = [
+    [
+        "-l",
+        "--loglevel",
+        "NOTSET",
+        "desired logging level ("
+        + "case-insensitive string: DEBUG, INFO, WARNING, or ERROR",
+        False,
+    ],
+    ["-v", "--verbose", False, "verbose output (logging level == INFO)", False],
+    [
+        "-w",
+        "--veryverbose",
+        False,
+        "very verbose output (logging level == DEBUG)",
+        False,
+    ],
+    [
+        "-p",
+        "--pleiades",
+        environ.get("PLEIADES_PATH", ""),
+        "path to the Pleiades JSON tree",
+        False,
+    ],
+    [
+        "-i",
+        "--index",
+        "",
+        "path to the index file (default: in the user cache directory)",
+        False,
+    ],
+    ["-j", "--workers", 1, "number of worker processes for reading JSON", False],
+]
+POSITIONAL_ARGUMENTS = [
+    # each row is a list with 3 elements: name, type, help
+]
+
+
+def main(**kwargs):
+    """
+    main function
+    """
+    pleiades_path = Path(kwargs["pleiades"]).expanduser().resolve()
+    index_path = kwargs["index"].strip()
+    if index_path:
+        index_path = Path(index_path).expanduser().resolve()
+    else:
+        index_path = None
+    index = PleiadesIndex(pleiades_path, index_path)
+    stats = index.update(workers=kwargs["workers"])
+    index.close()
+    print(
+        f"{index.path}: {stats['added']:,} added, {stats['updated']:,} updated, "
+        f"{stats['removed']:,} removed, {stats['unchanged']:,} unchanged"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        **configure_commandline(
+            OPTIONAL_ARGUMENTS, POSITIONAL_ARGUMENTS, DEFAULT_LOG_LEVEL
+        )
+    )
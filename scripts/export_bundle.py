@@ -0,0 +1,69 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Unpack a sidebar bundle into one JSON file per Pleiades place
+"""
+
+from airtight.cli import configure_commandline
+import logging
+from pathlib import Path
+from pleiades_sidebar.bundle import BundleReader
+from pleiades_sidebar.writer import SidebarWriter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+OPTIONAL_ARGUMENTS = [
+    [
+        "-l",
+        "--loglevel",
+        "NOTSET",
+        "desired logging level ("
+        + "case-insensitive string: DEBUG, INFO, WARNING, or ERROR",
+        False,
+    ],
+    ["-v", "--verbose", False, "verbose output (logging level == INFO)", False],
+    [
+        "-w",
+        "--veryverbose",
+        False,
+        "very verbose output (logging level == DEBUG)",
+        False,
+    ],
+    ["-j", "--workers", 1, "number of threads to use for writing files", False],
+]
+POSITIONAL_ARGUMENTS = [
+    # each row is a list with 3 elements: name, type, help
+    ["bundle", str, "directory containing the bundle written by generate.py -f bundle"],
+    ["output", str, "directory into which to write one JSON file per place"],
+]
+
+
+def main(**kwargs):
+    """
+    main function
+    """
+    reader = BundleReader(Path(kwargs["bundle"]).expanduser().resolve())
+    writer = SidebarWriter(
+        Path(kwargs["output"]).expanduser().resolve(), workers=kwargs["workers"]
+    )
+    writer.outpath.mkdir(parents=True, exist_ok=True)
+    stats = writer.write(reader.items())
+    writer.save_index()
+    print(
+        f"{writer.outpath}: {stats['written']:,} files written, "
+        f"{stats['unchanged']:,} unchanged"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        **configure_commandline(
+            OPTIONAL_ARGUMENTS, POSITIONAL_ARGUMENTS, DEFAULT_LOG_LEVEL
+        )
+    )
@@ -10,18 +10,27 @@ Python 3 script template (changeme)
 """
 
 from airtight.cli import configure_commandline
-import json
+import cProfile
 import logging
+import sys
 from os import environ
 from pathlib import Path
+from pleiades_sidebar.bundle import BundleWriter
 from pleiades_sidebar.generator import Generator
+from pleiades_sidebar.manifest import Manifest
+from pleiades_sidebar.serialize import Serializer
+from pleiades_sidebar.writer import SidebarWriter
 from pprint import pprint, pformat
 from slugify import slugify
+import tracemalloc
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_NAMESPACES = environ.get("SIDEBAR_NAMESPACES")
 DEFAULT_LOG_LEVEL = logging.WARNING
+MANIFEST_FILENAME = "manifest.json"
+RUN_METADATA_FILENAME = "run_metadata.json"
+OUTPUT_FORMATS = ("files", "bundle")
 OPTIONAL_ARGUMENTS = [
     [
         "-l",
@@ -39,7 +48,72 @@ OPTIONAL_ARGUMENTS = [
         "very verbose output (logging level == DEBUG)",
         False,
     ],
-    ["-c", "--usecache", False, "use cached data", False],
+    [
+        "-c",
+        "--usecache",
+        False,
+        "use cached data without checking whether source files have changed",
+        False,
+    ],
+    [
+        "-r",
+        "--refresh",
+        False,
+        "re-parse all source files even if cached data is fresh",
+        False,
+    ],
+    [
+        "-b",
+        "--cachebackend",
+        "pickle",
+        "dataset cache backend: 'pickle' or 'sqlite' (items loaded on demand)",
+        False,
+    ],
+    [
+        "-x",
+        "--hashinputs",
+        False,
+        "also compare source files to cached data by content hash",
+        False,
+    ],
+    [
+        "-j",
+        "--workers",
+        1,
+        "number of worker processes to use for loading datasets (and building the "
+        + "Pleiades index) in parallel",
+        False,
+    ],
+    [
+        "-a",
+        "--parseworkers",
+        1,
+        "number of worker processes to use for parsing each dataset's source records "
+        + "in chunks (results are the same as with 1)",
+        False,
+    ],
+    [
+        "-u",
+        "--writeworkers",
+        1,
+        "number of threads to use for writing sidebar files",
+        False,
+    ],
+    [
+        "-y",
+        "--partial",
+        False,
+        "with --workers, write output without namespaces that fail to load instead "
+        + "of stopping (the run still exits with an error status)",
+        False,
+    ],
+    [
+        "-p",
+        "--pleiadesindex",
+        False,
+        "read Pleiades titles and references from a consolidated index (updated as needed)",
+        False,
+    ],
     [
         "-n",
         "--namespaces",
@@ -54,6 +128,69 @@ OPTIONAL_ARGUMENTS = [
         "path to directory into which to write output JSON files",
         False,
     ],
+    [
+        "-i",
+        "--incremental",
+        False,
+        "rewrite only places whose inputs changed since the last run, using the run "
+        + "manifest in the output directory, and remove files for places without matches",
+        False,
+    ],
+    [
+        "-f",
+        "--format",
+        "files",
+        "output layout: 'files' (one JSON file per place) or 'bundle' (NDJSON shards "
+        + "with an offset index; see export_bundle.py)",
+        False,
+    ],
+    [
+        "-s",
+        "--serialization",
+        "pretty",
+        "JSON output profile: 'pretty' (indented) or 'compact' (no whitespace); "
+        + "bundle records are always compact",
+        False,
+    ],
+    [
+        "-e",
+        "--encoder",
+        "auto",
+        "JSON encoder: 'json', 'orjson' (compact only), or 'auto' (orjson for "
+        + "compact output if it is installed)",
+        False,
+    ],
+    [
+        "-k",
+        "--offline",
+        False,
+        "never fetch JSON-LD contexts; use vendored or previously cached copies "
+        + "(a dataset whose context has neither fails to load)",
+        False,
+    ],
+    [
+        "-t",
+        "--report",
+        "",
+        "write wall time, items per second and peak memory of each stage of the run "
+        + "to this JSON file",
+        False,
+    ],
+    [
+        "-m",
+        "--tracemalloc",
+        False,
+        "measure the peak memory of each stage with tracemalloc (much slower)",
+        False,
+    ],
+    [
+        "-d",
+        "--profile",
+        "",
+        "profile the run with cProfile and dump the stats to this file "
+        + "(read them with pstats or snakeviz)",
+        False,
+    ],
 ]
 POSITIONAL_ARGUMENTS = [
     # each row is a list with 3 elements: name, type, help
@@ -64,54 +201,173 @@ def main(**kwargs):
     """
     main function
     """
+    if kwargs["tracemalloc"]:
+        tracemalloc.start()
+    profiler = None
+    if kwargs["profile"]:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        instruments, failed = generate(**kwargs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(kwargs["profile"])
+            logger.info(f"Wrote cProfile stats to {kwargs['profile']}")
+        if kwargs["tracemalloc"]:
+            tracemalloc.stop()
+    if kwargs["report"]:
+        instruments.save(Path(kwargs["report"]).expanduser().resolve())
+    for name, stage in instruments.report()["stages"].items():
+        msg = f"Stage {name}: {stage['seconds']:.3f}s, {stage['items']:,} items"
+        if stage["items_per_second"] is not None:
+            msg += f" ({stage['items_per_second']:,.0f}/s)"
+        if stage["peak_bytes"] is not None:
+            msg += f", peak {stage['peak_bytes']:,} bytes ({stage['peak_source']})"
+        logger.info(msg)
+    if failed:
+        logger.error(
+            f"Output is incomplete: namespaces {', '.join(failed.keys())} failed to load"
+        )
+        sys.exit(1)
+
+
+def generate(**kwargs) -> tuple:
+    """Generate and write (or print) the sidebar data
+
+    Returns the run's stage timings and the namespaces that failed to load (only
+    with --partial; otherwise a failure raises).
+    """
+    if kwargs["format"] not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format '{kwargs['format']}' (expected one of {OUTPUT_FORMATS})"
+        )
+    serializer = Serializer(kwargs["serialization"], kwargs["encoder"])
     namespaces = [ns.strip() for ns in kwargs["namespaces"].split(",")]
+    # namespaces without a path of their own fall back to their dataset's default
     ns_paths = {
-        ns: Path(environ.get(f"{ns.upper()}_PATH", "")).expanduser().resolve()
+        ns: Path(environ[f"{ns.upper()}_PATH"]).expanduser().resolve()
         for ns in namespaces
+        if f"{ns.upper()}_PATH" in environ
     }
-    logger.error(pformat(ns_paths, indent=4))
-    g = Generator(namespaces, ns_paths, use_cached=kwargs["usecache"])
-    p, unrecip = g.generate()
+    logger.info(f"Source paths: {pformat(ns_paths, indent=4)}")
+    g = Generator(
+        namespaces,
+        ns_paths,
+        use_cached=kwargs["usecache"],
+        workers=kwargs["workers"],
+        dataset_options={
+            "content_hash": kwargs["hashinputs"],
+            "refresh": kwargs["refresh"],
+            "offline": kwargs["offline"],
+            "parse_workers": kwargs["parseworkers"],
+            "cache_backend": kwargs["cachebackend"],
+        },
+        pleiades_options={
+            "use_index": kwargs["pleiadesindex"],
+            "workers": kwargs["workers"],
+        },
+        allow_partial=kwargs["partial"],
+    )
+    for ns, err in g.failed.items():
+        logger.error(f"Namespace '{ns}' was not loaded and will be omitted: {err}")
     outpath = kwargs["output"].strip()
+    manifest = None
     if outpath:
         outpath = Path(outpath).expanduser().resolve()
-        if not outpath.exists():
-            outpath.mkdir()
-        if outpath.is_dir():
-            for puri, data in p.items():
-                pid = puri.split("/")[-1]
-                try:
-                    dirpath = outpath / pid[0] / pid[1] / pid[2]
-                except IndexError as err:
-                    err.add_note(f"Failed creation of output path from puri: '{puri}'")
-                    raise err
-                dirpath.mkdir(parents=True, exist_ok=True)
-                filepath = dirpath / f"{pid}.json"
-                if not filepath.is_file():
-                    # don't write a file at all if we don't have content, unless we are
-                    # overwriting a file that's already there
-                    if len(data) == 0:
-                        logger.warning(
-                            f"Skipped writing {filepath} because there is no data content and the file did not already exist."
-                        )
-                        continue
-                with open(filepath, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=4)
-                del f
-            logger.info(f"Wrote sidebar JSON to {str(outpath)}")
-            for ns, data in unrecip.items():
-                pathsafe_ns = slugify(ns, separator="_")
-                filepath = outpath / f"unreciprocated_{pathsafe_ns}.json"
-                with open(filepath, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=4)
-                del f
-        else:
-            logger.error(
-                f"Could not write JSON because outpath is not a directory: {outpath}"
+        # full runs start a fresh manifest so the next incremental run has a baseline
+        manifest = Manifest(
+            outpath / MANIFEST_FILENAME,
+            load_previous=kwargs["incremental"],
+            run_inputs={
+                "namespaces": sorted(g.datasets.keys()),
+                "format": kwargs["format"],
+                "serialization": serializer.describe(),
+                "encoder": kwargs["encoder"],
+            },
+        )
+    elif kwargs["incremental"]:
+        logger.error("Ignoring --incremental because no output directory was given")
+    if not outpath:
+        p, unrecip = g.generate(manifest=manifest)
+        print(serializer.dumps(p).decode("utf-8"))
+        return (g.instruments, g.failed)
+    if not outpath.exists():
+        outpath.mkdir()
+    if not outpath.is_dir():
+        logger.error(
+            f"Could not write JSON because outpath is not a directory: {outpath}"
+        )
+        return (g.instruments, g.failed)
+    writer = SidebarWriter(
+        outpath, workers=kwargs["writeworkers"], serializer=serializer
+    )
+    metadata = {
+        "format": kwargs["format"],
+        "namespaces": sorted(g.datasets.keys()),
+        "serialization": serializer.describe(),
+    }
+    # unreciprocated items are streamed into their files as the generator produces
+    # them, and each place's data is written as soon as it is complete
+    unrecip_files = {
+        ns: writer.open_array(
+            outpath / f"unreciprocated_{slugify(ns, separator='_')}.json"
+        )
+        for ns in g.datasets.keys()
+    }
+    places = g.iter_generate(
+        manifest, lambda ns, ditem_lpf: unrecip_files[ns].append(ditem_lpf)
+    )
+    try:
+        if kwargs["format"] == "bundle":
+            bundle_writer = BundleWriter(outpath, backend=kwargs["encoder"])
+            metadata["bundle_serialization"] = bundle_writer.serializer.describe()
+            keep = None
+            if kwargs["incremental"]:
+                # a partial run keeps what it couldn't regenerate (see below)
+                keep = manifest.previous if g.failed else manifest.places
+            bstats = bundle_writer.write(places, keep=keep)
+            g.instruments.add("write_bundle", bstats["seconds"], bstats["places"])
+            logger.info(
+                f"Sidebar bundle in {str(outpath)}: {bstats['places']:,} places, "
+                f"{bstats['written']:,} files written, {bstats['unchanged']:,} unchanged"
             )
+        else:
+            writer.write(places)
+            if kwargs["incremental"] and not g.failed:
+                writer.remove(manifest.removed)
+    except BaseException:
+        for f in unrecip_files.values():
+            f.discard()
+        raise
+    for f in unrecip_files.values():
+        f.close()
+    writer.write_file(outpath / RUN_METADATA_FILENAME, metadata)
+    writer.save_index()
+    stats = writer.stats
+    g.instruments.add(
+        "write",
+        stats["seconds"],
+        stats["written"] + stats["unchanged"] + stats["skipped"],
+    )
+    logger.info(
+        f"Sidebar JSON in {str(outpath)}: {stats['written']:,} files written "
+        f"({stats['bytes']:,} bytes), {stats['unchanged']:,} unchanged, "
+        f"{stats['removed']:,} removed, {stats['skipped']:,} skipped as empty "
+        f"in {stats['seconds']:.3f}s"
+    )
+    if g.failed:
+        # places with matches in the failed namespaces were written without them or
+        # not at all, so the output no longer matches any manifest: the next
+        # incremental run must start afresh
+        logger.error(
+            "Not saving the run manifest and not removing places without matches "
+            "because namespaces failed to load"
+        )
+        manifest.discard()
     else:
-        s = json.dumps(p, ensure_ascii=False, indent=4)
-        print(s)
+        manifest.save()
+    return (g.instruments, g.failed)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Write a synthetic Pleiades tree and partner datasets for benchmarks and load tests
+"""
+
+from airtight.cli import configure_commandline
+import logging
+from pathlib import Path
+from pleiades_sidebar.synthetic import NAMESPACES, SyntheticCorpus, env_var
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+OPTIONAL_ARGUMENTS = [
+    [
+        "-l",
+        "--loglevel",
+        "NOTSET",
+        "desired logging level ("
+        + "case-insensitive string: DEBUG, INFO, WARNING, or ERROR",
+        False,
+    ],
+    ["-v", "--verbose", False, "verbose output (logging level == INFO)", False],
+    [
+        "-w",
+        "--veryverbose",
+        False,
+        "very verbose output (logging level == DEBUG)",
+        False,
+    ],
+    ["-p", "--places", 1000, "number of Pleiades places", False],
+    [
+        "-i",
+        "--items",
+        0,
+        "number of distinct items in each partner dataset (0: same as places)",
+        False,
+    ],
+    [
+        "-r",
+        "--reciprocity",
+        0.5,
+        "fraction of partner links that the Pleiades place reciprocates",
+        False,
+    ],
+    [
+        "-d",
+        "--duplicates",
+        0.05,
+        "fraction of partner items repeated with a link to another place",
+        False,
+    ],
+    ["-s", "--seed", 0, "random seed", False],
+    [
+        "-n",
+        "--namespaces",
+        ",".join(NAMESPACES),
+        "comma-separated partner namespaces to generate",
+        False,
+    ],
+]
+POSITIONAL_ARGUMENTS = [
+    # each row is a list with 3 elements: name, type, help
+    ["output", str, "directory into which to write the synthetic data"],
+]
+
+
+def main(**kwargs):
+    """
+    main function
+    """
+    corpus = SyntheticCorpus(
+        places=int(kwargs["places"]),
+        items=int(kwargs["items"]) or None,
+        reciprocity=float(kwargs["reciprocity"]),
+        duplicates=float(kwargs["duplicates"]),
+        seed=int(kwargs["seed"]),
+    )
+    paths = corpus.write(
+        Path(kwargs["output"]).expanduser().resolve(),
+        namespaces=[ns.strip() for ns in kwargs["namespaces"].split(",")],
+    )
+    # ready to paste into the environment for generate.py
+    for ns, path in paths.items():
+        print(f"{env_var(ns)}={path}")
+
+
+if __name__ == "__main__":
+    main(
+        **configure_commandline(
+            OPTIONAL_ARGUMENTS, POSITIONAL_ARGUMENTS, DEFAULT_LOG_LEVEL
+        )
+    )
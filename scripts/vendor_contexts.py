@@ -0,0 +1,70 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Fetch the package's vendored copies of known JSON-LD contexts
+"""
+
+from airtight.cli import configure_commandline
+import json
+import logging
+from pleiades_sidebar.context import DEFAULT_TIMEOUT, VENDORED_CONTEXTS, VENDORED_PATH
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_LEVEL = logging.WARNING
+OPTIONAL_ARGUMENTS = [
+    [
+        "-l",
+        "--loglevel",
+        "NOTSET",
+        "desired logging level ("
+        + "case-insensitive string: DEBUG, INFO, WARNING, or ERROR",
+        False,
+    ],
+    ["-v", "--verbose", False, "verbose output (logging level == INFO)", False],
+    [
+        "-w",
+        "--veryverbose",
+        False,
+        "very verbose output (logging level == DEBUG)",
+        False,
+    ],
+    ["-f", "--force", False, "fetch contexts that are already vendored again", False],
+]
+POSITIONAL_ARGUMENTS = [
+    # each row is a list with 3 elements: name, type, help
+]
+
+
+def main(**kwargs):
+    """
+    main function
+    """
+    VENDORED_PATH.mkdir(exist_ok=True)
+    for uri, filename in VENDORED_CONTEXTS.items():
+        path = VENDORED_PATH / filename
+        if path.exists() and not kwargs["force"]:
+            logger.info(f"Already vendored: {uri}")
+            continue
+        r = requests.get(uri, timeout=DEFAULT_TIMEOUT)
+        r.raise_for_status()
+        # fail here rather than at load time if this isn't a context document
+        r.json()["@context"]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(r.json(), f, indent=2, ensure_ascii=False)
+        del f
+        print(f"Vendored {uri} as {path}")
+
+
+if __name__ == "__main__":
+    main(
+        **configure_commandline(
+            OPTIONAL_ARGUMENTS, POSITIONAL_ARGUMENTS, DEFAULT_LOG_LEVEL
+        )
+    )
@@ -0,0 +1,295 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Bundled sidebar output: a few NDJSON shards with an offset index
+"""
+from collections.abc import Mapping
+from filecmp import cmp
+import json
+from logging import getLogger
+from os import replace
+from pathlib import Path
+from pleiades_sidebar.serialize import Serializer
+from pleiades_sidebar.writer import write_atomic
+from time import perf_counter
+
+BUNDLE_INDEX_FILENAME = "sidebar-index.json"
+BUNDLE_VERSION = 2
+
+
+def shard_name(pid: str, generation: int) -> str:
+    """Get the name of the shard file holding a place (one shard per leading digit)
+
+    Each write of a bundle names the shards it changes after a new generation, so the
+    shards an index points to are never overwritten in place.
+    """
+    return f"sidebar-{pid[0]}.{generation}.ndjson"
+
+
+def _pid(puri: str) -> str:
+    return puri.split("/")[-1]
+
+
+def _read_index(bundle_path: Path) -> dict:
+    """Get a bundle's index (None if there isn't one)"""
+    try:
+        with open(bundle_path / BUNDLE_INDEX_FILENAME, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        del f
+    except FileNotFoundError:
+        return None
+    if index.get("version") != BUNDLE_VERSION:
+        raise ValueError(
+            f"Unsupported bundle version {index.get('version')} in {bundle_path}"
+        )
+    return index
+
+
+class BundleReader:
+    """Read places from a bundle, seeking straight to each record via the index"""
+
+    def __init__(self, bundle_path: Path):
+        self.path = Path(bundle_path)
+        index = _read_index(self.path)
+        if index is None:
+            raise FileNotFoundError(
+                f"No bundle index {BUNDLE_INDEX_FILENAME} in {self.path}"
+            )
+        self.generation = index["generation"]
+        # pid -> [shard name, byte offset, byte length]
+        self._places = index["places"]
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def __contains__(self, puri: str) -> bool:
+        return _pid(puri) in self._places
+
+    def get(self, puri: str) -> list:
+        """Get the sidebar data for a place (or None if it isn't in the bundle)"""
+        try:
+            shard, offset, length = self._places[_pid(puri)]
+        except KeyError:
+            return None
+        return json.loads(self._read(shard, offset, length))["features"]
+
+    def items(self):
+        """Iterate over (Pleiades URI, sidebar data), shard by shard"""
+        for shard in self._shards():
+            with open(self.path / shard, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    yield (record["place"], record["features"])
+            del f
+
+    def raw_records(self):
+        """Iterate over (pid, serialized line) in pid order (used when merging)"""
+        by_shard = dict()
+        for pid, (shard, offset, length) in self._places.items():
+            by_shard.setdefault(shard, list()).append((offset, length, pid))
+        for shard in self._shards():
+            with open(self.path / shard, "rb") as f:
+                for offset, length, pid in sorted(by_shard[shard]):
+                    f.seek(offset)
+                    yield (pid, f.read(length))
+            del f
+
+    def shard_files(self) -> dict:
+        """Get the name of the shard file for each leading pid digit"""
+        return {shard.split("-")[1][0]: shard for shard in self._shards()}
+
+    def _read(self, shard: str, offset: int, length: int) -> bytes:
+        with open(self.path / shard, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        del f
+        return data
+
+    def _shards(self) -> list:
+        return sorted({shard for shard, _, _ in self._places.values()})
+
+
+class BundleWriter:
+    """Pack sidebar data into one NDJSON shard per leading pid digit plus an index
+
+    Each line is {"place": Pleiades URI, "features": sidebar data}, serialized
+    compactly; the index maps each pid to the shard, byte offset and length of its line,
+    so one place can be read without scanning a shard (see BundleReader). Places with
+    no data are left out.
+
+    Records are streamed into temporary shard files in pid order. A shard whose bytes
+    haven't changed keeps its existing file; changed shards are published under new
+    generation names that no index refers to yet, then the index is replaced
+    atomically, and only then are shards it no longer refers to removed. An
+    interrupted write, or a reader opening the bundle meanwhile, therefore always sees
+    an index together with the shards it was written for.
+    """
+
+    def __init__(self, bundle_path: Path, backend: str = "auto"):
+        """
+        backend: JSON encoder for the records (see serialize.BACKENDS)
+        """
+        self.path = Path(bundle_path)
+        self.serializer = Serializer("compact", backend)
+        self.stats = {
+            "places": 0,
+            "written": 0,
+            "unchanged": 0,
+            "removed": 0,
+            "seconds": 0.0,
+        }
+
+    def write(self, sidebar, keep=None) -> dict:
+        """
+        Write a bundle for sidebar and return counts of places and shard files
+
+        sidebar: a dictionary, or an iterable of (Pleiades URI, data) pairs in URI order
+            such as Generator.iter_generate()
+        keep: Pleiades URIs whose records in the existing bundle are carried over if
+            sidebar doesn't replace them (for incremental runs, e.g. manifest.places);
+            only consulted once the first place has been taken from sidebar, by which
+            time iter_generate has carried over every unchanged place
+        """
+        logger = getLogger("BundleWriter.write")
+        self.path.mkdir(parents=True, exist_ok=True)
+        try:
+            previous = BundleReader(self.path)
+        except FileNotFoundError:
+            previous = None
+        except (ValueError, json.JSONDecodeError):
+            # records can't be carried over from a bundle that can't be read
+            if keep is not None:
+                raise
+            previous = None
+        if previous is None:
+            self._generation = 1
+            self._previous_shards = dict()
+        else:
+            self._generation = previous.generation + 1
+            self._previous_shards = previous.shard_files()
+        if keep is None:
+            old = iter(())
+        else:
+            old = previous.raw_records() if previous is not None else iter(())
+        if isinstance(sidebar, Mapping):
+            sidebar = sorted(sidebar.items(), key=lambda item: _pid(item[0]))
+        # pid -> [leading digit, byte offset, byte length] until shards are named
+        self._index = dict()
+        # leading digit -> name of the shard file written or kept
+        self._shards = dict()
+        self._shard = None
+        try:
+            seconds = self._stream(sidebar, keep, old)
+            start = perf_counter()
+            self._close_shard()
+        except BaseException:
+            if self._shard is not None:
+                self._shard[2].close()
+                self._shard[1].unlink(missing_ok=True)
+            raise
+        generation = self._generation
+        if self.stats["written"] == 0 and previous is not None:
+            # no new shard names, so an unchanged index needn't be rewritten
+            generation = previous.generation
+        index = {
+            pid: [self._shards[digit], offset, length]
+            for pid, (digit, offset, length) in self._index.items()
+        }
+        self._write_if_changed(
+            self.path / BUNDLE_INDEX_FILENAME,
+            json.dumps(
+                {"version": BUNDLE_VERSION, "generation": generation, "places": index},
+                sort_keys=True,
+            ).encode("utf-8"),
+        )
+        current = set(self._shards.values())
+        for stale in self.path.glob("sidebar-*.ndjson"):
+            if stale.name not in current:
+                stale.unlink()
+                self.stats["removed"] += 1
+        self.stats["places"] = len(index)
+        self.stats["seconds"] += seconds + perf_counter() - start
+        logger.debug(f"Wrote sidebar bundle to {self.path}: {self.stats}")
+        return self.stats
+
+    def _stream(self, sidebar, keep, old) -> float:
+        """Merge sidebar with the kept records of old; return the time taken"""
+        # time spent producing the places doesn't count toward write time
+        seconds = 0.0
+        keep_pids = None
+        old_record = next(old, None)
+        last_pid = ""
+        for puri, data in sidebar:
+            start = perf_counter()
+            if keep_pids is None:
+                keep_pids = {_pid(k) for k in keep} if keep is not None else set()
+            pid = _pid(puri)
+            if pid <= last_pid:
+                raise ValueError(
+                    f"Places must come in Pleiades URI order: {puri} came after pid "
+                    f"{last_pid}"
+                )
+            last_pid = pid
+            while old_record is not None and old_record[0] <= pid:
+                if old_record[0] < pid and old_record[0] in keep_pids:
+                    self._append(*old_record)
+                old_record = next(old, None)
+            if len(data) != 0:
+                self._append(
+                    pid, self.serializer.dumps({"place": puri, "features": data})
+                )
+            seconds += perf_counter() - start
+        start = perf_counter()
+        if keep_pids is None:
+            keep_pids = {_pid(k) for k in keep} if keep is not None else set()
+        while old_record is not None:
+            if old_record[0] in keep_pids:
+                self._append(*old_record)
+            old_record = next(old, None)
+        return seconds + perf_counter() - start
+
+    def _append(self, pid: str, line: bytes):
+        """Add a record to the temporary file of its shard"""
+        if self._shard is None or self._shard[0] != pid[0]:
+            self._close_shard()
+            tmp_path = self.path / f".{shard_name(pid, self._generation)}.tmp"
+            self._shard = [pid[0], tmp_path, open(tmp_path, "wb"), 0]
+        digit, _, f, offset = self._shard
+        f.write(line)
+        f.write(b"\n")
+        self._index[pid] = [digit, offset, len(line)]
+        self._shard[3] = offset + len(line) + 1
+
+    def _close_shard(self):
+        """Publish the current shard, or keep the existing file if it is unchanged"""
+        if self._shard is None:
+            return
+        digit, tmp_path, f, _ = self._shard
+        f.close()
+        self._shard = None
+        try:
+            existing = self.path / self._previous_shards[digit]
+            unchanged = cmp(tmp_path, existing, shallow=False)
+        except (KeyError, FileNotFoundError):
+            unchanged = False
+        if unchanged:
+            tmp_path.unlink()
+            self._shards[digit] = existing.name
+            self.stats["unchanged"] += 1
+        else:
+            self._shards[digit] = tmp_path.name[1 : -len(".tmp")]
+            replace(tmp_path, self.path / self._shards[digit])
+            self.stats["written"] += 1
+
+    def _write_if_changed(self, filepath: Path, s: bytes):
+        try:
+            unchanged = filepath.stat().st_size == len(s) and filepath.read_bytes() == s
+        except FileNotFoundError:
+            unchanged = False
+        if not unchanged:
+            write_atomic(filepath, s)
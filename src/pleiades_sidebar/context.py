@@ -0,0 +1,177 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Resolve JSON-LD context URIs from vendored copies, a disk cache, or the network
+"""
+
+from hashlib import sha256
+import json
+import logging
+from pathlib import Path
+from platformdirs import user_cache_dir
+from pleiades_sidebar.writer import write_atomic
+from time import time
+
+# contexts shipped with the package, named by URI (see scripts/vendor_contexts.py)
+VENDORED_PATH = Path(__file__).parent / "contexts"
+VENDORED_CONTEXTS = {
+    "https://raw.githubusercontent.com/LinkedPasts/linked-places/master/linkedplaces-context-v1.1.jsonld": "linkedplaces-context-v1.1.jsonld",
+}
+
+# revalidate cached contexts that were fetched or checked longer ago than this
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+DEFAULT_TIMEOUT = 10
+
+
+def read_context(path: Path) -> dict:
+    """Get the "@context" of a JSON-LD context document"""
+    with open(path, "r", encoding="utf-8") as f:
+        j = json.load(f)
+    del f
+    return j["@context"]
+
+
+class ContextResolver:
+    """Get the term definitions of JSON-LD contexts by URI, fetching as rarely as possible
+
+    Contexts are looked up in turn in:
+    - this resolver's memory (so datasets loaded in the same process share them)
+    - the package's vendored copies of known contexts (never revalidated)
+    - a disk cache of contexts fetched before, revalidated with a conditional request
+      (ETag/Last-Modified) once they are older than max_age; if revalidation fails,
+      the cached copy is used anyway
+    - the network
+    Offline, only the first three are consulted.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path = None,
+        vendored_path: Path = VENDORED_PATH,
+        max_age: float = DEFAULT_MAX_AGE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        """
+        cache_path: directory for fetched contexts (None: "contexts" in the user cache)
+        """
+        self._cache_path = cache_path
+        self._vendored_path = vendored_path
+        self.max_age = max_age
+        self.timeout = timeout
+        self._contexts = dict()
+        # where each context came from: "vendored", "cache", "revalidated", "network"
+        self.sources = dict()
+        # contexts found nowhere while offline (not looked for again until online)
+        self._offline_misses = set()
+
+    @property
+    def cache_path(self) -> Path:
+        if self._cache_path is not None:
+            return self._cache_path
+        path = Path(user_cache_dir("pleiades_sidebar", ensure_exists=True)) / "contexts"
+        path.mkdir(exist_ok=True)
+        return path
+
+    def resolve(self, uri: str, offline: bool = False) -> dict:
+        """Get the term definitions of the context at uri (None if unavailable)"""
+        logger = logging.getLogger("ContextResolver.resolve")
+        try:
+            return self._contexts[uri]
+        except KeyError:
+            pass
+        if offline and uri in self._offline_misses:
+            return None
+        context = self._vendored(uri)
+        if context is None:
+            context = self._cached_or_fetched(uri, offline)
+        if context is None:
+            # a failed fetch has already been logged
+            if offline:
+                logger.warning(
+                    f"JSON-LD context {uri} is not vendored or cached and resolution "
+                    "is offline"
+                )
+                self._offline_misses.add(uri)
+            return None
+        self._contexts[uri] = context
+        return context
+
+    def _vendored(self, uri: str) -> dict:
+        logger = logging.getLogger("ContextResolver._vendored")
+        try:
+            path = self._vendored_path / VENDORED_CONTEXTS[uri]
+        except KeyError:
+            return None
+        if not path.exists():
+            logger.warning(
+                f"JSON-LD context {uri} should be vendored as {path}, but isn't: run "
+                "scripts/vendor_contexts.py before building the package"
+            )
+            return None
+        self.sources[uri] = "vendored"
+        return read_context(path)
+
+    def _entry_path(self, uri: str) -> Path:
+        return self.cache_path / f"{sha256(uri.encode('utf-8')).hexdigest()}.json"
+
+    def _cached_or_fetched(self, uri: str, offline: bool) -> dict:
+        logger = logging.getLogger("ContextResolver._cached_or_fetched")
+        entry_path = self._entry_path(uri)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            del f
+        except (FileNotFoundError, json.JSONDecodeError):
+            entry = None
+        if entry is not None and (offline or time() - entry["checked"] < self.max_age):
+            self.sources[uri] = "cache"
+            return entry["context"]
+        if offline:
+            return None
+
+        headers = dict()
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        # imported here since it is slow to import and usually not needed
+        import requests
+
+        try:
+            r = requests.get(uri, headers=headers, timeout=self.timeout)
+            if r.status_code == 304 and entry is not None:
+                self.sources[uri] = "revalidated"
+            elif r.status_code == 200:
+                entry = {
+                    "uri": uri,
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                    "context": r.json()["@context"],
+                }
+                self.sources[uri] = "network"
+            else:
+                raise ValueError(f"HTTP status {r.status_code}")
+        except (requests.RequestException, ValueError, KeyError) as err:
+            if entry is None:
+                logger.error(f"Failed to fetch JSON-LD context {uri}: {err}")
+                return None
+            logger.warning(
+                f"Failed to revalidate JSON-LD context {uri} ({err}); "
+                "using the cached copy"
+            )
+            self.sources[uri] = "cache"
+            return entry["context"]
+        entry["checked"] = time()
+        # parallel loads share the cache, so never let one see a half-written entry
+        write_atomic(entry_path, json.dumps(entry).encode("utf-8"))
+        return entry["context"]
+
+
+# Shared by all datasets loaded in a process
+CONTEXTS = ContextResolver()
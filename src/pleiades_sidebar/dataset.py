@@ -8,16 +8,39 @@
 """
 Define a base class for a dataset manager
 """
-from copy import deepcopy
-from encoded_csv import get_csv
+import chardet
+import codecs
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+import csv
+from hashlib import sha256
+from itertools import islice
 import json
 import jsonlines
 import logging
+from os import replace
 from pathlib import Path
 from platformdirs import user_cache_dir
+from pleiades_sidebar.context import CONTEXTS
+from pleiades_sidebar.instrument import Instruments
+from pleiades_sidebar.linkkey import link_key
+from pleiades_sidebar.norm import NORMALIZER
+from pleiades_sidebar.registry import env_path
+from pleiades_sidebar.store import (
+    ItemStore,
+    PleiadesIndexStore,
+    read_meta,
+    write_store,
+)
 from pprint import pformat
-from pickle import Pickler, Unpickler
-import requests
+from pickle import Pickler, Unpickler, UnpicklingError
+from sys import intern
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 RESOURCE_URIS = {
     "cfl/ado": "",
@@ -39,6 +62,26 @@ RESOURCE_URIS = {
     "wikidata": "https://wikidata.org/entities/",
 }
 
+# raw records handed to a worker process at a time when parsing in parallel
+DEFAULT_PARSE_CHUNK_SIZE = 2000
+# bytes json_header reads at a time (see json_header)
+HEADER_BUF_SIZE = 4096
+
+# Bump whenever the layout of cache files changes
+CACHE_FORMAT = 5
+# Bump whenever the derived lookup structures stored in caches change shape
+INDEX_VERSION = 1
+# Supported cache backends and their file suffixes
+CACHE_BACKENDS = {"pickle": "pickle", "sqlite": "sqlite"}
+
+
+class CacheError(RuntimeError):
+    """A dataset cache that can't be read (unrecognized or damaged): reload from source"""
+
+
+# Items keep their raw source records after parsing only if this logger allows DEBUG
+ITEM_LOGGER = logging.getLogger("DataItem")
+
 LPF_FEATURE_COLLECTION_TEMPLATE = {
     "type": "FeatureCollection",
     "@context": "https://raw.githubusercontent.com/LinkedPasts/linked-places/master/linkedplaces-context-v1.1.jsonld",
@@ -53,8 +96,174 @@ LPF_FEATURE_TEMPLATE = {
 }
 
 
+def iter_delimited(datafile_path: Path, dialect=None, sample_lines: int = 1000):
+    """Yield rows from a CSV/TSV file one at a time as dictionaries
+
+    Encoding and (if not given) dialect are detected the same way encoded_csv.get_csv
+    does it, but rows are never accumulated in a list.
+    """
+    logger = logging.getLogger("iter_delimited")
+    rpath = Path(datafile_path).resolve()
+    with open(rpath, "rb") as f:
+        raw = f.read(1024)
+    del f
+    if raw.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    else:
+        encoding = chardet.detect(raw)["encoding"]
+        if encoding in (None, "ascii"):
+            # only the first KiB was sampled; UTF-8 reads ASCII as well as anything after
+            encoding = "utf-8"
+    with open(rpath, "r", encoding=encoding, newline="") as f:
+        if dialect is None:
+            sample = "".join(islice(f, sample_lines))
+            dialect = csv.Sniffer().sniff(sample)
+            f.seek(0)
+        reader = csv.DictReader(f, dialect=dialect)
+        logger.debug(
+            f"Streaming rows from {rpath} ({encoding}) with fieldnames: {pformat(reader.fieldnames, indent=4)}"
+        )
+        yield from reader
+    del f
+
+
+def iter_json(datafile_path: Path, prefix: str, pairs: bool = False):
+    """Yield the items found under prefix in a JSON file one at a time
+
+    prefix uses ijson notation (e.g. "features.item"); with pairs=True, yield (key, value)
+    tuples from the object at prefix instead. Uses ijson to parse incrementally when it
+    is installed, otherwise falls back to loading the whole document.
+    """
+    if ijson is not None:
+        with open(datafile_path, "rb") as f:
+            if pairs:
+                yield from ijson.kvitems(f, prefix, use_float=True)
+            else:
+                yield from ijson.items(f, prefix, use_float=True)
+        del f
+        return
+    with open(datafile_path, "r", encoding="utf-8") as f:
+        j = json.load(f)
+    del f
+    for key in [k for k in prefix.split(".") if k and k != "item"]:
+        j = j[key]
+    if pairs:
+        yield from j.items()
+    else:
+        yield from j
+
+
+def iter_ndjson(datafile_path: Path):
+    """Yield objects from a newline-delimited JSON file one at a time"""
+    with jsonlines.open(str(datafile_path)) as reader:
+        yield from reader
+    del reader
+
+
+def json_header(datafile_path: Path, keys: list) -> dict:
+    """Get the values of top-level keys in a JSON file, reading as little as possible
+
+    Reads a single pass that ends as soon as every key has been found, so a header
+    that comes before the bulk of the file (e.g. the "features" of an LPF file) is read
+    without parsing the rest; keys that come later are still found, by scanning on
+    past the values in between without building them. Keys missing from the document
+    are left out. Without ijson the whole document has to be loaded: see
+    load_json_header for a way to reuse it.
+    """
+    if ijson is None:
+        header, _ = load_json_header(datafile_path, keys)
+        return header
+    header = dict()
+    with open(datafile_path, "rb") as f:
+        # the C backend produces the events of a whole buffer at once, so read small
+        # buffers to keep the events of the first one from dwarfing the header
+        events = ijson.parse(f, buf_size=HEADER_BUF_SIZE, use_float=True)
+        for prefix, event, value in events:
+            if prefix != "" or event != "map_key" or value not in keys:
+                continue
+            key = value
+            builder = ijson.ObjectBuilder()
+            depth = 0
+            for _, event, value in events:
+                builder.event(event, value)
+                if event in ("start_map", "start_array"):
+                    depth += 1
+                elif event in ("end_map", "end_array"):
+                    depth -= 1
+                if depth == 0:
+                    break
+            header[key] = builder.value
+            if len(header) == len(keys):
+                break
+    del f
+    return header
+
+
+def load_json_header(datafile_path: Path, keys: list) -> tuple:
+    """Load a whole JSON document once; return (values of keys found, document)"""
+    with open(datafile_path, "r", encoding="utf-8") as f:
+        j = json.load(f)
+    del f
+    return ({k: j[k] for k in keys if k in j}, j)
+
+
+def _normalize_link(link):
+    if isinstance(link, tuple):
+        return (intern(link[0]), _normalize_link(link[1]))
+    if link.startswith("http://pleiades.stoa.org/"):
+        return "https://" + link[len("http://") :]
+    return link
+
+
+def intern_links(links: dict) -> dict:
+    """Intern the netloc keys and link types of a links dictionary
+
+    Items share a handful of netlocs and link types, so interning them keeps one copy of
+    each string in memory (and in pickles) instead of one per item. Pleiades URIs are
+    normalized to https on the way.
+    """
+    return {
+        intern(netloc): [_normalize_link(link) for link in domain_links]
+        for netloc, domain_links in links.items()
+    }
+
+
+# the dataset whose _make_item a parsing worker process uses (see _parse_parallel)
+_parser = None
+
+
+def _set_parser(parser):
+    global _parser
+    _parser = parser
+
+
+def _parse_chunk(chunk: list) -> tuple:
+    """Parse a chunk of raw records in a worker process
+
+    Returns the items and what parsing them added to the worker's normalizer counters,
+    so they can be added to the parent process's.
+    """
+    before = NORMALIZER.counts()
+    items = list()
+    for raw_item in chunk:
+        item = _parser._make_item(raw_item)
+        if item is not None:
+            items.append(item)
+    after = NORMALIZER.counts()
+    return (items, {k: after[k] - before[k] for k in after})
+
+
 class DataItem:
-    """An individual data item in a dataset"""
+    """An individual data item in a dataset
+
+    Subclasses must declare __slots__ too (even if empty), or their instances get a
+    __dict__ again. The raw source record is only kept after parsing when the DataItem
+    logger is enabled for DEBUG, and is never pickled.
+    """
+
+    __slots__ = ("label", "uri", "summary", "links", "_raw_data", "_lpf")
+    # the parsed fields, i.e. everything that goes in a cache
+    _fields = ("label", "uri", "summary", "links")
 
     def __init__(self, raw: dict):
         self.label = None
@@ -62,8 +271,38 @@ class DataItem:
         self.summary = None
         self.links = dict()
         self._raw_data = raw
+        self._lpf = None
         # TBD: make spatial?
         self._parse()
+        self.links = intern_links(self.links)
+        if not ITEM_LOGGER.isEnabledFor(logging.DEBUG):
+            self._raw_data = None
+
+    @classmethod
+    def from_fields(cls, label: str, uri: str, summary: str, links: dict):
+        """Rebuild an already-parsed item (e.g. from a compact store) without raw data"""
+        item = cls.__new__(cls)
+        item.label = label
+        item.uri = uri
+        item.summary = summary
+        item.links = intern_links(links)
+        item._raw_data = None
+        item._lpf = None
+        return item
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __setstate__(self, state: dict):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._raw_data = None
+        self._lpf = None
+
+    @property
+    def link_key(self) -> str:
+        """Canonical "domain:id" key of this item's URI, for reciprocity matching"""
+        return link_key(self.uri)
 
     @property
     def pleiades_uris(self) -> str:
@@ -79,37 +318,54 @@ class DataItem:
                 clean_links.add(link[1])
         return list(clean_links)
 
+    def merge_links(self, links: dict):
+        """Add links (keyed by netloc) from a duplicate record for the same item"""
+        for netloc, domain_links in intern_links(links).items():
+            try:
+                self.links[netloc].extend(domain_links)
+            except KeyError:
+                self.links[netloc] = domain_links
+        self._lpf = None
+
     def to_lpf_dict(self):
-        """Get LPF formatted dictionary, suitable to save as JSON"""
-        d = deepcopy(LPF_FEATURE_TEMPLATE)
-        d["@id"] = self.uri
-        d["properties"]["title"] = self.label
-        d["properties"]["summary"] = self.summary
+        """Get LPF formatted dictionary, suitable to save as JSON
+
+        The LPF form is built once per item (see merge_links for invalidation). Callers
+        get their own outer and properties dictionaries, which they may modify, but
+        share the links list, which they must replace rather than change in place.
+        """
+        if self._lpf is None:
+            self._lpf = self._build_lpf_dict()
+        lpf = self._lpf
+        return {
+            "@id": lpf["@id"],
+            "type": lpf["type"],
+            "properties": dict(lpf["properties"]),
+            "links": lpf["links"],
+        }
+
+    def _build_lpf_dict(self) -> dict:
+        links = list()
         link_uris = set()
         for domain_links in self.links.values():
             for link in domain_links:
                 if isinstance(link, str):
-                    link = link.replace(
-                        "http://pleiades.stoa.org/", "https://pleiades.stoa.org/"
-                    )
-                    if link not in link_uris:
-                        link_uris.add(link)
-                        dl = {"type": "closeMatch", "identifier": link}
-                    else:
-                        continue
+                    link_type, uri = "closeMatch", link
                 elif isinstance(link, tuple) and len(link) == 2:
-                    uri = link[1].replace(
-                        "http://pleiades.stoa.org/", "https://pleiades.stoa.org/"
-                    )
-                    if uri not in link_uris:
-                        link_uris.add(uri)
-                        dl = {"type": link[0], "identifier": uri}
-                    else:
-                        continue
+                    link_type, uri = link
                 else:
                     raise ValueError(type(link))
-                d["links"].append(dl)
-        return d
+                if uri not in link_uris:
+                    link_uris.add(uri)
+                    links.append({"type": link_type, "identifier": uri})
+        # canonical order, so output is stable from run to run
+        links.sort(key=lambda link: link["identifier"])
+        return {
+            "@id": self.uri,
+            "type": "Feature",
+            "properties": {"title": self.label, "summary": self.summary},
+            "links": links,
+        }
 
     def __repr__(self) -> str:
         d = {
@@ -145,20 +401,156 @@ class DataItem:
 class Dataset:
     """Base class for a dataset manager"""
 
-    def __init__(self):
+    # Bump in a subclass whenever its parsing changes so that existing caches go stale
+    parser_version = 1
+    # Environment variable naming the source file, read only if no path is given
+    path_env = None
+
+    def __init__(
+        self,
+        content_hash: bool = False,
+        refresh: bool = False,
+        cache_backend: str = "pickle",
+        offline: bool = False,
+        parse_workers: int = 1,
+        parse_chunk_size: int = DEFAULT_PARSE_CHUNK_SIZE,
+    ):
+        """
+        content_hash: also fingerprint source files by SHA-256 of their content
+        refresh: re-parse source files even if a fresh cache is available
+        cache_backend: "pickle" (whole dataset in one file) or "sqlite" (compact store
+            from which items are built only when they are accessed)
+        offline: resolve JSON-LD contexts only from vendored or cached copies (a
+            context found in neither is an error)
+        parse_workers: parse source records in this many worker processes, in chunks
+            of parse_chunk_size records (1: parse in this process)
+        """
+        if cache_backend not in CACHE_BACKENDS:
+            raise ValueError(f"Unsupported cache backend '{cache_backend}'")
         self.namespace = None
         # Parsed DataItems keyed by URI
         self._data = dict()
         # Dictionary of lists of DataItem IDs keyed by Pleiades URIs
         self._pleiades_index = dict()
+        # Fingerprint of the source file the data came from (see fingerprint_source)
+        self.fingerprint = None
+        self.loaded_from_cache = False
+        self._content_hash = content_hash
+        self._refresh = refresh
+        self._cache_backend = cache_backend
+        self._offline = offline
+        self._parse_workers = parse_workers
+        self._parse_chunk_size = parse_chunk_size
+        # timings of loading stages (see Dataset.load)
+        self.instruments = Instruments()
 
-    def from_cache(self, namespace: str):
+    @property
+    def cache_path(self) -> Path:
         path = Path(user_cache_dir("pleiades_sidebar", ensure_exists=True))
-        with open(path / f"{self.namespace}.pickle", "rb") as f:
+        return path / f"{self.namespace}.{CACHE_BACKENDS[self._cache_backend]}"
+
+    def cached_fingerprint(self) -> dict:
+        """Get the source fingerprint stored with the cache, without loading the data"""
+        if self._cache_backend == "sqlite":
+            header = read_meta(self.cache_path)
+        else:
+            try:
+                with open(self.cache_path, "rb") as f:
+                    header = Unpickler(f).load()
+                del f
+            except (OSError, EOFError, UnpicklingError):
+                return None
+        if not isinstance(header, dict) or header.get("format") != CACHE_FORMAT:
+            return None
+        return header["fingerprint"]
+
+    def cache_is_fresh(self, fingerprint: dict) -> bool:
+        """Does the cache hold data parsed from a source with this fingerprint?"""
+        cached = self.cached_fingerprint()
+        if cached is None:
+            return False
+        for k in ["path", "parser"]:
+            if cached[k] != fingerprint[k]:
+                return False
+        if cached["sha256"] and fingerprint["sha256"]:
+            return cached["sha256"] == fingerprint["sha256"]
+        return (
+            cached["size"] == fingerprint["size"]
+            and cached["mtime_ns"] == fingerprint["mtime_ns"]
+        )
+
+    def fingerprint_source(self, datafile_path: Path) -> dict:
+        """Identify a source file by path, size, mtime, and (optionally) content hash"""
+        path = Path(datafile_path).expanduser().resolve()
+        stat = path.stat()
+        fingerprint = {
+            "path": str(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": None,
+            "parser": f"{type(self).__name__}:{self.parser_version}",
+        }
+        if self._content_hash:
+            h = sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            del f
+            fingerprint["sha256"] = h.hexdigest()
+        return fingerprint
+
+    def from_cache(self, namespace: str):
+        with self.instruments.stage("from_cache") as stage:
+            if self._cache_backend == "sqlite":
+                self._from_store()
+            else:
+                self._from_pickle()
+            stage["items"] = len(self._data)
+
+    def _from_pickle(self):
+        with open(self.cache_path, "rb") as f:
             unpickler = Unpickler(f)
-            self._data = unpickler.load()
+            try:
+                header = unpickler.load()
+                if not isinstance(header, dict) or header.get("format") != CACHE_FORMAT:
+                    raise CacheError(
+                        f"Unrecognized cache format in {self.cache_path}; "
+                        "reload from source"
+                    )
+                data = unpickler.load()
+                indexes = unpickler.load()
+            except (EOFError, UnpicklingError) as err:
+                raise CacheError(
+                    f"Damaged cache {self.cache_path} ({err}); reload from source"
+                )
         del f
-        self._pindex()
+        self._data = data
+        self.fingerprint = header["fingerprint"]
+        self.loaded_from_cache = True
+        if indexes["version"] == INDEX_VERSION:
+            for attr, index in indexes["indexes"].items():
+                setattr(self, attr, index)
+        else:
+            self._pindex()
+
+    def _from_store(self):
+        """Attach to a compact store; items are built only when they are accessed"""
+        meta = read_meta(self.cache_path)
+        if meta is None or meta.get("format") != CACHE_FORMAT:
+            raise CacheError(
+                f"Unrecognized cache format in {self.cache_path}; reload from source"
+            )
+        self._data = ItemStore(self.cache_path)
+        # resolve the item class now, so a damaged store is found while loading
+        self._data.item_class
+        self.fingerprint = meta["fingerprint"]
+        self.loaded_from_cache = True
+        if meta["index_version"] == INDEX_VERSION:
+            self._pleiades_index = PleiadesIndexStore(self.cache_path)
+            for attr, index in self._data.indexes().items():
+                setattr(self, attr, index)
+        else:
+            self._pindex()
 
     def get(self, item_uri: str) -> DataItem:
         """Get a parsed dataitem by its URI"""
@@ -185,17 +577,129 @@ class Dataset:
         return result
 
     def load(self, datafile_path: Path, load_method: str):
-        """Load the target dataset"""
+        """Load the target dataset, from cache if the cache is fresh for this source
+
+        datafile_path: the source file (None: the file named by path_env)
+        """
+        logger = logging.getLogger("Dataset.load")
+        if datafile_path is None:
+            datafile_path = env_path(self.path_env)
+        fingerprint = self.fingerprint_source(datafile_path)
+        if not self._refresh and self.cache_is_fresh(fingerprint):
+            logger.info(f"Using fresh {self.namespace} cache for {fingerprint['path']}")
+            try:
+                self.from_cache(self.namespace)
+                return
+            except CacheError as err:
+                logger.warning(f"{err}: parsing {fingerprint['path']} again")
+                self.loaded_from_cache = False
+        self.fingerprint = fingerprint
         cmd = f"_load_{load_method}"
-        getattr(self, cmd)(datafile_path)
-        self.parse_all()
-        self.to_cache()
-        self._pindex()
+        # loaders stream records, so reading the source is timed as part of parsing
+        before = NORMALIZER.stats()
+        with self.instruments.stage("parse") as stage:
+            getattr(self, cmd)(datafile_path)
+            self.parse_all()
+            stage["items"] = len(self._data)
+        # text normalization is part of parsing; record it on its own too
+        after = NORMALIZER.stats()
+        calls = after["calls"] - before["calls"]
+        self.instruments.add("norm", after["seconds"] - before["seconds"], calls)
+        logger.debug(
+            f"Normalized {calls:,} {self.namespace} strings: "
+            f"{after['fast'] - before['fast']:,} already normalized ASCII, "
+            f"{after['memo_hits'] - before['memo_hits']:,} remembered, "
+            f"{after['normalized'] - before['normalized']:,} normalized in "
+            f"{after['seconds'] - before['seconds']:.3f}s "
+            f"(about {after['saved_seconds'] - before['saved_seconds']:.3f}s saved)"
+        )
+        # loaders hand parse_all a one-shot record stream; don't keep it (or any
+        # fallback list behind it) alive for the life of the dataset
+        self._raw_data = None
+        with self.instruments.stage("index") as stage:
+            self._pindex()
+            stage["items"] = len(self._pleiades_index)
+        with self.instruments.stage("cache_write", items=len(self._data)):
+            self.to_cache()
+
+    def parse_all(self) -> int:
+        """Parse the already-loaded dataset; return the number of raw records read
 
-    def parse_all(self):
-        """Parse the already-loaded dataset"""
+        With parse_workers > 1, chunks of records are parsed in worker processes and
+        their items added here in record order, so the result is the same as parsing
+        in this process.
+        """
+        if self._parse_workers > 1:
+            return self._parse_parallel()
+        count = 0
+        for raw_item in self._raw_data:
+            count += 1
+            item = self._make_item(raw_item)
+            if item is not None:
+                self._add_item(item)
+        return count
+
+    def _make_item(self, raw_item):
+        """Build the DataItem for a raw record (None to skip the record)"""
         # OVERRIDE THIS METHOD FOR EACH DATASET
-        pass
+        raise NotImplementedError(f"{type(self).__name__} cannot parse records")
+
+    def _add_item(self, item):
+        """Add a parsed item; a duplicate URI adds its Pleiades links to the first"""
+        logger = logging.getLogger("Dataset._add_item")
+        try:
+            self._data[item.uri]
+        except KeyError:
+            self._data[item.uri] = item
+        else:
+            logger.debug(f"{self.namespace} URI collision: {item.uri}. Merging ...")
+            self._data[item.uri].merge_links(
+                {"pleiades.stoa.org": item.links["pleiades.stoa.org"]}
+            )
+
+    def _parse_parallel(self) -> int:
+        """Parse chunks of records in worker processes, adding items in record order"""
+        logger = logging.getLogger("Dataset._parse_parallel")
+        workers = self._parse_workers
+        logger.info(
+            f"Parsing {self.namespace} in chunks of {self._parse_chunk_size:,} records "
+            f"with {workers} worker processes"
+        )
+        # workers get a copy without the record stream (which can't be pickled) or any
+        # parsed data, and only need the state _make_item uses
+        parser = copy(self)
+        parser._raw_data = None
+        parser._data = dict()
+        parser._pleiades_index = dict()
+        parser.instruments = Instruments()
+        records = iter(self._raw_data)
+        count = 0
+        # keep a couple of chunks per worker in flight, so records are read ahead of
+        # the workers but the whole source is never held at once
+        pending = deque()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_set_parser, initargs=(parser,)
+        ) as executor:
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk = list(islice(records, self._parse_chunk_size))
+                    if not chunk:
+                        break
+                    count += len(chunk)
+                    pending.append(executor.submit(_parse_chunk, chunk))
+                if not pending:
+                    break
+                items, norm_counts = pending.popleft().result()
+                NORMALIZER.add_counts(norm_counts)
+                for item in items:
+                    # strings interned in a worker are not interned here
+                    item.links = intern_links(item.links)
+                    self._add_item(item)
+        return count
+
+    def _indexes(self) -> dict:
+        """Derived lookup structures to store in the cache, keyed by attribute name"""
+        return {"_pleiades_index": self._pleiades_index}
 
     def _pindex(self):
         logger = logging.getLogger("Dataset._pindex")
@@ -212,24 +716,41 @@ class Dataset:
                 self._pleiades_index[puri].add(ditem.uri)
 
     def to_cache(self):
-        path = Path(user_cache_dir("pleiades_sidebar", ensure_exists=True))
-        with open(path / f"{self.namespace}.pickle", "wb") as f:
-            pickler = Pickler(f)
-            pickler.dump(self._data)
-        del f
+        if self._cache_backend == "sqlite":
+            indexes = self._indexes()
+            pleiades_index = indexes.pop("_pleiades_index")
+            meta = {
+                "format": CACHE_FORMAT,
+                "fingerprint": self.fingerprint,
+                "index_version": INDEX_VERSION,
+            }
+            write_store(self.cache_path, meta, self._data, pleiades_index, indexes)
+            return
+        # the header goes first so freshness checks don't have to unpickle the data
+        header = {"format": CACHE_FORMAT, "fingerprint": self.fingerprint}
+        # written aside and then moved into place, so that a run which dies while
+        # writing never leaves a fresh header over partial data
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickler = Pickler(f)
+                pickler.dump(header)
+                pickler.dump(self._data)
+                pickler.dump({"version": INDEX_VERSION, "indexes": self._indexes()})
+            del f
+            replace(tmp_path, self.cache_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
     def to_lpf_dict(self):
-        d = deepcopy(LPF_FEATURE_COLLECTION_TEMPLATE)
-        d["features"] = [item.to_lpf_dict() for item in self._data.values()]
-        return d
+        return dict(
+            LPF_FEATURE_COLLECTION_TEMPLATE,
+            features=[item.to_lpf_dict() for item in self._data.values()],
+        )
 
     def _load_csv(self, datafile_path: Path):
-        data = get_csv(str(datafile_path), sample_lines=1000)
-        logger = logging.getLogger("_load_csv")
-        logger.debug(
-            f"Loaded {len(data['content'])} rows of data with fieldnames: {pformat(data['fieldnames'], indent=4)}"
-        )
-        self._raw_data = data["content"]
+        self._raw_data = iter_delimited(datafile_path)
 
     def _load_json(self, datafile_path: Path):
         with open(datafile_path, "r", encoding="utf-8") as f:
@@ -237,39 +758,51 @@ class Dataset:
         del f
         self._raw_data = j
 
+    def _load_jsonkv(self, datafile_path: Path):
+        """Stream (key, value) pairs from a JSON file whose top level is an object"""
+        self._raw_data = iter_json(datafile_path, "", pairs=True)
+
     def _load_jsonld(self, datafile_path: Path):
-        with open(datafile_path, "r", encoding="utf-8") as f:
-            linked_data = json.load(f)
-        del f
-        self._raw_data = linked_data["@graph"]
+        self._raw_data = iter_json(datafile_path, "@graph.item")
 
     def _load_jsonlpf(self, datafile_path: Path):
-        """Load features from a JSON-LPF (Linked Places Format) file as a list of dictionaries"""
-        with open(datafile_path, "r", encoding="utf-8") as f:
-            lpf = json.load(f)
-        del f
-        self._raw_data = lpf["features"]
-        self._citation = lpf.get("citation", None)
-        self._context_uri = lpf.get("@context", None)
-        if self._context_uri:
-            r = requests.get(self._context_uri)
-            if r.status_code == 200:
-                self._context = r.json()["@context"]
+        """Stream features from a JSON-LPF (Linked Places Format) file"""
+        keys = ["citation", "@context"]
+        if ijson is None:
+            # the document is loaded anyway, so read it only once
+            header, j = load_json_header(datafile_path, keys)
+            features = iter(j.get("features", []))
+            del j
+        else:
+            header = json_header(datafile_path, keys)
+            features = iter_json(datafile_path, "features.item")
+        self._citation = header.get("citation")
+        context = header.get("@context")
+        if isinstance(context, dict):
+            self._context_uri = None
+            self._context = context
+        else:
+            self._context_uri = context
+            self._context = None
+            if context:
+                self._context = CONTEXTS.resolve(context, offline=self._offline)
+                if self._context is None:
+                    # the reason has already been logged
+                    raise ValueError(
+                        f"Failed to resolve JSON-LD context {context} of "
+                        f"{datafile_path}: vendor it with scripts/vendor_contexts.py "
+                        "or load once without offline to cache it"
+                    )
             else:
-                self._context = None
+                # items fall back to the prefixes they know
+                self._context = dict()
+        self._raw_data = features
 
     def _load_ndjson(self, datafile_path: Path):
-        with jsonlines.open(str(datafile_path)) as reader:
-            self._raw_data = [obj for obj in reader]
-        del reader
+        self._raw_data = iter_ndjson(datafile_path)
 
     def _load_tsv(self, datafile_path: Path):
-        data = get_csv(str(datafile_path), dialect="excel-tab", sample_lines=1000)
-        logger = logging.getLogger("_load_tsv")
-        logger.debug(
-            f"Loaded {len(data['content'])} rows of data with fieldnames: {pformat(data['fieldnames'], indent=4)}"
-        )
-        self._raw_data = data["content"]
+        self._raw_data = iter_delimited(datafile_path, dialect="excel-tab")
 
     def __len__(self):
         return len(self._data)
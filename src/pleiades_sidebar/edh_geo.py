@@ -9,46 +9,40 @@
 Define a class for managing data from EDH GEO
 """
 import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
 from pleiades_sidebar.norm import norm
 from urllib.parse import urlparse
 
-DEFAULT_EDH_GEO_PATH = Path(environ["EDHGEO_PATH"]).expanduser().resolve()
-
 
 class EDHGEODataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_EDH_GEO_PATH, use_cache=False):
-        Dataset.__init__(self)
+    path_env = "EDHGEO_PATH"
+
+    def __init__(self, path: Path = None, use_cache=False, **kwargs):
+        Dataset.__init__(self, **kwargs)
         self.namespace = "edhgeo"
         if use_cache:
             Dataset.from_cache(self, namespace=self.namespace)
         else:
             Dataset.load(self, path, "csv")
 
-    def parse_all(self):
+    def parse_all(self) -> int:
         logger = logging.getLogger("EDHGEODataset.parse_all")
-        for raw_item in self._raw_data:
-            item = EDHGEODataItem(raw_item)
-            try:
-                self._data[item.uri]
-            except KeyError:
-                self._data[item.uri] = item
-            else:
-                logger.debug(f"EDH GEO URI collision: {item.uri}. Merging ...")
-                self._data[item.uri].links["pleiades.stoa.org"].extend(
-                    item.links["pleiades.stoa.org"]
-                )
+        raw_count = Dataset.parse_all(self)
         logger.info(
-            f"Parsed {len(self._data):,} EDH GEO data items from {len(self._raw_data):,} raw data items."
+            f"Parsed {len(self._data):,} EDH GEO data items from {raw_count:,} raw data items."
         )
+        return raw_count
+
+    def _make_item(self, raw_item):
+        return EDHGEODataItem(raw_item)
 
 
 class EDHGEODataItem(DataItem):
+    __slots__ = ()
+
     def __init__(self, raw: dict):
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse EDH GEO CSV data"""
@@ -8,218 +8,306 @@
 """
 Define a class for generating sidebar data from multiple sources
 """
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from heapq import merge
 import logging
 from os import environ
-from pleiades_sidebar.cfl_ago import CFLAGODataset
-from pleiades_sidebar.edh_geo import EDHGEODataset
-from pleiades_sidebar.itinere import ItinerEDataset
-from pleiades_sidebar.manto import MANTODataset
-from pleiades_sidebar.nomisma import NomismaDataset
-from pleiades_sidebar.paths_atlas import PathsAtlasDataset
+from pathlib import Path
+from pleiades_sidebar.instrument import Instruments
+from pleiades_sidebar.linkkey import CANONICALIZER
+from pleiades_sidebar.manifest import Manifest, content_hash
 from pleiades_sidebar.pleiades import PleiadesDataset
-from pleiades_sidebar.temples_classical_world import ClassicalTemplesDataset
-from pleiades_sidebar.topostext import ToposTextDataset
-from pleiades_sidebar.whg import WHGDataset
-from pleiades_sidebar.wikidata import WikidataDataset
-from pprint import pformat
-from urllib.parse import urlparse, parse_qs
-from validators import url as valid_uri
-
-CLASSES_BY_NAMESPACE = {
-    "cflago": CFLAGODataset,
-    "classical_temples": ClassicalTemplesDataset,
-    "edhgeo": EDHGEODataset,
-    "itinere": ItinerEDataset,
-    "manto": MANTODataset,
-    "nomisma": NomismaDataset,
-    "paths_atlas": PathsAtlasDataset,
-    "topostext": ToposTextDataset,
-    "whg": WHGDataset,
-    "wikidata": WikidataDataset,
-}
+from pleiades_sidebar.reciprocity import ReciprocityEngine
+from pleiades_sidebar.registry import DATASETS
+from time import perf_counter
+
+
+def _load_dataset(
+    ns: str, path: Path = None, use_cached: bool = False, options: dict = {}
+):
+    """Create the dataset for a namespace (also used as a worker process entry point)"""
+    logger = logging.getLogger("_load_dataset")
+    logger.info(f"Loading data from namespace {ns}")
+    options = dict(options)
+    if ns.startswith("whg_"):
+        parent_ns = "whg"
+        options["namespace"] = ns
+    else:
+        parent_ns = ns
+    start = perf_counter()
+    if path is None:
+        logger.info(f"No path provided for namespace '{ns}'; using its default")
+        dataset = DATASETS[parent_ns](use_cache=use_cached, **options)
+    else:
+        dataset = DATASETS[parent_ns](path=path, use_cache=use_cached, **options)
+    dataset.instruments.add("load", perf_counter() - start, len(dataset))
+    return dataset
+
+
+def lpf_id(ditem_lpf: dict) -> str:
+    """Sort key for LPF feature dictionaries"""
+    return ditem_lpf["@id"]
+
+
+def reciprocal_lpf(ditem, reciprocal: bool) -> dict:
+    """Get an item's LPF dictionary with its reciprocal flag set"""
+    ditem_lpf = ditem.to_lpf_dict()
+    ditem_lpf["properties"]["reciprocal"] = reciprocal
+    return ditem_lpf
 
 
 class Generator:
-    def __init__(self, namespaces: list, paths: dict = {}, use_cached: bool = False):
-        logger = logging.getLogger("Generator.__init__")
+    def __init__(
+        self,
+        namespaces: list,
+        paths: dict = {},
+        use_cached: bool = False,
+        workers: int = 1,
+        dataset_options: dict = {},
+        pleiades_options: dict = {},
+        allow_partial: bool = False,
+    ):
+        """
+        Load the datasets for the requested namespaces
+
+        Datasets are re-parsed only if their source files have changed since they were
+        last cached, unless use_cached is True (always use the cache, without checking
+        sources). dataset_options are passed through to the Dataset constructors (e.g.
+        content_hash, refresh). pleiades_options are passed to PleiadesDataset (e.g.
+        use_index).
+
+        With workers > 1, datasets are built concurrently in a process pool. As in a
+        serial load, a namespace that fails to load raises its exception (once the
+        other loads have finished), unless allow_partial is True: then it is logged and
+        recorded in self.failed (namespace: exception) and the other namespaces are
+        kept.
+        """
         self.datasets = {}
+        self.failed = {}
+        # stage timings of this generator's loads and runs (see instrument.Instruments)
+        self.instruments = Instruments()
         try:
             self._pleiades_path = paths["pleiades"]
         except KeyError:
             self._pleiades_path = None
-        for ns in namespaces:
-            logger.info(f"Loading data from namespace {ns}")
-            if ns.startswith("whg_"):
-                parent_ns = "whg"
-            else:
-                parent_ns = ns
-            try:
-                path = paths[ns]
-            except KeyError:
-                logger.error(f"ns='{ns}'")
-                logger.error(f"paths={pformat(paths, indent=4)}")
-                self.datasets[ns] = CLASSES_BY_NAMESPACE[parent_ns](
-                    use_cache=use_cached
+        self._dataset_options = dataset_options
+        self._pleiades_options = pleiades_options
+        if workers > 1 and len(namespaces) > 1:
+            self._load_parallel(namespaces, paths, use_cached, workers)
+            if self.failed and not allow_partial:
+                raise next(iter(self.failed.values()))
+        else:
+            for ns in namespaces:
+                self.datasets[ns] = _load_dataset(
+                    ns, paths.get(ns), use_cached, dataset_options
                 )
-            else:
-                self.datasets[ns] = CLASSES_BY_NAMESPACE[parent_ns](
-                    path=path, use_cache=use_cached
+        for ns, dataset in self.datasets.items():
+            self.instruments.merge(dataset.instruments, prefix=f"{ns}.")
+
+    def _load_parallel(
+        self, namespaces: list, paths: dict, use_cached: bool, workers: int
+    ):
+        """Build datasets in worker processes, keeping namespace order for the results"""
+        logger = logging.getLogger("Generator._load_parallel")
+        logger.info(
+            f"Loading {len(namespaces)} namespaces with {workers} worker processes"
+        )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                ns: executor.submit(
+                    _load_dataset,
+                    ns,
+                    paths.get(ns),
+                    use_cached,
+                    self._dataset_options,
                 )
+                for ns in namespaces
+            }
+            for ns in namespaces:
+                try:
+                    self.datasets[ns] = futures[ns].result()
+                except Exception as err:
+                    logger.error(
+                        f"Failed to load namespace '{ns}': {type(err).__name__}: {err}"
+                    )
+                    self.failed[ns] = err
 
-    def generate(self):
-        logger = logging.getLogger("Generator.generate")
-        logger.debug(f"pleiades_path={self._pleiades_path}")
-        if self._pleiades_path is not None:
-            pleiades = PleiadesDataset(self._pleiades_path)
-        else:
-            pleiades = PleiadesDataset()
-        logger.debug(f"actual pleiades._path={pleiades._path}")
-        pleiades_links = dict()
+    def generate(self, manifest: Manifest = None):
+        """
+        Match dataset items to Pleiades places and return (sidebar, unreciprocated)
+
+        With a manifest from a previous run, places whose partner items and Pleiades
+        file are unchanged are left out of sidebar (their output would be the same) and
+        their entries are carried over; unreciprocated is always complete. Call
+        manifest.save() once the output has been written.
+        """
+        # unreciprocated:
+        # data to use to guide supervised work adding unreciprocated outside links
+        # keys are external namespaces
+        # values are lists of third-party matches in that namespace which are unreciprocated
+        # by Pleiades, each represented by a dictionary using abbreviated Linked Places Format
+        unreciprocated = {ns: list() for ns in self.datasets.keys()}
 
         # sidebar:
         # data for consumption by sidebar widget on Pleiades website
         # keys are pleiades uris
         # values are lists of third-party matches, each represented by a dictionary
         # using abbreviated Linked Places Format
-        sidebar = dict()
+        # (every referenced place gets an entry, even if it isn't in Pleiades)
+        sidebar = dict(
+            self.iter_generate(
+                manifest, lambda ns, ditem_lpf: unreciprocated[ns].append(ditem_lpf)
+            )
+        )
+        return (sidebar, unreciprocated)
 
-        # unreciprocated:
-        # data to use to guide supervised work adding unreciprocated outside links
-        # keys are external namespaces
-        # values are lists of third-party matches in that namespace which are unreciprocated
-        # by Pleiades, each represented by a dictionary using abbreviated Linked Places Format
-        unreciprocated = dict()
+    def iter_generate(self, manifest: Manifest = None, unreciprocated_sink=None):
+        """
+        Yield (Pleiades URI, LPF list sorted by @id) for each place, in URI order
+
+        Before the first place is yielded, each unreciprocated item is passed to
+        unreciprocated_sink(namespace, LPF dict), one namespace at a time and in @id
+        order within each namespace, so callers can write output as it is produced
+        instead of holding every place's data at once. See generate() for manifest.
+        """
+        logger = logging.getLogger("Generator.iter_generate")
+        logger.debug(f"pleiades_path={self._pleiades_path}")
+        # the reciprocity engine keeps its own per-place set of reference keys, so the
+        # dataset only needs references and needn't hold on to places it has handed over
+        pleiades_options = dict(
+            {"fields": ["references"], "max_places": 1024}, **self._pleiades_options
+        )
+        if self._pleiades_path is not None:
+            pleiades = PleiadesDataset(self._pleiades_path, **pleiades_options)
+        else:
+            pleiades = PleiadesDataset(**pleiades_options)
+        logger.debug(f"actual pleiades._path={pleiades._path}")
+
+        # unreciprocated items of places carried over unchanged from the last run
+        carried = {ns: list() for ns in self.datasets.keys()}
 
-        all_match_count = 0  # total number of matches
         all_reciprocal_count = 0  # total number of reciprocated matches
 
-        for ns, dataset in self.datasets.items():
-            logger.error(f"Processing dataset for namespace '{ns}'")
-            unreciprocated[ns] = list()
-            matches = dataset.get_pleiades_matches()
-            all_match_count += len(matches)
+        instruments = self.instruments
+        engine = ReciprocityEngine(pleiades)
+        with instruments.stage("items") as stage:
+            rows = engine.item_table(self.datasets)
+            stage["items"] = len(rows)
+        if manifest is not None:
+            with instruments.stage("manifest", items=len(rows)):
+                rows, inputs = self._changed_rows(rows, pleiades, manifest, carried)
+        with instruments.stage("pleiades") as stage:
+            engine.reference_table(dict.fromkeys(row[0] for row in rows))
+            stage["items"] = len(engine.references) + len(engine.missing)
+        with instruments.stage("reciprocity", items=len(rows)):
+            matches = engine.join_rows(rows)
+        del rows
 
-            logger.info(
-                f"Checking for Pleiades reciprocity in {len(matches)} links from the {ns} dataset."
-            )
-            for puri, data_items in matches.items():
-                # ensure we have a list in the sidebar dictionary for the pleiades uri we are processing
-                puri = puri.replace("http://", "https://")
-                try:
-                    sidebar[puri]
-                except KeyError:
-                    sidebar[puri] = list()
+        # rows (and so matches) come in item URI order for each dataset in turn, so each
+        # namespace's unreciprocated items are already sorted, and each place gets one
+        # sorted run of items per dataset; merging the runs keeps the output sorted by
+        # @id without a separate sort pass (links are already sorted within each item's
+        # LPF)
+        sort_start = perf_counter()
+        unreciprocated = {ns: list() for ns in self.datasets.keys()}
+        runs = {puri: dict() for puri in engine.places}
+        for puri, ns, ditem, reciprocal in matches:
+            if reciprocal:
+                all_reciprocal_count += 1
+            else:
+                unreciprocated[ns].append(ditem)
+            try:
+                runs[puri][ns].append((ditem, reciprocal))
+            except KeyError:
+                runs[puri][ns] = [(ditem, reciprocal)]
+        match_count = len(matches)
+        del matches
+        sort_seconds = perf_counter() - sort_start
 
-                # ensure we have a list of references drawn from the pleiades place we are processing
-                # use only those references that have accessURIs
-                try:
-                    these_pleiades_links = pleiades_links[puri]
-                except KeyError:
-                    pleiades_links[puri] = set()
-                    try:
-                        pleiades_place = pleiades.get(puri)
-                    except FileNotFoundError:
-                        logger.error(
-                            f"Non-existent Pleiades place {puri} referenced in {ns}. Ignored."
-                        )
-                        continue
-                    for r in pleiades_place["references"]:
-                        if r["accessURI"]:
-                            pleiades_links[puri].add(r["accessURI"])
-                    these_pleiades_links = pleiades_links[puri]
-
-                # normalize the reference links obtained in previous set to maximize potential matching
-                normalized_pleiades_links = set()
-                for this_pleiades_link in these_pleiades_links:
-                    if valid_uri(this_pleiades_link):
-                        parts = urlparse(this_pleiades_link)
-                    else:
-                        continue
-                    domain = parts.netloc
-                    if domain.startswith("www."):
-                        domain = domain[4:]
-                    query = parse_qs(parts.query)
-                    try:
-                        id_list = query["id"]
-                    except KeyError:
-                        id_list = list()
-                    else:
-                        if len(id_list) == 1:
-                            probable_id = id_list[0].strip()
-                        else:
-                            id_list = list()
-                    if not id_list:
-                        path = [p.strip() for p in parts.path.split("/") if p.strip()]
-                        try:
-                            probable_id = path[-1]
-                        except IndexError:
-                            continue
-                    normalized_pleiades_links.add(f"{domain}:{probable_id}")
-
-                # process each data item provided by the external resource for this URI
-                # to create a normalized form of the link
-                for ditem in data_items:
-                    parts = urlparse(ditem.uri)
-                    domain = parts.netloc
-                    if domain.startswith("www."):
-                        domain = domain[4:]
-                    query = parse_qs(parts.query)
-                    try:
-                        id_list = query["id"]
-                    except KeyError:
-                        id_list = list()
-                    else:
-                        if len(id_list) == 1:
-                            probable_id = id_list[0].strip()
-                        else:
-                            id_list = list()
-                    if not id_list:
-                        path = [p.strip() for p in parts.path.split("/") if p.strip()]
-                        try:
-                            probable_id = path[-1]
-                        except IndexError as err:
-                            err.add_note(ditem.uri)
-                            raise err
-
-                    # generate and store LPF for each matching item
-                    normalized_item_uri = f"{domain}:{probable_id}"
-                    ditem_lpf = ditem.to_lpf_dict()
-                    if normalized_item_uri in normalized_pleiades_links:
-                        ditem_lpf["properties"]["reciprocal"] = True
-                        all_reciprocal_count += 1
-                    else:
-                        ditem_lpf["properties"]["reciprocal"] = False
-                        unreciprocated[ns].append(ditem_lpf)
-                    sidebar[puri].append(ditem_lpf)
-
-        # sort data to facilitate run-to-run diff
-        for puri in sidebar.keys():
-            raw_ditems = sidebar[puri]
-            cooked_ditems = list()
-            for raw_ditem in raw_ditems:
-                cooked_ditem = raw_ditem
-                cooked_links = sorted(
-                    raw_ditem["links"], key=lambda link: link["identifier"]
-                )
-                cooked_ditem["links"] = cooked_links
-                cooked_ditems.append(cooked_ditem)
-            sidebar[puri] = sorted(cooked_ditems, key=lambda d: d["@id"])
-        for ns in unreciprocated.keys():
-            raw_ditems = unreciprocated[ns]
-            cooked_ditems = list()
-            for raw_ditem in raw_ditems:
-                cooked_ditem = raw_ditem
-                cooked_links = sorted(
-                    raw_ditem["links"], key=lambda link: link["identifier"]
+        # converting to LPF and merging into @id order happen as each place is
+        # yielded, so their time is added up into the sort stage
+        if unreciprocated_sink is not None:
+            sort_start = perf_counter()
+            for ns, ditems in unreciprocated.items():
+                fresh = (reciprocal_lpf(ditem, False) for ditem in ditems)
+                for ditem_lpf in merge(carried[ns], fresh, key=lpf_id):
+                    unreciprocated_sink(ns, ditem_lpf)
+            sort_seconds += perf_counter() - sort_start
+        del unreciprocated, carried
+
+        place_count = len(runs)
+        for puri in sorted(runs.keys()):
+            place_runs = runs.pop(puri)
+            sort_start = perf_counter()
+            ditems = list(
+                merge(
+                    *(
+                        (reciprocal_lpf(ditem, reciprocal) for ditem, reciprocal in run)
+                        for run in place_runs.values()
+                    ),
+                    key=lpf_id,
                 )
-                cooked_ditem["links"] = cooked_links
-                cooked_ditems.append(cooked_ditem)
-            unreciprocated[ns] = sorted(cooked_ditems, key=lambda d: d["@id"])
+            )
+            sort_seconds += perf_counter() - sort_start
+            if manifest is not None:
+                manifest.record(puri, inputs[puri], ditems)
+            yield (puri, ditems)
 
+        instruments.add("sort", sort_seconds, match_count)
         logger.info(
-            f"There are {all_match_count:,} Pleiades matches across all {len(self.datasets):,} datasets "
+            f"Sorted {match_count:,} matched items into LPF by place in {sort_seconds:.3f}s"
+        )
+        if manifest is not None:
+            logger.info(
+                f"{place_count:,} places changed since the last run; "
+                f"{len(manifest.removed):,} places no longer have matches."
+            )
+        logger.info(
+            f"There are {engine.match_count:,} Pleiades matches across all {len(self.datasets):,} datasets "
             f"({", ".join(sorted(self.datasets.keys()))}). "
             f"{all_reciprocal_count:,} of these are reciprocated by Pleiades. "
-            f"{len(sidebar):,} unique Pleiades places are referenced. "
+            f"{place_count:,} unique Pleiades places are referenced. "
         )
-        return (sidebar, unreciprocated)
+        logger.info(f"Pleiades place lookups: {pleiades.stats()}")
+        logger.info(f"Link key cache: {CANONICALIZER.cache_info()}")
+
+    def _changed_rows(
+        self,
+        rows: list,
+        pleiades: PleiadesDataset,
+        manifest: Manifest,
+        carried: dict,
+    ):
+        """
+        Drop item rows for places whose inputs match the manifest from the last run
+
+        Unreciprocated items from unchanged places are added to carried (by namespace, in
+        row order) using the flags recorded in the manifest. Returns the remaining rows
+        and the input hash of each remaining place.
+        """
+        by_place = dict()
+        for row in rows:
+            by_place.setdefault(row[0], list()).append(row)
+        inputs = dict()
+        unchanged = dict()
+        for puri, place_rows in by_place.items():
+            h = sha256(manifest.run_hash.encode("utf-8"))
+            h.update(str(pleiades.stamp(puri)).encode("utf-8"))
+            for _, ns, ditem, _ in sorted(place_rows, key=lambda r: (r[1], r[2].uri)):
+                h.update(f"\n{ns}\t{content_hash(ditem.to_lpf_dict())}".encode("utf-8"))
+            inputs[puri] = h.hexdigest()
+            entry = manifest.carry_over(puri, inputs[puri])
+            if entry is not None:
+                unchanged[puri] = set(entry["unreciprocated"])
+        changed_rows = list()
+        for row in rows:
+            puri, ns, ditem, _ = row
+            try:
+                unreciprocated_uris = unchanged[puri]
+            except KeyError:
+                changed_rows.append(row)
+                continue
+            if ditem.uri in unreciprocated_uris:
+                carried[ns].append(reciprocal_lpf(ditem, False))
+        return (changed_rows, inputs)
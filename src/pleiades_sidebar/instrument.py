@@ -0,0 +1,173 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Per-stage timing and memory instrumentation for generator runs
+"""
+from contextlib import contextmanager
+import json
+from pathlib import Path
+import sys
+from time import perf_counter
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+REPORT_VERSION = 2
+
+
+def max_rss_bytes() -> int:
+    """Get the peak resident set size of this process so far (None if unknown)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, other systems kilobytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Instruments:
+    """Wall time, item counts and peak memory for named stages of a run
+
+    Stages are timed with stage() or, when the work is interleaved with other work
+    (e.g. converting items as places are written), accumulated with add(). Peak
+    memory is measured per stage with tracemalloc while tracemalloc is tracing (start
+    it to opt in: tracing slows a run down considerably); otherwise it is the
+    process's peak resident set size when the stage ends, which can't go down, so
+    it shows which stage raised it. Each stage's "peak_source" says which it is
+    ("tracemalloc" or "max_rss"). Stages may nest.
+
+    Instruments pickle, so datasets built in worker processes can bring theirs back
+    to be merged into the run's (see merge).
+    """
+
+    def __init__(self):
+        # stage name -> {"seconds", "items", "calls", "peak_bytes", "peak_source"}
+        self.stages = dict()
+        # open stages, innermost last: [highest traced peak seen while open]
+        self._open = list()
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        """Time the enclosed block as a stage; set ["items"] on the yielded record
+
+        The record yielded is the stage's entry for this call, so the number of items
+        processed can be filled in once it is known.
+        """
+        record = {"items": items}
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # tracemalloc has a single peak, so keep what an enclosing stage has seen
+            # so far before resetting it for this one
+            if self._open:
+                self._open[-1][0] = max(
+                    self._open[-1][0], tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+        self._open.append([0])
+        start = perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = perf_counter() - start
+            peak = None
+            carried = self._open.pop()[0]
+            if tracing and tracemalloc.is_tracing():
+                peak = max(carried, tracemalloc.get_traced_memory()[1])
+                if self._open:
+                    self._open[-1][0] = max(self._open[-1][0], peak)
+            self.add(name, seconds, record["items"], peak)
+
+    def add(self, name: str, seconds: float, items: int = 0, peak_bytes: int = None):
+        """Add time and items to a stage (summed over calls; peak is the highest)
+
+        peak_bytes: the stage's traced peak (None: the process's peak resident set
+            size so far)
+        """
+        if peak_bytes is None:
+            self._add(name, seconds, items, 1, max_rss_bytes(), "max_rss")
+        else:
+            self._add(name, seconds, items, 1, peak_bytes, "tracemalloc")
+
+    def merge(self, other, prefix: str = ""):
+        """Add the stages recorded by another Instruments, renamed with a prefix"""
+        for name, entry in other.stages.items():
+            self._add(
+                f"{prefix}{name}",
+                entry["seconds"],
+                entry["items"],
+                entry["calls"],
+                entry["peak_bytes"],
+                entry["peak_source"],
+            )
+
+    def _add(
+        self,
+        name: str,
+        seconds: float,
+        items: int,
+        calls: int,
+        peak_bytes: int,
+        peak_source: str,
+    ):
+        try:
+            entry = self.stages[name]
+        except KeyError:
+            entry = self.stages[name] = {
+                "seconds": 0.0,
+                "items": 0,
+                "calls": 0,
+                "peak_bytes": None,
+                "peak_source": None,
+            }
+        entry["seconds"] += seconds
+        entry["items"] += items
+        entry["calls"] += calls
+        if peak_bytes is None:
+            return
+        # a traced peak is the stage's own, so it is kept over resident set sizes
+        if entry["peak_source"] == "tracemalloc" and peak_source != "tracemalloc":
+            return
+        if entry["peak_source"] != peak_source:
+            entry["peak_bytes"] = None
+        entry["peak_bytes"] = max(entry["peak_bytes"] or 0, peak_bytes)
+        entry["peak_source"] = peak_source
+
+    def report(self) -> dict:
+        """Get the stages as a JSON-serializable report, with throughput"""
+        stages = dict()
+        for name, entry in self.stages.items():
+            stages[name] = dict(entry)
+            stages[name]["items_per_second"] = (
+                round(entry["items"] / entry["seconds"], 1)
+                if entry["items"] and entry["seconds"] > 0
+                else None
+            )
+            stages[name]["seconds"] = round(entry["seconds"], 6)
+        return {
+            "version": REPORT_VERSION,
+            "tracemalloc": any(
+                entry["peak_source"] == "tracemalloc" for entry in self.stages.values()
+            ),
+            "max_rss_bytes": max_rss_bytes(),
+            "stages": stages,
+        }
+
+    def save(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+        del f
+
+    def __getstate__(self):
+        return {"stages": self.stages}
+
+    def __setstate__(self, state: dict):
+        self.stages = state["stages"]
+        self._open = list()
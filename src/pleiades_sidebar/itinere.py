@@ -8,51 +8,36 @@
 """
 Define a class for managing data from Itiner-e
 """
-import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
+from pleiades_sidebar.norm import norm, norm_fields
 from pprint import pformat
 import re
-from textnorm import normalize_space, normalize_unicode
 from urllib.parse import urlparse
 
-DEFAULT_ITINERE_PATH = Path(environ["ITINERE_PATH"]).expanduser().resolve()
 rx_delim = re.compile(r"(,|;)\s*")
 
 
-def norm(s: str) -> str:
-    return normalize_space(normalize_unicode(s))
-
-
 class ItinerEDataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_ITINERE_PATH, use_cache=False):
-        Dataset.__init__(self)
+    path_env = "ITINERE_PATH"
+
+    def __init__(self, path: Path = None, use_cache=False, **kwargs):
+        Dataset.__init__(self, **kwargs)
         self.namespace = "itinere"
         if use_cache:
             Dataset.from_cache(self, namespace="itinere")
         else:
             Dataset.load(self, path, "ndjson")
 
-    def parse_all(self):
-        logger = logging.getLogger("ItinerEDataset.parse_all")
-        for raw_item in self._raw_data:
-            itinere_item = ItinerEDataItem(raw_item)
-            try:
-                self._data[itinere_item.uri]
-            except KeyError:
-                self._data[itinere_item.uri] = itinere_item
-            else:
-                logger.debug(f"Itiner-E URI collision: {itinere_item.uri}. Merging ...")
-                self._data[itinere_item.uri].links["pleiades.stoa.org"].extend(
-                    itinere_item.links["pleiades.stoa.org"]
-                )
+    def _make_item(self, raw_item):
+        return ItinerEDataItem(raw_item)
 
 
 class ItinerEDataItem(DataItem):
+    __slots__ = ()
+
     def __init__(self, raw: dict):
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse the ItinerE ndjson export format"""
@@ -68,11 +53,9 @@ class ItinerEDataItem(DataItem):
         self.uri = self._get_base_uri("itinere") + str(self._raw_data["id"])
 
         # summary
-        slist = [
-            norm(self._raw_data["properties"][k])
-            for k in ["segmentCertainty", "constructionPeriod", "type"]
-            if self._raw_data["properties"][k] is not None
-        ]
+        summary_fields = ["segmentCertainty", "constructionPeriod", "type"]
+        props = norm_fields(self._raw_data["properties"], summary_fields)
+        slist = [props[k] for k in summary_fields if props[k] is not None]
         slist = [s for s in slist if s]
         s = " ".join(slist)
         if self._raw_data["properties"]["itinerary"]:
@@ -0,0 +1,108 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Canonical "domain:id" keys for matching Pleiades references to partner items
+"""
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
+from validators import url as valid_uri
+
+
+def _segment_after(name: str):
+    """Make a rule that takes the path segment following a given segment"""
+
+    def rule(segments: list) -> str:
+        try:
+            return segments[segments.index(name) + 1]
+        except (ValueError, IndexError):
+            return None
+
+    return rule
+
+
+# Hosts that have moved; keys are made with the current host
+DOMAIN_ALIASES = {
+    "paths.uniroma1.it": "atlas.paths-erc.eu",
+}
+
+# Per-domain rules for picking the ID out of the path segments when the last segment
+# isn't it (a rule returning None falls back to the last segment)
+DOMAIN_RULES = {
+    # e.g. https://whgazetteer.org/places/123/detail
+    "whgazetteer.org": _segment_after("places"),
+}
+
+# Characters that send a URI down the full urlparse path
+SLOW_PATH_CHARS = set("?#;\t\r\n")
+
+
+class LinkCanonicalizer:
+    """Reduce link URIs to "domain:id" keys, remembering recent results"""
+
+    def __init__(
+        self,
+        maxsize: int = 1 << 16,
+        aliases: dict = DOMAIN_ALIASES,
+        rules: dict = DOMAIN_RULES,
+    ):
+        self._aliases = aliases
+        self._rules = rules
+        self.key = lru_cache(maxsize=maxsize)(self._key)
+
+    def cache_info(self):
+        return self.key.cache_info()
+
+    def _key(self, uri: str, validate: bool = False) -> str:
+        """
+        Get the key for a URI, or None if it has no usable ID
+
+        validate: also return None if the URI doesn't pass validators.url (used for
+            free-text Pleiades reference URIs)
+        """
+        if validate and not valid_uri(uri):
+            return None
+        query = dict()
+        if (
+            uri.startswith(("https://", "http://"))
+            and uri == uri.strip()
+            and SLOW_PATH_CHARS.isdisjoint(uri)
+        ):
+            # fast path: same netloc and path as urlparse for plain http(s) URIs
+            domain, _, path = uri.split("://", 1)[1].partition("/")
+        else:
+            parts = urlparse(uri)
+            domain = parts.netloc
+            path = parts.path
+            query = parse_qs(parts.query)
+        if domain.startswith("www."):
+            domain = domain[4:]
+        domain = self._aliases.get(domain, domain)
+        id_list = query.get("id", list())
+        if len(id_list) == 1:
+            return f"{domain}:{id_list[0].strip()}"
+        segments = [p.strip() for p in path.split("/") if p.strip()]
+        probable_id = None
+        try:
+            probable_id = self._rules[domain](segments)
+        except KeyError:
+            pass
+        if probable_id is None:
+            try:
+                probable_id = segments[-1]
+            except IndexError:
+                return None
+        return f"{domain}:{probable_id}"
+
+
+# Shared by the generator and the datasets, so each distinct URI is handled once per run
+CANONICALIZER = LinkCanonicalizer()
+
+
+def link_key(uri: str, validate: bool = False) -> str:
+    """Get the canonical "domain:id" key for a URI using the shared canonicalizer"""
+    return CANONICALIZER.key(uri, validate)
@@ -0,0 +1,106 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Run manifest recording what each place's sidebar data was generated from
+"""
+
+from hashlib import sha256
+import json
+from logging import getLogger
+from pathlib import Path
+from pleiades_sidebar.writer import write_atomic
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(obj) -> str:
+    """Hash JSON-serializable data independently of key order and formatting"""
+    s = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return sha256(s.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """Input and output hashes per Pleiades place, carried from one run to the next
+
+    A place whose input hash matches the previous run's can be skipped; its entry is
+    carried over unchanged. Places in the previous manifest that are neither recorded
+    nor carried over in this run no longer have any matches (see removed).
+    """
+
+    def __init__(self, path: Path, load_previous: bool = True, run_inputs: dict = {}):
+        """
+        load_previous: read the entries of the previous run from path (if it exists);
+            otherwise start afresh, so that every place is regenerated
+        run_inputs: settings that shape every place's output (e.g. the namespaces and
+            serialization); they are part of each place's input hash, so changing them
+            regenerates every place
+        """
+        logger = getLogger("Manifest.__init__")
+        self.path = Path(path)
+        self.run_hash = content_hash(run_inputs)
+        # entries from the previous run, keyed by Pleiades URI
+        self._previous = dict()
+        # entries for this run, keyed by Pleiades URI
+        self.places = dict()
+        if not load_previous:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            del f
+        except FileNotFoundError:
+            return
+        if previous.get("version") != MANIFEST_VERSION:
+            logger.warning(f"Ignoring manifest {self.path} with unsupported version")
+            return
+        self._previous = previous["places"]
+
+    @property
+    def removed(self) -> list:
+        """Places that had matches in the previous run but have none now"""
+        return sorted(set(self._previous.keys()) - set(self.places.keys()))
+
+    @property
+    def previous(self) -> list:
+        """Places recorded by the previous run"""
+        return sorted(self._previous.keys())
+
+    def carry_over(self, puri: str, inputs: str) -> dict:
+        """Keep the previous entry for a place if its inputs are unchanged (else None)"""
+        try:
+            entry = self._previous[puri]
+        except KeyError:
+            return None
+        if entry["inputs"] != inputs:
+            return None
+        self.places[puri] = entry
+        return entry
+
+    def record(self, puri: str, inputs: str, output: list):
+        """Record the hashes of a place's inputs and generated LPF list"""
+        self.places[puri] = {
+            "inputs": inputs,
+            "output": content_hash(output),
+            "unreciprocated": sorted(
+                d["@id"] for d in output if not d["properties"]["reciprocal"]
+            ),
+        }
+
+    def discard(self):
+        """Delete the saved manifest (e.g. once output no longer matches it)"""
+        self.path.unlink(missing_ok=True)
+
+    def save(self):
+        write_atomic(
+            self.path,
+            json.dumps(
+                {"version": MANIFEST_VERSION, "places": self.places},
+                ensure_ascii=False,
+                sort_keys=True,
+            ).encode("utf-8"),
+        )
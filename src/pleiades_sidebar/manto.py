@@ -9,42 +9,31 @@
 Define a class for managing data from MANTO
 """
 import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
 from pleiades_sidebar.norm import norm
 
-DEFAULT_MANTO_PATH = Path(environ["MANTO_PATH"]).expanduser().resolve()
-
 
 class MANTODataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_MANTO_PATH, use_cache=False):
-        Dataset.__init__(self)
+    path_env = "MANTO_PATH"
+
+    def __init__(self, path: Path = None, use_cache=False, **kwargs):
+        Dataset.__init__(self, **kwargs)
         self.namespace = "manto"
         if use_cache:
             Dataset.from_cache(self, namespace="manto")
         else:
             Dataset.load(self, path, "csv")
 
-    def parse_all(self):
-        logger = logging.getLogger("MANTODataset.parse_all")
-        for raw_item in self._raw_data:
-            item = MANTODataItem(raw_item)
-            try:
-                self._data[item.uri]
-            except KeyError:
-                self._data[item.uri] = item
-            else:
-                logger.debug(f"MANTO URI collision: {item.uri}. Merging ...")
-                self._data[item.uri].links["pleiades.stoa.org"].extend(
-                    item.links["pleiades.stoa.org"]
-                )
+    def _make_item(self, raw_item):
+        return MANTODataItem(raw_item)
 
 
 class MANTODataItem(DataItem):
+    __slots__ = ()
+
     def __init__(self, raw: dict):
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse MANTO CSV data"""
@@ -9,57 +9,47 @@
 Define a class for managing data from Itiner-e
 """
 import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
-from pleiades_sidebar.norm import norm
+from pleiades_sidebar.norm import norm, norm_all
 from pprint import pformat
 import re
 from urllib.parse import urlparse
 from validators import url as valid_url
 
-DEFAULT_NOMISMA_PATH = Path(environ["NOMISMA_PATH"]).expanduser().resolve()
 RX_PLEIADES_NAME_URI = re.compile(
     f"^(?P<puri>https://pleiades.stoa.org/places/\d+)/[a-z]+/?$"
 )
 
 
 class NomismaDataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_NOMISMA_PATH, use_cache=False):
-        Dataset.__init__(self)
+    path_env = "NOMISMA_PATH"
+
+    def __init__(self, path: Path = None, use_cache=False, **kwargs):
+        Dataset.__init__(self, **kwargs)
         self.namespace = "nomisma"
         if use_cache:
             Dataset.from_cache(self, namespace=self.namespace)
         else:
             Dataset.load(self, path, "jsonld")
 
-    def parse_all(self):
-        logger = logging.getLogger("NomismaDataset.parse_all")
-        for raw_item in self._raw_data:
-            try:
-                raw_item["@type"]
-            except KeyError:
-                logger.error(f"No @type in {pformat(raw_item, indent=4)}")
-                continue
-
-            if "nmo:Mint" not in raw_item["@type"]:
-                continue
-            item = NomismaDataItem(raw_item)
-            try:
-                self._data[item.uri]
-            except KeyError:
-                self._data[item.uri] = item
-            else:
-                logger.debug(f"Nomisma URI collision: {item.uri}. Merging ...")
-                self._data[item.uri].links["pleiades.stoa.org"].extend(
-                    item.links["pleiades.stoa.org"]
-                )
+    def _make_item(self, raw_item):
+        logger = logging.getLogger("NomismaDataset._make_item")
+        try:
+            raw_item["@type"]
+        except KeyError:
+            logger.error(f"No @type in {pformat(raw_item, indent=4)}")
+            return None
+        if "nmo:Mint" not in raw_item["@type"]:
+            return None
+        return NomismaDataItem(raw_item)
 
 
 class NomismaDataItem(DataItem):
+    __slots__ = ()
+
     def __init__(self, raw: dict):
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse the Nomisma ndjson export format"""
@@ -134,9 +124,9 @@ class NomismaDataItem(DataItem):
         if isinstance(self._raw_data["skos:closeMatch"], dict):
             close_matches = [norm(self._raw_data["skos:closeMatch"]["@id"])]
         elif isinstance(self._raw_data["skos:closeMatch"], list):
-            close_matches = [
-                norm(cm["@id"]) for cm in self._raw_data["skos:closeMatch"]
-            ]
+            close_matches = norm_all(
+                cm["@id"] for cm in self._raw_data["skos:closeMatch"]
+            )
         else:
             raise TypeError(
                 f"skos:closeMatch type='{type(self._raw_data['skos:closeMatch'])}"
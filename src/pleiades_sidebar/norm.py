@@ -9,9 +9,123 @@
 Normalize text
 """
 
-from textnorm import normalize_space, normalize_unicode
+from time import perf_counter
+from unicodedata import is_normalized, normalize
 
+# distinct strings to remember the normalized form of before starting over
+DEFAULT_MEMO_SIZE = 1 << 16
+# the counters kept by a Normalizer (see Normalizer.counts)
+COUNTERS = ("fast", "memo_hits", "normalized", "seconds")
 
-def norm(s: str) -> str:
-    """Normalize space and unicode"""
-    return normalize_space(normalize_unicode(s))
+
+class Normalizer:
+    """Normalize Unicode (NFC) and space as textnorm does, without repeating work
+
+    The result is the same as textnorm's normalize_space(normalize_unicode(s)), but:
+    - printable ASCII strings with no leading, trailing or doubled spaces (most
+      identifiers and many labels) are returned as they are, since NFC leaves ASCII
+      alone and there is no space to collapse
+    - other strings are memoized, so values that recur (empty fields, vocabulary terms,
+      shared link IDs) are only normalized once; the memo is cleared whenever it
+      reaches memo_size entries, which bounds its memory without per-call bookkeeping
+
+    Counters record how each string was handled and how long full normalization took
+    (see stats()).
+    """
+
+    def __init__(self, memo_size: int = DEFAULT_MEMO_SIZE):
+        self.memo_size = memo_size
+        self._memo = dict()
+        self.reset()
+
+    def reset(self):
+        """Zero the counters (the memo is kept)"""
+        self.fast = 0
+        self.memo_hits = 0
+        self.normalized = 0
+        self.seconds = 0.0
+
+    def norm(self, s: str) -> str:
+        """Normalize space and unicode"""
+        if (
+            s.isascii()
+            and s.isprintable()
+            and "  " not in s
+            and s[:1] != " "
+            and s[-1:] != " "
+        ):
+            self.fast += 1
+            return s
+        try:
+            result = self._memo[s]
+        except KeyError:
+            pass
+        else:
+            self.memo_hits += 1
+            return result
+        start = perf_counter()
+        if not is_normalized("NFC", s):
+            result = normalize("NFC", s)
+        else:
+            result = s
+        result = " ".join(result.split())
+        self.seconds += perf_counter() - start
+        self.normalized += 1
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[s] = result
+        return result
+
+    def norm_all(self, values) -> list:
+        """Normalize each of an iterable of strings (e.g. a column or a split field)"""
+        norm = self.norm
+        return [norm(s) for s in values]
+
+    def norm_fields(self, row: dict, fields: list = None) -> dict:
+        """Get a copy of a row with the values of fields (default: all) normalized
+
+        Fields whose value is not a string (e.g. None for an empty JSON value) are
+        copied unchanged.
+        """
+        norm = self.norm
+        if fields is None:
+            fields = row.keys()
+        normed = dict(row)
+        for k in fields:
+            v = row[k]
+            if isinstance(v, str):
+                normed[k] = norm(v)
+        return normed
+
+    def counts(self) -> dict:
+        """Get the counters as they stand"""
+        return {k: getattr(self, k) for k in COUNTERS}
+
+    def add_counts(self, counts: dict):
+        """Add counters kept elsewhere (e.g. by a normalizer in a worker process)"""
+        for k in COUNTERS:
+            setattr(self, k, getattr(self, k) + counts[k])
+
+    def stats(self) -> dict:
+        """Get the counters, with an estimate of the time the shortcuts saved
+
+        The estimate assumes each string returned by the fast path or the memo would
+        have taken the mean time of the strings that were normalized in full.
+        """
+        calls = self.fast + self.memo_hits + self.normalized
+        mean = self.seconds / self.normalized if self.normalized else 0.0
+        return {
+            "calls": calls,
+            "fast": self.fast,
+            "memo_hits": self.memo_hits,
+            "normalized": self.normalized,
+            "seconds": self.seconds,
+            "saved_seconds": mean * (self.fast + self.memo_hits),
+        }
+
+
+# Shared by the parsers of every dataset in a process
+NORMALIZER = Normalizer()
+norm = NORMALIZER.norm
+norm_all = NORMALIZER.norm_all
+norm_fields = NORMALIZER.norm_fields
@@ -9,7 +9,6 @@
 Define a class for managing data from Paths Atlas
 """
 import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
 from pleiades_sidebar.norm import norm
@@ -18,58 +17,47 @@ import re
 from urllib.parse import urlparse
 from validators import url as valid_url
 
-DEFAULT_PATHS_ATLAS_PATH = Path(environ["PATHS_ATLAS_PATH"]).expanduser().resolve()
 RX_PLEIADES_NAME_URI = re.compile(
     r"^(?P<puri>https://pleiades.stoa.org/places/\d+)/[a-z]+/?$"
 )
 
 
 class PathsAtlasDataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_PATHS_ATLAS_PATH, use_cache=False):
-        Dataset.__init__(self)
+    path_env = "PATHS_ATLAS_PATH"
+
+    def __init__(self, path: Path = None, use_cache=False, **kwargs):
+        Dataset.__init__(self, **kwargs)
         self.namespace = "paths_atlas"
         if use_cache:
             Dataset.from_cache(self, namespace=self.namespace)
         else:
-            Dataset.load(self, path, "json")
-
-    def parse_all(self):
-        logger = logging.getLogger("PathsAtlasDataset.parse_all")
+            Dataset.load(self, path, "jsonkv")
 
-        print
-
-        paths_places = {
-            uri: vals
-            for uri, vals in self._raw_data.items()  # type: ignore
-            if uri.startswith("http://paths.uniroma1.it/atlas/places/")
+    def _make_item(self, raw_item):
+        uri, vals = raw_item
+        if not (
+            uri.startswith("http://paths.uniroma1.it/atlas/places/")
             or uri.startswith("https://atlas.paths-erc.eu/places/")
-        }
-        for uri, raw_item in paths_places.items():
-            item = PathsAtlasDataItem(raw_item)
-            parts = urlparse(uri)
-            if parts.hostname == "paths.uniroma1.it":
-                item.uri = uri.replace(
-                    "http://paths.uniroma1.it/atlas", "https://atlas.paths-erc.eu"
-                )
-            else:
-                item.uri = uri
-            try:
-                self._data[item.uri]
-            except KeyError:
-                self._data[item.uri] = item
-            else:
-                logger.debug(f"Paths Atlas URI collision: {item.uri}. Merging ...")
-                self._data[item.uri].links["pleiades.stoa.org"].extend(
-                    item.links["pleiades.stoa.org"]
-                )
+        ):
+            return None
+        item = PathsAtlasDataItem(vals)
+        parts = urlparse(uri)
+        if parts.hostname == "paths.uniroma1.it":
+            item.uri = uri.replace(
+                "http://paths.uniroma1.it/atlas", "https://atlas.paths-erc.eu"
+            )
+        else:
+            item.uri = uri
+        return item
 
 
 class PathsAtlasDataItem(DataItem):
+    __slots__ = ()
+
     def __init__(self, raw: dict):
         if not isinstance(raw, dict):
             raise TypeError(type(raw))
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse the Paths Atlas json export format"""
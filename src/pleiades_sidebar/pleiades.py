@@ -8,39 +8,129 @@
 """
 On-demand Pleiades dataset
 """
+from collections import OrderedDict
 import json
 from logging import getLogger
-from os import environ
 from os.path import join as pathjoin
 from pathlib import Path
+from pleiades_sidebar.linkkey import link_key
+from pleiades_sidebar.pleiades_index import PleiadesIndex
+from pleiades_sidebar.registry import env_path
 
-DEFAULT_PLEIADES_PATH = Path(environ["PLEIADES_PATH"]).expanduser().resolve()
+PLEIADES_PATH_ENV = "PLEIADES_PATH"
 
 
 class PleiadesDataset:
-    def __init__(self, path: Path = DEFAULT_PLEIADES_PATH):
+    def __init__(
+        self,
+        path: Path = None,
+        use_index: bool = False,
+        index_path: Path = None,
+        workers: int = 1,
+        max_places: int = None,
+        fields: list = None,
+    ):
+        """
+        path: directory of place JSON files (None: the one named by PLEIADES_PATH)
+        use_index: answer from a consolidated PleiadesIndex (titles and references only),
+            refreshing it first for any place files that changed since it was built
+        max_places: keep at most this many places in memory, evicting the least recently
+            used (None: no limit)
+        fields: keep only these top-level fields of each place (None: everything)
+        """
+        if path is None:
+            path = env_path(PLEIADES_PATH_ENV)
         self._path = path
-        self._places = dict()
+        self._places = OrderedDict()
+        self._max_places = max_places
+        self._fields = fields
+        self.hits = 0
+        self.misses = 0
+        if use_index:
+            self._index = PleiadesIndex(path, index_path)
+            self._index.update(workers=workers)
+        else:
+            self._index = None
 
     @property
     def path(self):
         return self._path
 
     def get(self, puri: str) -> dict:
-        logger = getLogger("PleiadesDataset.get")
         try:
-            return self._places[puri]
+            place = self._places[puri]
         except KeyError:
+            self.misses += 1
+            place = self._read(puri)
+            if self._fields is not None:
+                place = {k: place[k] for k in self._fields if k in place}
+            self._places[puri] = place
+            if self._max_places is not None and len(self._places) > self._max_places:
+                self._places.popitem(last=False)
+        else:
+            self.hits += 1
+            self._places.move_to_end(puri)
+        return place
+
+    def reference_keys(self, puri: str) -> set:
+        """Get the canonical keys of a place's reference accessURIs (see link_key)
+
+        Raises FileNotFoundError if there is no such place.
+        """
+        if self._index is not None:
             pid = [s for s in puri.split("/") if s.strip()][-1]
-            parts = list(pid)
-            parts = parts[0 : len(parts) - 2]
-            parts.append(pid)
-            ppath = self._path / "{}.json".format(pathjoin(*parts))
-            logger.debug(f"ppath='{ppath}'")
-            # paths = list(self._path.glob(f"**/{pid}.json"))
-            # if len(paths) != 1:
-            #    raise RuntimeError(f"puri='{puri}', pid='{pid}', paths={paths}")
-            with open(ppath, "r", encoding="utf-8") as f:
-                self._places[puri] = json.load(f)
-            del f
-            return self._places[puri]
+            keys = self._index.reference_keys(pid)
+            if keys is None:
+                raise FileNotFoundError(f"No Pleiades place {pid} in index")
+            return keys
+        keys = set()
+        for r in self.get(puri)["references"]:
+            if r["accessURI"]:
+                key = link_key(r["accessURI"], validate=True)
+                if key is not None:
+                    keys.add(key)
+        return keys
+
+    def stamp(self, puri: str) -> str:
+        """Identify the current version of a place cheaply, without reading it (or None)"""
+        pid = [s for s in puri.split("/") if s.strip()][-1]
+        if self._index is not None:
+            stamp = self._index.stamp(pid)
+            if stamp is None:
+                return None
+            size, mtime_ns = stamp
+        else:
+            try:
+                stat = self._place_path(pid).stat()
+            except FileNotFoundError:
+                return None
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        return f"{pid}:{size}:{mtime_ns}"
+
+    def stats(self) -> dict:
+        """Report cache hits and misses for get()"""
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._places)}
+
+    def _read(self, puri: str) -> dict:
+        logger = getLogger("PleiadesDataset._read")
+        pid = [s for s in puri.split("/") if s.strip()][-1]
+        if self._index is not None:
+            place = self._index.get(pid)
+            if place is None:
+                raise FileNotFoundError(f"No Pleiades place {pid} in index")
+            return place
+        ppath = self._place_path(pid)
+        logger.debug(f"ppath='{ppath}'")
+        # paths = list(self._path.glob(f"**/{pid}.json"))
+        # if len(paths) != 1:
+        #    raise RuntimeError(f"puri='{puri}', pid='{pid}', paths={paths}")
+        with open(ppath, "r", encoding="utf-8") as f:
+            place = json.load(f)
+        del f
+        return place
+
+    def _place_path(self, pid: str) -> Path:
+        parts = list(pid)
+        parts = parts[0 : len(parts) - 2]
+        parts.append(pid)
+        return self._path / "{}.json".format(pathjoin(*parts))
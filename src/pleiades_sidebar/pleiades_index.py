@@ -0,0 +1,198 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Consolidated index of Pleiades place titles and reference URIs
+"""
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+import json
+from logging import getLogger
+from pathlib import Path
+from platformdirs import user_cache_dir
+from pleiades_sidebar.linkkey import link_key
+import sqlite3
+
+# Bump whenever SCHEMA or what is stored in it changes; older indexes are rebuilt
+INDEX_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    pid TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    title TEXT,
+    uri TEXT
+);
+CREATE TABLE IF NOT EXISTS refs (
+    pid TEXT NOT NULL,
+    access_uri TEXT NOT NULL,
+    link_key TEXT
+);
+CREATE INDEX IF NOT EXISTS refs_pid ON refs (pid);
+"""
+
+
+def _read_place(path: Path) -> tuple:
+    """Extract what the index keeps from one place JSON file (runs in worker processes)"""
+    with open(path, "r", encoding="utf-8") as f:
+        place = json.load(f)
+    del f
+    refs = list()
+    for r in place.get("references", []):
+        raw = r.get("accessURI") or ""
+        uri = raw.strip()
+        if not uri:
+            continue
+        # keyed as the reciprocity engine keys references read from the place file
+        ref = (uri, link_key(raw, validate=True))
+        if ref not in refs:
+            refs.append(ref)
+    return (place.get("title"), place.get("uri"), refs)
+
+
+def default_index_path(pleiades_path: Path) -> Path:
+    """Get the cached index for a Pleiades tree (one per tree, named by its location)"""
+    key = sha256(str(Path(pleiades_path).expanduser().resolve()).encode("utf-8"))
+    return (
+        Path(user_cache_dir("pleiades_sidebar", ensure_exists=True))
+        / f"pleiades_index-{key.hexdigest()[:16]}.sqlite"
+    )
+
+
+class PleiadesIndex:
+    """SQLite index of place ID -> title, URI, and reference access URIs
+
+    Built by scanning a Pleiades JSON tree once; update() re-reads only the files whose
+    size or mtime changed since the last build.
+    """
+
+    def __init__(self, pleiades_path: Path, index_path: Path = None):
+        """
+        index_path: where to keep the index (None: the user cache, in a file of its
+            own for this tree, since update() drops places the tree doesn't have)
+        """
+        self._pleiades_path = Path(pleiades_path)
+        if index_path is None:
+            index_path = default_index_path(pleiades_path)
+        self._index_path = Path(index_path)
+        self._conn = sqlite3.connect(self._index_path)
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != INDEX_VERSION:
+            with self._conn:
+                self._conn.execute("DROP TABLE IF EXISTS places")
+                self._conn.execute("DROP TABLE IF EXISTS refs")
+            self._conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def path(self) -> Path:
+        return self._index_path
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, pid: str) -> dict:
+        """Get a place as a dictionary with the same keys as the JSON (or None)"""
+        row = self._conn.execute(
+            "SELECT title, uri FROM places WHERE pid = ?", (pid,)
+        ).fetchone()
+        if row is None:
+            return None
+        access_uris = dict.fromkeys(
+            access_uri
+            for (access_uri,) in self._conn.execute(
+                "SELECT access_uri FROM refs WHERE pid = ? ORDER BY rowid", (pid,)
+            )
+        )
+        references = [{"accessURI": access_uri} for access_uri in access_uris]
+        return {"id": pid, "title": row[0], "uri": row[1], "references": references}
+
+    def reference_keys(self, pid: str) -> set:
+        """Get the canonical keys of a place's reference URIs (None if no such place)"""
+        if self.stamp(pid) is None:
+            return None
+        return {
+            key
+            for (key,) in self._conn.execute(
+                "SELECT link_key FROM refs WHERE pid = ? AND link_key IS NOT NULL",
+                (pid,),
+            )
+        }
+
+    def stamp(self, pid: str) -> tuple:
+        """Get (size, mtime_ns) of the file a place was indexed from (or None)"""
+        return self._conn.execute(
+            "SELECT size, mtime_ns FROM places WHERE pid = ?", (pid,)
+        ).fetchone()
+
+    def update(self, workers: int = 1) -> dict:
+        """Bring the index up to date with the JSON tree and return counts of changes"""
+        logger = getLogger("PleiadesIndex.update")
+        known = {
+            pid: (path, size, mtime_ns)
+            for pid, path, size, mtime_ns in self._conn.execute(
+                "SELECT pid, path, size, mtime_ns FROM places"
+            )
+        }
+        changed = list()
+        seen = set()
+        for path in self._pleiades_path.rglob("*.json"):
+            pid = path.stem
+            if not pid.isdigit():
+                continue
+            if pid in seen:
+                logger.warning(
+                    f"Skipping {path}: place {pid} has already been indexed from "
+                    "another file"
+                )
+                continue
+            seen.add(pid)
+            stat = path.stat()
+            relpath = str(path.relative_to(self._pleiades_path))
+            if known.get(pid) != (relpath, stat.st_size, stat.st_mtime_ns):
+                changed.append((pid, relpath, stat.st_size, stat.st_mtime_ns))
+        removed = [pid for pid in known.keys() if pid not in seen]
+        paths = [self._pleiades_path / relpath for _, relpath, _, _ in changed]
+        if workers > 1 and len(paths) > workers:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                places = list(
+                    executor.map(
+                        _read_place, paths, chunksize=max(1, len(paths) // workers)
+                    )
+                )
+        else:
+            places = [_read_place(path) for path in paths]
+        with self._conn:
+            for pid in removed + [c[0] for c in changed]:
+                self._conn.execute("DELETE FROM refs WHERE pid = ?", (pid,))
+                self._conn.execute("DELETE FROM places WHERE pid = ?", (pid,))
+            self._conn.executemany(
+                "INSERT INTO places VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (pid, relpath, size, mtime_ns, title, uri)
+                    for (pid, relpath, size, mtime_ns), (title, uri, _) in zip(
+                        changed, places
+                    )
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?)",
+                (
+                    (pid, access_uri, key)
+                    for (pid, _, _, _), (_, _, refs) in zip(changed, places)
+                    for access_uri, key in refs
+                ),
+            )
+        stats = {
+            "added": len([c for c in changed if c[0] not in known]),
+            "updated": len([c for c in changed if c[0] in known]),
+            "removed": len(removed),
+            "unchanged": len(seen) - len(changed),
+        }
+        logger.info(f"Updated Pleiades index {self._index_path}: {stats}")
+        return stats
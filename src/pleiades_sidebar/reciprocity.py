@@ -0,0 +1,93 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Batch matching of partner links against the references in Pleiades places
+"""
+import logging
+from pleiades_sidebar.pleiades import PleiadesDataset
+
+
+class ReciprocityEngine:
+    """Work out which partner links to Pleiades places are reciprocated by Pleiades
+
+    join() runs in three steps: one table of (Pleiades URI, item key) rows for all
+    datasets, one table of reference keys for every Pleiades place those rows touch, and
+    a single pass joining the two.
+    """
+
+    def __init__(self, pleiades: PleiadesDataset):
+        self._pleiades = pleiades
+        # Pleiades URI -> set of canonical keys of the place's reference accessURIs
+        self.references = dict()
+        # Pleiades URIs referenced by partners that don't exist in Pleiades
+        self.missing = set()
+        # All Pleiades URIs referenced by the datasets given to join(), in order
+        self.places = dict()
+        # Number of (namespace, Pleiades URI) pairs seen by item_table
+        self.match_count = 0
+
+    def item_table(self, datasets: dict) -> list:
+        """Get (Pleiades URI, namespace, item, item key) rows for all linked items
+
+        Rows are grouped by dataset (in the order given) and sorted by item URI within
+        each dataset.
+        """
+        logger = logging.getLogger("ReciprocityEngine.item_table")
+        rows = list()
+        for ns, dataset in datasets.items():
+            dataset_rows = list()
+            matches = dataset.get_pleiades_matches()
+            logger.info(
+                f"Checking for Pleiades reciprocity in {len(matches)} links from the {ns} dataset."
+            )
+            self.match_count += len(matches)
+            for puri, data_items in matches.items():
+                puri = puri.replace("http://", "https://")
+                for ditem in data_items:
+                    key = ditem.link_key
+                    if key is None:
+                        err = IndexError("No ID found in data item URI")
+                        err.add_note(ditem.uri)
+                        raise err
+                    dataset_rows.append((puri, ns, ditem, key))
+            dataset_rows.sort(key=lambda row: row[2].uri)
+            rows.extend(dataset_rows)
+        return rows
+
+    def reference_table(self, puris) -> dict:
+        """Get the reference keys for each of these places, reading each place once"""
+        for puri in puris:
+            if puri in self.references or puri in self.missing:
+                continue
+            try:
+                self.references[puri] = self._pleiades.reference_keys(puri)
+            except FileNotFoundError:
+                self.missing.add(puri)
+        return self.references
+
+    def join(self, datasets: dict) -> list:
+        """Get (Pleiades URI, namespace, item, reciprocal) for all items in existing places"""
+        return self.join_rows(self.item_table(datasets))
+
+    def join_rows(self, rows: list) -> list:
+        """Join rows from item_table (or a subset of them) against Pleiades references"""
+        logger = logging.getLogger("ReciprocityEngine.join_rows")
+        self.places = dict.fromkeys(row[0] for row in rows)
+        references = self.reference_table(self.places)
+        result = list()
+        missing = dict()
+        for puri, ns, ditem, key in rows:
+            try:
+                result.append((puri, ns, ditem, key in references[puri]))
+            except KeyError:
+                missing.setdefault(puri, set()).add(ns)
+        for puri, namespaces in missing.items():
+            logger.error(
+                f"Non-existent Pleiades place {puri} referenced in {", ".join(sorted(namespaces))}. Ignored."
+            )
+        return result
@@ -0,0 +1,114 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Registry of dataset classes by namespace, imported only when first requested
+"""
+from collections.abc import Mapping
+from importlib import import_module
+from importlib.metadata import EntryPoint, entry_points
+import logging
+from os import environ
+from pathlib import Path
+
+# third-party packages add datasets with entry points in this group, e.g. in pyproject:
+# [project.entry-points."pleiades_sidebar.datasets"]
+# mydataset = "my_package.my_module:MyDataset"
+ENTRY_POINT_GROUP = "pleiades_sidebar.datasets"
+
+# namespace -> "module:class" of the datasets that ship with this package
+BUILTIN_DATASETS = {
+    "cflago": "pleiades_sidebar.cfl_ago:CFLAGODataset",
+    "classical_temples": "pleiades_sidebar.temples_classical_world:ClassicalTemplesDataset",
+    "edhgeo": "pleiades_sidebar.edh_geo:EDHGEODataset",
+    "itinere": "pleiades_sidebar.itinere:ItinerEDataset",
+    "manto": "pleiades_sidebar.manto:MANTODataset",
+    "nomisma": "pleiades_sidebar.nomisma:NomismaDataset",
+    "paths_atlas": "pleiades_sidebar.paths_atlas:PathsAtlasDataset",
+    "topostext": "pleiades_sidebar.topostext:ToposTextDataset",
+    "whg": "pleiades_sidebar.whg:WHGDataset",
+    "wikidata": "pleiades_sidebar.wikidata:WikidataDataset",
+}
+
+
+def env_path(var: str) -> Path:
+    """Get the source path named by an environment variable, read when it is needed"""
+    try:
+        path = environ[var]
+    except KeyError:
+        raise ValueError(
+            f"No source path was given and the {var} environment variable is not set"
+        )
+    return Path(path).expanduser().resolve()
+
+
+def _load(spec) -> type:
+    """Import a class from a "module:class" string or an entry point"""
+    if isinstance(spec, EntryPoint):
+        return spec.load()
+    module_name, _, class_name = spec.partition(":")
+    return getattr(import_module(module_name), class_name)
+
+
+class DatasetRegistry(Mapping):
+    """Dataset classes keyed by namespace, imported the first time they are looked up
+
+    Built-in datasets are known by module and class name; datasets from other packages
+    are found through entry points (see ENTRY_POINT_GROUP), which are only scanned
+    when a namespace that isn't built in is looked up or the registry is listed.
+    """
+
+    def __init__(
+        self, builtin: dict = BUILTIN_DATASETS, group: str = ENTRY_POINT_GROUP
+    ):
+        # namespace -> "module:class", EntryPoint, or (once imported) the class
+        self._specs = dict(builtin)
+        self._group = group
+        self._scanned = False
+
+    def register(self, namespace: str, spec):
+        """Add or replace a dataset: a class, a "module:class" string, or EntryPoint"""
+        self._specs[namespace] = spec
+
+    def __getitem__(self, namespace: str) -> type:
+        try:
+            spec = self._specs[namespace]
+        except KeyError:
+            self._scan()
+            spec = self._specs[namespace]
+        if isinstance(spec, type):
+            return spec
+        cls = _load(spec)
+        self._specs[namespace] = cls
+        return cls
+
+    def __iter__(self):
+        self._scan()
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        self._scan()
+        return len(self._specs)
+
+    def _scan(self):
+        """Add datasets registered by other packages (built-ins take precedence)"""
+        if self._scanned:
+            return
+        logger = logging.getLogger("DatasetRegistry._scan")
+        self._scanned = True
+        for ep in entry_points(group=self._group):
+            if ep.name in self._specs:
+                logger.warning(
+                    f"Ignoring dataset entry point '{ep.name}' ({ep.value}): "
+                    "namespace is already registered"
+                )
+                continue
+            self._specs[ep.name] = ep
+
+
+# Shared by the generator and scripts
+DATASETS = DatasetRegistry()
@@ -0,0 +1,78 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Serialize output JSON in a selectable profile with an optional fast encoder
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pretty: indented for readable diffs (the long-standing format); compact: no whitespace
+PROFILES = ("pretty", "compact")
+# auto: orjson for compact output when it is installed, otherwise json
+BACKENDS = ("auto", "json", "orjson")
+
+
+class Serializer:
+    """Turn JSON-serializable data into UTF-8 bytes for output files
+
+    Pretty output is always produced by the standard library, since orjson can only
+    indent by two spaces and pretty files must stay byte-identical from run to run.
+    """
+
+    def __init__(self, profile: str = "pretty", backend: str = "auto"):
+        if profile not in PROFILES:
+            raise ValueError(
+                f"Unknown serialization profile '{profile}' (expected one of {PROFILES})"
+            )
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown serialization backend '{backend}' (expected one of {BACKENDS})"
+            )
+        if backend == "orjson" and orjson is None:
+            raise ImportError("The orjson backend was requested but is not installed")
+        if backend == "orjson" and profile == "pretty":
+            raise ValueError("The orjson backend only supports the compact profile")
+        if backend == "auto":
+            backend = (
+                "orjson" if orjson is not None and profile == "compact" else "json"
+            )
+        self.profile = profile
+        self.backend = backend
+
+    def dumps(self, data) -> bytes:
+        if self.backend == "orjson":
+            return orjson.dumps(data)
+        if self.profile == "compact":
+            s = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        else:
+            s = json.dumps(data, ensure_ascii=False, indent=4)
+        return s.encode("utf-8")
+
+    def dumps_array_item(self, item, first: bool) -> bytes:
+        """Serialize one item of an array being written incrementally
+
+        The array is b"[" + one call per item + array_end(); the result is identical to
+        dumps() of the whole list.
+        """
+        if self.profile == "compact":
+            return self.dumps(item) if first else b"," + self.dumps(item)
+        s = self.dumps(item).replace(b"\n", b"\n    ")
+        return (b"\n    " if first else b",\n    ") + s
+
+    def array_end(self, empty: bool) -> bytes:
+        if self.profile == "compact" or empty:
+            return b"]"
+        return b"\n]"
+
+    def describe(self) -> dict:
+        """Describe the output format for run metadata"""
+        return {"profile": self.profile, "backend": self.backend}
@@ -0,0 +1,225 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Compact SQLite store for parsed dataset items, materialized only on access
+"""
+from collections.abc import Mapping
+from importlib import import_module
+from itertools import groupby
+import json
+from os import replace
+from pathlib import Path
+from pickle import dumps, loads
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY,
+    uri TEXT NOT NULL UNIQUE,
+    label TEXT,
+    summary TEXT,
+    links TEXT NOT NULL
+);
+CREATE TABLE pleiades (id INTEGER PRIMARY KEY, puri TEXT NOT NULL, uri TEXT NOT NULL);
+CREATE INDEX pleiades_puri ON pleiades (puri);
+CREATE TABLE indexes (name TEXT PRIMARY KEY, value BLOB NOT NULL);
+"""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    """Open an existing store read-only"""
+    return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+
+
+def _decode_links(s: str) -> dict:
+    """Restore link dictionaries; JSON turns (type, uri) tuples into lists"""
+    return {
+        netloc: [tuple(link) if isinstance(link, list) else link for link in links]
+        for netloc, links in json.loads(s).items()
+    }
+
+
+def read_meta(path: Path) -> dict:
+    """Get the metadata stored with a store, or None if it can't be read"""
+    try:
+        conn = _connect(path)
+        try:
+            rows = conn.execute("SELECT key, value FROM meta").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return {k: json.loads(v) for k, v in rows}
+
+
+def write_store(
+    path: Path, meta: dict, items: dict, pleiades_index: dict, indexes: dict = {}
+):
+    """Write parsed items and their indexes to a new store, replacing any existing one"""
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    item_class = None
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                "INSERT INTO items (uri, label, summary, links) VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        item.uri,
+                        item.label,
+                        item.summary,
+                        json.dumps(item.links, ensure_ascii=False),
+                    )
+                    for item in items.values()
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO pleiades (puri, uri) VALUES (?, ?)",
+                ((puri, uri) for puri, uris in pleiades_index.items() for uri in uris),
+            )
+            conn.executemany(
+                "INSERT INTO indexes (name, value) VALUES (?, ?)",
+                ((name, dumps(index)) for name, index in indexes.items()),
+            )
+            for item in items.values():
+                item_class = f"{type(item).__module__}:{type(item).__qualname__}"
+                break
+            meta = dict(meta, item_class=item_class)
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                ((k, json.dumps(v)) for k, v in meta.items()),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        replace(tmp_path, path)
+    except BaseException:
+        # don't leave a partial store behind
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+class _StoreMapping(Mapping):
+    """Read-only mapping over a store that opens its connection on first use"""
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._conn = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _connect(self._path)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __getstate__(self):
+        # connections can't be pickled (e.g. back from a worker process)
+        d = self.__dict__.copy()
+        d["_conn"] = None
+        return d
+
+
+class ItemStore(_StoreMapping):
+    """Mapping of item URI -> DataItem that builds items only when they are accessed"""
+
+    def __init__(self, path: Path):
+        _StoreMapping.__init__(self, path)
+        self._item_class = None
+
+    @property
+    def item_class(self):
+        if self._item_class is None:
+            from pleiades_sidebar.dataset import CacheError, DataItem
+
+            meta = read_meta(self._path)
+            if meta is None:
+                raise CacheError(
+                    f"No store metadata in {self._path}; reload from source"
+                )
+            self._item_class = DataItem
+            spec = meta.get("item_class")
+            if spec:
+                module, qualname = spec.split(":")
+                self._item_class = getattr(import_module(module), qualname)
+        return self._item_class
+
+    def _materialize(self, row: tuple):
+        uri, label, summary, links = row
+        return self.item_class.from_fields(label, uri, summary, _decode_links(links))
+
+    def __getitem__(self, uri: str):
+        row = self.conn.execute(
+            "SELECT uri, label, summary, links FROM items WHERE uri = ?", (uri,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(uri)
+        return self._materialize(row)
+
+    def __iter__(self):
+        for (uri,) in self.conn.execute("SELECT uri FROM items ORDER BY id"):
+            yield uri
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def values(self):
+        """All items, fetched in one pass rather than one query per key"""
+        cursor = self.conn.execute(
+            "SELECT uri, label, summary, links FROM items ORDER BY id"
+        )
+        return (self._materialize(row) for row in cursor)
+
+    def indexes(self) -> dict:
+        """Other derived lookup structures stored alongside the items"""
+        return {
+            name: loads(value)
+            for name, value in self.conn.execute("SELECT name, value FROM indexes")
+        }
+
+
+class PleiadesIndexStore(_StoreMapping):
+    """Mapping of Pleiades URI -> set of item URIs, read from the store on demand"""
+
+    def __getitem__(self, puri: str) -> set:
+        uris = {
+            uri
+            for (uri,) in self.conn.execute(
+                "SELECT uri FROM pleiades WHERE puri = ?", (puri,)
+            )
+        }
+        if not uris:
+            raise KeyError(puri)
+        return uris
+
+    def __iter__(self):
+        for (puri,) in self.conn.execute(
+            "SELECT puri FROM pleiades GROUP BY puri ORDER BY MIN(id)"
+        ):
+            yield puri
+
+    def __len__(self):
+        return self.conn.execute(
+            "SELECT COUNT(DISTINCT puri) FROM pleiades"
+        ).fetchone()[0]
+
+    def items(self):
+        """All (puri, item URIs) pairs, fetched in one pass"""
+        cursor = self.conn.execute("SELECT puri, uri FROM pleiades ORDER BY id")
+        return (
+            (puri, {uri for _, uri in rows})
+            for puri, rows in groupby(cursor, key=lambda row: row[0])
+        )
@@ -0,0 +1,460 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Generate synthetic Pleiades and partner datasets for benchmarks and load tests
+"""
+import csv
+import json
+import logging
+from pathlib import Path
+from pleiades_sidebar.wikidata import LINK_KEYS
+from random import Random
+
+# source file written for each namespace
+FILENAMES = {
+    "cflago": "cflago.csv",
+    "classical_temples": "classical_temples.csv",
+    "edhgeo": "edhgeo.csv",
+    "itinere": "itinere.ndjson",
+    "manto": "manto.csv",
+    "nomisma": "nomisma.jsonld",
+    "paths_atlas": "paths_atlas.json",
+    "topostext": "topostext.csv",
+    "whg": "whg.json",
+    "wikidata": "wikidata.tsv",
+}
+NAMESPACES = tuple(FILENAMES.keys())
+PLEIADES_DIRNAME = "pleiades"
+PLEIADES_BASE_URI = "https://pleiades.stoa.org/places/"
+# inline, so the corpus loads offline without a vendored or cached Linked Places context
+WHG_CONTEXT = {"pl": PLEIADES_BASE_URI, "viaf": "https://viaf.org/viaf/"}
+CFL_ID_PREFIX = 'GA_OPE_EDIT" target="_blank">'
+EDHGEO_FIELDNAMES = [
+    "id",
+    "fo_antik",
+    "fo_modern",
+    "fundstelle",
+    "pleiades_id_1",
+    "pleiades_id_2",
+    "geonames_id_1",
+    "geonames_id_2",
+    "trismegistos_geo_id",
+]
+SYLLABLES = (
+    "a ba da e ga i ka la lo ma mi na ne o pa po ra ri sa ste ta the to tu xa"
+).split()
+
+
+def env_var(ns: str) -> str:
+    """Get the environment variable that points a dataset at its source file"""
+    return f"{ns.upper()}_PATH"
+
+
+class SyntheticCorpus:
+    """A reproducible set of made-up places and partner records that link to them
+
+    Every partner record links to one or more Pleiades places. Each of those links is
+    reciprocated (the place cites the partner item among its references) with
+    probability reciprocity, and each partner item is repeated, with a link to another
+    place, with probability duplicates, so that the datasets' URI collision merging is
+    exercised too. WHG items are never duplicated, since WHGDataset rejects collisions.
+
+    Records follow the layout of each partner's real exports as far as the parsers read
+    them; values are random but deterministic for a given seed.
+    """
+
+    def __init__(
+        self,
+        places: int = 1000,
+        items: int = None,
+        reciprocity: float = 0.5,
+        duplicates: float = 0.05,
+        seed: int = 0,
+    ):
+        """
+        places: number of Pleiades places
+        items: number of distinct items in each partner dataset (default: places)
+        """
+        if not 0.0 <= reciprocity <= 1.0:
+            raise ValueError(f"reciprocity must be between 0 and 1, not {reciprocity}")
+        if not 0.0 <= duplicates <= 1.0:
+            raise ValueError(f"duplicates must be between 0 and 1, not {duplicates}")
+        self._rng = Random(seed)
+        self.items = places if items is None else items
+        self.reciprocity = reciprocity
+        self.duplicates = duplicates
+        self.pids = sorted(
+            str(pid)
+            for pid in self._rng.sample(range(10000, 10000 + 20 * places), places)
+        )
+        self.titles = {pid: self._name() for pid in self.pids}
+        # pid -> references to partner items, added as partner records are made
+        self.references = {pid: list() for pid in self.pids}
+        self.stats = {"records": 0, "links": 0, "reciprocated": 0, "duplicates": 0}
+
+    def write(self, outpath: Path, namespaces=NAMESPACES) -> dict:
+        """Write the partner files and then the Pleiades tree; return their paths
+
+        Returns a dictionary of paths keyed by namespace, plus "pleiades" for the
+        directory of place files (as expected by Generator).
+        """
+        logger = logging.getLogger("SyntheticCorpus.write")
+        outpath = Path(outpath)
+        outpath.mkdir(parents=True, exist_ok=True)
+        paths = dict()
+        for ns in namespaces:
+            try:
+                filename = FILENAMES[ns]
+            except KeyError:
+                raise ValueError(f"No synthetic data for namespace '{ns}'")
+            paths[ns] = outpath / filename
+            getattr(self, f"_write_{ns}")(paths[ns])
+            logger.info(f"Wrote synthetic {ns} data to {paths[ns]}")
+        paths["pleiades"] = outpath / PLEIADES_DIRNAME
+        self.write_pleiades(paths["pleiades"])
+        logger.info(f"Synthetic corpus in {outpath}: {self.stats}")
+        return paths
+
+    def write_pleiades(self, outpath: Path):
+        """Write one JSON file per place, in the layout PleiadesDataset reads"""
+        outpath = Path(outpath)
+        for pid in self.pids:
+            dirpath = outpath.joinpath(*list(pid)[0 : len(pid) - 2])
+            dirpath.mkdir(parents=True, exist_ok=True)
+            place = {
+                "@type": "Place",
+                "id": pid,
+                "uri": PLEIADES_BASE_URI + pid,
+                "title": self.titles[pid],
+                "references": self.references[pid]
+                + [{"accessURI": "", "shortTitle": "Barrington Atlas"}],
+                "locations": [],
+                "names": [],
+                "connections": [],
+            }
+            with open(dirpath / f"{pid}.json", "w", encoding="utf-8") as f:
+                json.dump(place, f, ensure_ascii=False, indent=4)
+            del f
+
+    def _name(self) -> str:
+        """Make up a place name, sometimes with decomposed accents or extra spaces"""
+        rng = self._rng
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        name = name.capitalize()
+        roll = rng.random()
+        if roll < 0.1:
+            name += "e\u0301"
+        elif roll < 0.15:
+            name += "  " + rng.choice(SYLLABLES).capitalize()
+        return name
+
+    def _records(self, ns: str, reference_uri, links: int = 1, duplicates: bool = True):
+        """Yield (item number, label, pids) for every record of a partner dataset
+
+        reference_uri(n): the URI under which Pleiades cites item n
+        links: maximum number of places each record links to
+        """
+        rng = self._rng
+        for n in range(1, self.items + 1):
+            label = self._name()
+            count = 1
+            if duplicates and rng.random() < self.duplicates:
+                count = 2
+                self.stats["duplicates"] += 1
+            for _ in range(count):
+                pids = rng.sample(self.pids, rng.randint(1, links))
+                for pid in pids:
+                    self.stats["links"] += 1
+                    if rng.random() < self.reciprocity:
+                        self.stats["reciprocated"] += 1
+                        self.references[pid].append(
+                            {"accessURI": reference_uri(n), "shortTitle": ns}
+                        )
+                self.stats["records"] += 1
+                yield (n, label, pids)
+
+    def _write_csv(self, path: Path, fieldnames: list, rows, dialect="excel"):
+        """Write rows as CSV, quoting every field as the partners' exports do"""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=fieldnames, dialect=dialect, quoting=csv.QUOTE_ALL
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+        del f
+
+    def _write_cflago(self, path: Path):
+        records = self._records(
+            "cflago", lambda n: f"https://chronique.efa.gr/?r=topo_public&id={n}"
+        )
+        self._write_csv(
+            path,
+            ["Id", "Full_name", "Pleiades_id"],
+            (
+                {
+                    "Id": f"{CFL_ID_PREFIX}{n}",
+                    "Full_name": label,
+                    "Pleiades_id": pids[0],
+                }
+                for n, label, pids in records
+            ),
+        )
+
+    def _write_classical_temples(self, path: Path):
+        records = self._records(
+            "classical_temples", lambda n: f"https://romeresearchgroup.org/items/{n}"
+        )
+        self._write_csv(
+            path,
+            ["id", "name", "location", "modernplace", "pleiades"],
+            (
+                {
+                    "id": n,
+                    "name": f"Temple of {label}",
+                    "location": self.titles[pids[0]],
+                    "modernplace": label,
+                    "pleiades": pids[0],
+                }
+                for n, label, pids in records
+            ),
+        )
+
+    def _write_edhgeo(self, path: Path):
+        records = self._records(
+            "edhgeo",
+            lambda n: f"https://edh.ub.uni-heidelberg.de/edh/geographie/{n}",
+            links=2,
+        )
+        rng = self._rng
+        rows = list()
+        for n, label, pids in records:
+            rows.append(
+                {
+                    "id": n,
+                    "fo_antik": label if rng.random() < 0.8 else "",
+                    "fo_modern": self._name(),
+                    "fundstelle": self._name() if rng.random() < 0.3 else "",
+                    "pleiades_id_1": pids[0],
+                    "pleiades_id_2": pids[1] if len(pids) > 1 else "",
+                    "geonames_id_1": rng.randint(100000, 9999999),
+                    "geonames_id_2": "",
+                    "trismegistos_geo_id": (
+                        rng.randint(1, 99999) if rng.random() < 0.5 else ""
+                    ),
+                }
+            )
+        self._write_csv(path, EDHGEO_FIELDNAMES, rows)
+
+    def _write_itinere(self, path: Path):
+        records = self._records(
+            "itinere", lambda n: f"https://itiner-e.org/route-segment/{n}", links=3
+        )
+        rng = self._rng
+        with open(path, "w", encoding="utf-8") as f:
+            for n, label, pids in records:
+                feature = {
+                    "type": "Feature",
+                    "id": n,
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": [
+                            [rng.uniform(-10, 40), rng.uniform(25, 55)]
+                            for _ in range(2)
+                        ],
+                    },
+                    "properties": {
+                        "name": f"{label} - {self._name()}",
+                        "segmentCertainty": rng.choice(["Certain", "Conjectured"]),
+                        "constructionPeriod": rng.choice(["Roman", "Republican", None]),
+                        "type": rng.choice(["Main Road", "Secondary Road"]),
+                        "itinerary": (
+                            "Itinerarium Antonini" if rng.random() < 0.3 else ""
+                        ),
+                        "description": "" if rng.random() < 0.5 else self._name(),
+                    },
+                    "pleiadesPlaces": [
+                        {"properties": {"url": PLEIADES_BASE_URI + pid}} for pid in pids
+                    ],
+                }
+                f.write(json.dumps(feature, ensure_ascii=False) + "\n")
+        del f
+
+    def _write_manto(self, path: Path):
+        records = self._records(
+            "manto", lambda n: f"https://resource.manto.unh.edu/{8000000 + n}"
+        )
+        self._write_csv(
+            path,
+            ["Object ID", "Name", "Information", "Pleiades"],
+            (
+                {
+                    "Object ID": 8000000 + n,
+                    "Name": label,
+                    "Information": f"place in {self.titles[pids[0]]}",
+                    "Pleiades": pids[0],
+                }
+                for n, label, pids in records
+            ),
+        )
+
+    def _write_nomisma(self, path: Path):
+        records = self._records(
+            "nomisma", lambda n: f"http://nomisma.org/id/mint_{n}", links=2
+        )
+        rng = self._rng
+        graph = list()
+        for n, label, pids in records:
+            close_matches = list()
+            for pid in pids:
+                uri = PLEIADES_BASE_URI + pid
+                roll = rng.random()
+                if roll < 0.1:
+                    # a name within the place
+                    uri += "/" + rng.choice(SYLLABLES) + rng.choice(SYLLABLES)
+                elif roll < 0.2:
+                    uri += "/"
+                close_matches.append({"@id": uri})
+            close_matches.append({"@id": f"http://www.wikidata.org/entity/Q{n}"})
+            graph.append(
+                {
+                    "@id": f"nm:mint_{n}",
+                    "@type": ["nmo:Mint", "skos:Concept"],
+                    "skos:prefLabel": [
+                        {"@language": "en", "@value": label},
+                        {"@language": "de", "@value": label},
+                    ],
+                    "skos:definition": {
+                        "@language": "en",
+                        "@value": f"The mint at {label}.",
+                    },
+                    "skos:closeMatch": close_matches,
+                }
+            )
+            if rng.random() < 0.1:
+                # other concepts are skipped by the parser
+                graph.append(
+                    {
+                        "@id": f"nm:region_{n}",
+                        "@type": "nmo:Region",
+                        "skos:prefLabel": {"@language": "en", "@value": label},
+                    }
+                )
+        document = {
+            "@context": {
+                "nm": "http://nomisma.org/id/",
+                "nmo": "http://nomisma.org/ontology#",
+                "skos": "http://www.w3.org/2004/02/skos/core#",
+            },
+            "@graph": graph,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False)
+        del f
+
+    def _write_paths_atlas(self, path: Path):
+        records = self._records(
+            "paths_atlas", lambda n: f"https://atlas.paths-erc.eu/places/{n}"
+        )
+        document = dict()
+        for n, label, pids in records:
+            uri = f"https://atlas.paths-erc.eu/places/{n}"
+            if uri in document:
+                # duplicates come under the atlas's former base URI
+                uri = f"http://paths.uniroma1.it/atlas/places/{n}"
+            document[uri] = {
+                "http://www.w3.org/2000/01/rdf-schema#label": [
+                    {"type": "literal", "value": label, "lang": "en"}
+                ],
+                "http://www.w3.org/2004/02/skos/core#exactMatch": [
+                    {"type": "uri", "value": PLEIADES_BASE_URI + pid} for pid in pids
+                ],
+            }
+            document[f"https://atlas.paths-erc.eu/manuscripts/{n}"] = {
+                "http://www.w3.org/2000/01/rdf-schema#label": [
+                    {"type": "literal", "value": f"Manuscript {n}", "lang": "en"}
+                ],
+            }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False)
+        del f
+
+    def _write_topostext(self, path: Path):
+        records = self._records(
+            "topostext", lambda n: f"https://topostext.org/place/{n:06d}Syn"
+        )
+        rng = self._rng
+        self._write_csv(
+            path,
+            ["TTID", "TITLE", "SHORTDESC", "PLEIADES", "WIKIDATA"],
+            (
+                {
+                    "TTID": f"{n:06d}Syn",
+                    "TITLE": label,
+                    "SHORTDESC": f"settlement near {self.titles[pids[0]]}",
+                    "PLEIADES": pids[0],
+                    "WIKIDATA": f"Q{n}" if rng.random() < 0.5 else "",
+                }
+                for n, label, pids in records
+            ),
+        )
+
+    def _write_whg(self, path: Path):
+        records = self._records(
+            "whg",
+            lambda n: f"https://whgazetteer.org/places/{10000000 + n}/detail",
+            duplicates=False,
+        )
+        features = list()
+        for n, label, pids in records:
+            features.append(
+                {
+                    "@id": f"https://whgazetteer.org/api/db/?id={10000000 + n}",
+                    "type": "Feature",
+                    "properties": {"pid": 10000000 + n, "title": label},
+                    "geometry": None,
+                    "links": [
+                        {"type": "closeMatch", "identifier": f"pl:{pid}"}
+                        for pid in pids
+                    ]
+                    + [{"type": "closeMatch", "identifier": f"viaf:{n}"}],
+                }
+            )
+        document = {
+            "type": "FeatureCollection",
+            "@context": WHG_CONTEXT,
+            "citation": "Synthetic data",
+            "features": features,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False)
+        del f
+
+    def _write_wikidata(self, path: Path):
+        records = self._records(
+            "wikidata", lambda n: f"https://www.wikidata.org/wiki/Q{n}"
+        )
+        rng = self._rng
+        fieldnames = ["pleiades", "item", "itemLabel", "itemDescription"] + [
+            k for k in LINK_KEYS.keys() if k != "pleiades"
+        ]
+        rows = list()
+        for n, label, pids in records:
+            row = dict.fromkeys(fieldnames, "")
+            row["pleiades"] = pids[0]
+            row["item"] = f"http://www.wikidata.org/entity/Q{n}"
+            row["itemLabel"] = label
+            row["itemDescription"] = f"ancient settlement near {self.titles[pids[0]]}"
+            row["geonames_ids"] = str(rng.randint(100000, 9999999))
+            if rng.random() < 0.3:
+                row["trismegistos_ids"] = ", ".join(
+                    str(rng.randint(1, 99999)) for _ in range(rng.randint(1, 2))
+                )
+            if rng.random() < 0.3:
+                row["wikipedia_en"] = f"https://en.wikipedia.org/wiki/{label}"
+            rows.append(row)
+        self._write_csv(path, fieldnames, rows, dialect="excel-tab")
@@ -10,46 +10,31 @@ Define a class for managing data from Temples of the Classical World
 """
 
 import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
 from pleiades_sidebar.norm import norm
 
-DEFAULT_CLASSICAL_TEMPLES_PATH = (
-    Path(environ["CLASSICAL_TEMPLES_PATH"]).expanduser().resolve()
-)
-
 
 class ClassicalTemplesDataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_CLASSICAL_TEMPLES_PATH, use_cache=False):
-        Dataset.__init__(self)
+    path_env = "CLASSICAL_TEMPLES_PATH"
+
+    def __init__(self, path: Path = None, use_cache=False, **kwargs):
+        Dataset.__init__(self, **kwargs)
         self.namespace = "classical_temples"
         if use_cache:
             Dataset.from_cache(self, namespace=self.namespace)
         else:
             Dataset.load(self, path, "csv")
 
-    def parse_all(self):
-        logger = logging.getLogger("ClassicalTemplesDataset.parse_all")
-        for raw_item in self._raw_data:
-            item = ClassicalTemplesDataItem(raw_item)
-            try:
-                self._data[item.uri]
-            except KeyError:
-                self._data[item.uri] = item
-            else:
-                logger.debug(
-                    f"Classical Temples URI collision: {item.uri}. Merging ..."
-                )
-                self._data[item.uri].links["pleiades.stoa.org"].extend(
-                    item.links["pleiades.stoa.org"]
-                )
+    def _make_item(self, raw_item):
+        return ClassicalTemplesDataItem(raw_item)
 
 
 class ClassicalTemplesDataItem(DataItem):
+    __slots__ = ()
+
     def __init__(self, raw: dict):
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse Classical Temples CSV data"""
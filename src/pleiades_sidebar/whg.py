@@ -10,42 +10,49 @@ Define a class for managing data from World Historical Gazetteer (WHG)
 """
 
 import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
 from pleiades_sidebar.norm import norm
 from pprint import pformat
 from urllib.parse import urlparse
 
-DEFAULT_WHG_PATH = Path(environ.get("WHG_PATH", "")).expanduser().resolve()
-
 
 class WHGDataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_WHG_PATH, use_cache=False):
-        Dataset.__init__(self)
-        self.namespace = "whg"
+    path_env = "WHG_PATH"
+
+    def __init__(
+        self,
+        path: Path = None,
+        use_cache=False,
+        namespace: str = "whg",
+        **kwargs,
+    ):
+        Dataset.__init__(self, **kwargs)
+        # whg_* namespaces each load their own file, so they need their own cache
+        self.namespace = namespace
         if use_cache:
             Dataset.from_cache(self, namespace=self.namespace)
         else:
             Dataset.load(self, path, "jsonlpf")
 
-    def parse_all(self):
-        logger = logging.getLogger("WHGDataset.parse_all")
-        for raw_item in self._raw_data:
-            item = WHGDataItem(raw_item, self._context)
-            try:
-                self._data[item.uri]
-            except KeyError:
-                self._data[item.uri] = item
-            else:
-                raise NotImplementedError(f"WHG URI collision: {item.uri}. Merging ...")
+    def _make_item(self, raw_item):
+        return WHGDataItem(raw_item, self._context)
+
+    def _add_item(self, item):
+        try:
+            self._data[item.uri]
+        except KeyError:
+            self._data[item.uri] = item
+        else:
+            raise NotImplementedError(f"WHG URI collision: {item.uri}. Merging ...")
 
 
 class WHGDataItem(DataItem):
+    __slots__ = ("_context",)
+
     def __init__(self, raw: dict, context: dict):
         self._context = context
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse a WHG GeoJSON feature"""
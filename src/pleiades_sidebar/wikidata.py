@@ -9,16 +9,13 @@
 Define a class for managing data from Wikidata
 """
 import logging
-from os import environ
 from pathlib import Path
 from pleiades_sidebar.dataset import Dataset, DataItem
+from pleiades_sidebar.norm import norm, norm_all
 from pprint import pformat
 import re
-from textnorm import normalize_space, normalize_unicode
 from urllib.parse import urlparse
 
-DEFAULT_WIKIDATA_PATH = Path(environ["WIKIDATA_PATH"]).expanduser().resolve()
-
 LINK_KEYS = {
     "pleiades": "pleiades",
     "chronique_ids": "cfl/ado",
@@ -38,40 +35,26 @@ LINK_KEYS = {
 rx_delim = re.compile(r"(,|;)\s*")
 
 
-def norm(s: str) -> str:
-    return normalize_space(normalize_unicode(s))
-
-
 class WikidataDataset(Dataset):
-    def __init__(self, path: Path = DEFAULT_WIKIDATA_PATH, use_cache=False):
-        Dataset.__init__(self)
+    path_env = "WIKIDATA_PATH"
+
+    def __init__(self, path: Path = None, use_cache=False, **kwargs):
+        Dataset.__init__(self, **kwargs)
         self.namespace = "wikidata"
         if use_cache:
             Dataset.from_cache(self, namespace="wikidata")
         else:
             Dataset.load(self, path, "tsv")
 
-    def parse_all(self):
-        logger = logging.getLogger("WikidataDataset.parse_all")
-        for raw_item in self._raw_data:
-            wikidata_item = WikidataDataItem(raw_item)
-            try:
-                self._data[wikidata_item.uri]
-            except KeyError:
-                self._data[wikidata_item.uri] = wikidata_item
-            else:
-                logger.debug(
-                    f"Wikidata URI collision: {wikidata_item.uri}. Merging ..."
-                )
-                self._data[wikidata_item.uri].links["pleiades.stoa.org"].extend(
-                    wikidata_item.links["pleiades.stoa.org"]
-                )
+    def _make_item(self, raw_item):
+        return WikidataDataItem(raw_item)
 
 
 class WikidataDataItem(DataItem):
+    __slots__ = ()
+
     def __init__(self, raw: dict):
         DataItem.__init__(self, raw=raw)
-        self._raw_data = raw
 
     def _parse(self):
         """Parse our standard wikipedia SPARQL result CSV into standard internal format"""
@@ -99,7 +82,7 @@ class WikidataDataItem(DataItem):
             except KeyError:
                 logger.warning(f"Did not find expected fieldname '{fieldname}'")
                 continue
-            vals = [norm(s) for s in rx_delim.split(val)]
+            vals = norm_all(rx_delim.split(val))
             vals = [s for s in vals if s != ""]
             try:
                 base_uri = self._get_base_uri(resource_shortname)
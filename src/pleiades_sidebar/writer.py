@@ -0,0 +1,296 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Write sidebar JSON files into a sharded output tree
+"""
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from itertools import islice
+import json
+from logging import getLogger
+from os import getpid, replace
+from pathlib import Path
+from pleiades_sidebar.serialize import Serializer
+from time import perf_counter
+
+WRITE_INDEX_FILENAME = ".write_index.json"
+WRITE_INDEX_VERSION = 2
+# number of places SidebarWriter.write takes from its input at a time
+WRITE_BATCH_SIZE = 1024
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write bytes to a temporary file beside path and rename it into place
+
+    The temporary file is named for this process, so processes writing the same path
+    at once (e.g. parallel loads sharing a cache) don't write into each other's.
+    """
+    tmp_path = path.with_name(f".{path.name}.{getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        del f
+        replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+class SidebarWriter:
+    """Write one JSON file per Pleiades place under outpath/p/i/d/pid.json
+
+    Files are serialized and written on worker threads. Each batch creates the shard
+    directories it needs that earlier batches haven't, and each file is replaced
+    atomically, so an interrupted run leaves either the previous file or the new one,
+    never a truncated one.
+
+    A file whose new bytes are identical to what is already on disk is not rewritten.
+    The sha256, size and modification time of every file written are kept in a sidecar
+    index in outpath (see save_index), so unchanged files can usually be recognized
+    without reading them; files the index doesn't know about, or that have been
+    modified since it recorded them, are compared byte for byte.
+    """
+
+    def __init__(
+        self,
+        outpath: Path,
+        workers: int = 1,
+        index_filename: str = WRITE_INDEX_FILENAME,
+        serializer: Serializer = None,
+    ):
+        """
+        index_filename: name of the sidecar hash index in outpath (None: don't keep one)
+        serializer: how to format files (default: pretty, with the json module)
+        """
+        logger = getLogger("SidebarWriter.__init__")
+        self.outpath = Path(outpath)
+        self.workers = workers
+        if serializer is None:
+            serializer = Serializer()
+        self.serializer = serializer
+        self.stats = {
+            "written": 0,
+            "unchanged": 0,
+            "skipped": 0,
+            "removed": 0,
+            "bytes": 0,
+            "seconds": 0.0,
+        }
+        # path relative to outpath -> [sha256 hex digest, size, mtime in nanoseconds]
+        self._hashes = dict()
+        # shard directories already created
+        self._dirs = set()
+        self._index_path = None
+        if index_filename is None:
+            return
+        self._index_path = self.outpath / index_filename
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            del f
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring unreadable write index {self._index_path}")
+            return
+        if index.get("version") == WRITE_INDEX_VERSION:
+            self._hashes = index["files"]
+
+    def filepath(self, puri: str) -> Path:
+        """Get the path of the sidebar JSON file for a Pleiades place"""
+        pid = puri.split("/")[-1]
+        try:
+            dirpath = self.outpath / pid[0] / pid[1] / pid[2]
+        except IndexError as err:
+            err.add_note(f"Failed creation of output path from puri: '{puri}'")
+            raise err
+        return dirpath / f"{pid}.json"
+
+    def write(self, sidebar) -> dict:
+        """Write a file for each place and return counts and throughput
+
+        sidebar: a dictionary, or an iterable of (Pleiades URI, data) pairs such as
+            Generator.iter_generate(), which is consumed a batch at a time
+        """
+        logger = getLogger("SidebarWriter.write")
+        if isinstance(sidebar, Mapping):
+            sidebar = sidebar.items()
+        places = iter(sidebar)
+        executor = None
+        if self.workers > 1:
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                # time spent producing the places doesn't count toward write throughput
+                batch = list(islice(places, WRITE_BATCH_SIZE))
+                if not batch:
+                    break
+                start = perf_counter()
+                jobs = [(self.filepath(puri), data) for puri, data in batch]
+                for dirpath in {filepath.parent for filepath, _ in jobs}:
+                    if dirpath not in self._dirs:
+                        dirpath.mkdir(parents=True, exist_ok=True)
+                        self._dirs.add(dirpath)
+                if executor is not None and len(jobs) > 1:
+                    results = list(executor.map(self._write_one, jobs))
+                else:
+                    results = [self._write_one(job) for job in jobs]
+                for status, size in results:
+                    self.stats[status] += 1
+                    self.stats["bytes"] += size
+                self.stats["seconds"] += perf_counter() - start
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        logger.debug(f"Wrote sidebar files to {self.outpath}: {self.stats}")
+        return self.stats
+
+    def write_file(self, filepath: Path, data) -> str:
+        """Write any other JSON output file (e.g. unreciprocated lists) if it changed"""
+        status, size = self._write_bytes(Path(filepath), self.serializer.dumps(data))
+        self.stats[status] += 1
+        self.stats["bytes"] += size
+        return status
+
+    def open_array(self, filepath: Path):
+        """Start writing a JSON array file one item at a time (see ArrayFile)"""
+        return ArrayFile(self, Path(filepath))
+
+    def remove(self, puris) -> int:
+        """Remove the files for these places (if they exist) and return how many were"""
+        count = 0
+        for puri in puris:
+            filepath = self.filepath(puri)
+            self._hashes.pop(self._relpath(filepath), None)
+            try:
+                filepath.unlink()
+            except FileNotFoundError:
+                continue
+            count += 1
+        self.stats["removed"] += count
+        return count
+
+    def save_index(self):
+        """Save the sidecar hash index, if the writer keeps one"""
+        if self._index_path is None:
+            return
+        write_atomic(
+            self._index_path,
+            json.dumps(
+                {"version": WRITE_INDEX_VERSION, "files": self._hashes}, sort_keys=True
+            ).encode("utf-8"),
+        )
+
+    def _relpath(self, filepath: Path) -> str:
+        return filepath.relative_to(self.outpath).as_posix()
+
+    def _write_one(self, job: tuple) -> tuple:
+        """Write one sidebar file and return (status, bytes written)"""
+        filepath, data = job
+        if len(data) == 0 and not filepath.is_file():
+            # don't write a file at all if we don't have content, unless we are
+            # overwriting a file that's already there
+            getLogger("SidebarWriter._write_one").warning(
+                f"Skipped writing {filepath} because there is no data content and the file did not already exist."
+            )
+            return ("skipped", 0)
+        return self._write_bytes(filepath, self.serializer.dumps(data))
+
+    def _write_bytes(self, filepath: Path, s: bytes) -> tuple:
+        """Write s to filepath unless the file already holds exactly s"""
+        digest = sha256(s).hexdigest()
+        if self._unchanged(filepath, digest, len(s), lambda: s):
+            return ("unchanged", 0)
+        write_atomic(filepath, s)
+        self._record(filepath, digest, len(s))
+        return ("written", len(s))
+
+    def _record(self, filepath: Path, digest: str, size: int, stat=None):
+        """Add a file's digest, size and modification time to the index"""
+        if stat is None:
+            stat = filepath.stat()
+        self._hashes[self._relpath(filepath)] = [digest, size, stat.st_mtime_ns]
+
+    def _unchanged(self, filepath: Path, digest: str, size: int, new_bytes) -> bool:
+        """Does filepath already hold the bytes with this digest and size?
+
+        new_bytes: callable returning the new bytes, for comparison with files the index
+            doesn't know about or that were modified since it recorded them
+        """
+        try:
+            stat = filepath.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size != size:
+            return False
+        try:
+            known = self._hashes[self._relpath(filepath)]
+        except KeyError:
+            known = None
+        if known is not None and known[1:] == [size, stat.st_mtime_ns]:
+            unchanged = known[0] == digest
+        else:
+            # not in the index, or touched since: compare against what's on disk
+            unchanged = filepath.read_bytes() == new_bytes()
+        if unchanged:
+            self._record(filepath, digest, size, stat)
+        return unchanged
+
+
+class ArrayFile:
+    """A JSON array file written one item at a time through a temporary file
+
+    The finished file is identical to what SidebarWriter.write_file would write for the
+    whole list, and like it replaces the target atomically and only if it changed.
+    """
+
+    def __init__(self, writer: SidebarWriter, filepath: Path):
+        self._writer = writer
+        self.filepath = filepath
+        self._tmp_path = filepath.with_name(f".{filepath.name}.tmp")
+        self._f = open(self._tmp_path, "wb")
+        self._hash = sha256()
+        self._size = 0
+        self._count = 0
+        self._write(b"[")
+
+    def append(self, item):
+        self._write(
+            self._writer.serializer.dumps_array_item(item, first=self._count == 0)
+        )
+        self._count += 1
+
+    def close(self) -> str:
+        """Finish the array and put the file in place (if it changed); return status"""
+        self._write(self._writer.serializer.array_end(empty=self._count == 0))
+        self._f.close()
+        writer = self._writer
+        digest = self._hash.hexdigest()
+        if writer._unchanged(
+            self.filepath, digest, self._size, self._tmp_path.read_bytes
+        ):
+            self._tmp_path.unlink()
+            status, size = ("unchanged", 0)
+        else:
+            replace(self._tmp_path, self.filepath)
+            writer._record(self.filepath, digest, self._size)
+            status, size = ("written", self._size)
+        writer.stats[status] += 1
+        writer.stats["bytes"] += size
+        return status
+
+    def discard(self):
+        """Abandon the array, leaving any existing file alone"""
+        self._f.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def _write(self, b: bytes):
+        self._f.write(b)
+        self._hash.update(b)
+        self._size += len(b)
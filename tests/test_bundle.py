@@ -0,0 +1,93 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test bundled sidebar output
+"""
+
+from pleiades_sidebar.bundle import BundleReader, BundleWriter
+import pytest
+
+SIDEBAR = {
+    "https://pleiades.stoa.org/places/266040": [{"@id": "a", "title": "Ἀθῆναι"}],
+    "https://pleiades.stoa.org/places/216748": [{"@id": "b"}],
+    "https://pleiades.stoa.org/places/511300": [{"@id": "c"}, {"@id": "d"}],
+    "https://pleiades.stoa.org/places/579885": [],
+}
+
+
+class TestBundle:
+
+    def test_bundle_roundtrip(self, tmp_path):
+        """Can each place be read back from the bundle by offset?"""
+        stats = BundleWriter(tmp_path).write(SIDEBAR)
+        assert stats["places"] == 3
+        assert sorted(p.name for p in tmp_path.glob("*.ndjson")) == [
+            "sidebar-2.1.ndjson",
+            "sidebar-5.1.ndjson",
+        ]
+        reader = BundleReader(tmp_path)
+        assert len(reader) == 3
+        for puri, data in SIDEBAR.items():
+            if data:
+                assert reader.get(puri) == data
+            else:
+                assert puri not in reader
+                assert reader.get(puri) is None
+        assert dict(reader.items()) == {k: v for k, v in SIDEBAR.items() if v}
+
+    def test_bundle_incremental(self, tmp_path):
+        """Are unchanged places kept and removed places dropped when merging?"""
+        BundleWriter(tmp_path).write(SIDEBAR)
+        writer = BundleWriter(tmp_path)
+        stats = writer.write(
+            {"https://pleiades.stoa.org/places/216748": [{"@id": "x"}]},
+            keep={
+                "https://pleiades.stoa.org/places/266040",
+                "https://pleiades.stoa.org/places/216748",
+            },
+        )
+        assert stats["places"] == 2
+        # sidebar-2 is replaced by a new generation; sidebar-5 has no places left
+        assert stats["written"] == 1
+        assert stats["removed"] == 2
+        assert sorted(p.name for p in tmp_path.glob("*.ndjson")) == [
+            "sidebar-2.2.ndjson"
+        ]
+        reader = BundleReader(tmp_path)
+        assert reader.get("https://pleiades.stoa.org/places/216748") == [{"@id": "x"}]
+        assert (
+            reader.get("https://pleiades.stoa.org/places/266040")
+            == SIDEBAR["https://pleiades.stoa.org/places/266040"]
+        )
+        assert "https://pleiades.stoa.org/places/511300" not in reader
+
+    def test_bundle_unchanged(self, tmp_path):
+        """Is an unchanged shard kept under its name while a changed one is replaced?"""
+        BundleWriter(tmp_path).write(SIDEBAR)
+        changed = dict(SIDEBAR)
+        changed["https://pleiades.stoa.org/places/511300"] = [{"@id": "x"}]
+        stats = BundleWriter(tmp_path).write(changed)
+        assert stats["written"] == 1
+        assert stats["unchanged"] == 1
+        assert stats["removed"] == 1
+        assert sorted(p.name for p in tmp_path.glob("*.ndjson")) == [
+            "sidebar-2.1.ndjson",
+            "sidebar-5.2.ndjson",
+        ]
+        reader = BundleReader(tmp_path)
+        assert dict(reader.items()) == {k: v for k, v in changed.items() if v}
+        assert not list(tmp_path.glob(".*.tmp"))
+
+    def test_bundle_order(self, tmp_path):
+        """Is a stream of places out of URI order refused, leaving the bundle alone?"""
+        BundleWriter(tmp_path).write(SIDEBAR)
+        with pytest.raises(ValueError):
+            BundleWriter(tmp_path).write(iter(SIDEBAR.items()))
+        assert not list(tmp_path.glob(".*.tmp"))
+        reader = BundleReader(tmp_path)
+        assert dict(reader.items()) == {k: v for k, v in SIDEBAR.items() if v}
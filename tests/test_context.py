@@ -0,0 +1,106 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test JSON-LD context resolution
+"""
+
+import json
+from pleiades_sidebar import context
+from pleiades_sidebar.context import ContextResolver
+import pytest
+import requests
+
+CONTEXT_URI = "https://example.org/context.jsonld"
+DOCUMENT = {"@context": {"pl": "https://pleiades.stoa.org/places/"}}
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, document: dict = None, headers: dict = {}):
+        self.status_code = status_code
+        self.headers = headers
+        self._document = document
+
+    def json(self):
+        return self._document
+
+
+class TestContextResolver:
+
+    @pytest.fixture
+    def requests_log(self, monkeypatch):
+        """Answer requests.get from a queue of responses, logging the headers sent"""
+        log = {"responses": list(), "headers": list()}
+
+        def get(uri, headers={}, timeout=None):
+            log["headers"].append(headers)
+            response = log["responses"].pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        monkeypatch.setattr(requests, "get", get)
+        return log
+
+    def test_fetch_and_share(self, tmp_path, requests_log):
+        """Is a context fetched once, then shared and kept on disk?"""
+        requests_log["responses"].append(FakeResponse(200, DOCUMENT, {"ETag": '"v1"'}))
+        resolver = ContextResolver(cache_path=tmp_path)
+        assert resolver.resolve(CONTEXT_URI) == DOCUMENT["@context"]
+        assert resolver.resolve(CONTEXT_URI) == DOCUMENT["@context"]
+        assert len(requests_log["headers"]) == 1
+        assert resolver.sources[CONTEXT_URI] == "network"
+        assert not list(tmp_path.glob(".*.tmp"))
+        # a new process finds it in the cache without asking
+        resolver = ContextResolver(cache_path=tmp_path)
+        assert resolver.resolve(CONTEXT_URI) == DOCUMENT["@context"]
+        assert resolver.sources[CONTEXT_URI] == "cache"
+        assert len(requests_log["headers"]) == 1
+
+    def test_revalidate(self, tmp_path, requests_log):
+        """Are stale copies revalidated conditionally, and used if that fails?"""
+        requests_log["responses"] += [
+            FakeResponse(200, DOCUMENT, {"ETag": '"v1"'}),
+            FakeResponse(304),
+            requests.ConnectionError("offline"),
+        ]
+        ContextResolver(cache_path=tmp_path).resolve(CONTEXT_URI)
+        resolver = ContextResolver(cache_path=tmp_path, max_age=0)
+        assert resolver.resolve(CONTEXT_URI) == DOCUMENT["@context"]
+        assert resolver.sources[CONTEXT_URI] == "revalidated"
+        assert requests_log["headers"][1] == {"If-None-Match": '"v1"'}
+        resolver = ContextResolver(cache_path=tmp_path, max_age=0)
+        assert resolver.resolve(CONTEXT_URI) == DOCUMENT["@context"]
+        assert resolver.sources[CONTEXT_URI] == "cache"
+
+    def test_offline(self, tmp_path, requests_log, monkeypatch):
+        """Offline, are only vendored and cached contexts used?"""
+        vendored_path = tmp_path / "vendored"
+        vendored_path.mkdir()
+        with open(vendored_path / "context.jsonld", "w", encoding="utf-8") as f:
+            json.dump(DOCUMENT, f)
+        del f
+        resolver = ContextResolver(
+            cache_path=tmp_path, vendored_path=vendored_path, max_age=0
+        )
+        assert resolver.resolve(CONTEXT_URI, offline=True) is None
+        monkeypatch.setitem(context.VENDORED_CONTEXTS, CONTEXT_URI, "context.jsonld")
+        # a miss is remembered for as long as resolution stays offline
+        assert resolver.resolve(CONTEXT_URI, offline=True) is None
+        resolver = ContextResolver(
+            cache_path=tmp_path, vendored_path=vendored_path, max_age=0
+        )
+        assert resolver.resolve(CONTEXT_URI, offline=True) == DOCUMENT["@context"]
+        assert resolver.sources[CONTEXT_URI] == "vendored"
+        assert requests_log["headers"] == []
+
+    def test_vendored_missing(self, tmp_path, requests_log, monkeypatch, caplog):
+        """Is a registered context whose vendored copy is missing reported?"""
+        monkeypatch.setitem(context.VENDORED_CONTEXTS, CONTEXT_URI, "context.jsonld")
+        resolver = ContextResolver(cache_path=tmp_path, vendored_path=tmp_path)
+        assert resolver.resolve(CONTEXT_URI, offline=True) is None
+        assert "vendor_contexts.py" in caplog.text
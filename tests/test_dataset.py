@@ -0,0 +1,271 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the Dataset module
+"""
+
+import json
+from os import utime
+from pathlib import Path
+import pickle
+from pleiades_sidebar import dataset
+from pleiades_sidebar.dataset import (
+    CacheError,
+    iter_delimited,
+    iter_json,
+    iter_ndjson,
+    json_header,
+)
+from pleiades_sidebar.store import ItemStore, write_store
+from pleiades_sidebar.wikidata import WikidataDataset, WikidataDataItem
+import pytest
+import shutil
+import sqlite3
+
+TEST_DATA_DIR = Path("tests/data/")
+
+LPF = {
+    "type": "FeatureCollection",
+    "@context": "https://example.org/context.jsonld",
+    "features": [
+        {"@id": "https://example.org/1", "properties": {"title": "One", "x": 1.5}},
+        {"@id": "https://example.org/2", "properties": {"title": "Two", "x": 2.5}},
+    ],
+    "citation": "Example",
+}
+
+
+class TestStreamingLoaders:
+
+    @pytest.fixture(params=["ijson", "fallback"])
+    def backend(self, request, monkeypatch):
+        if request.param == "fallback":
+            monkeypatch.setattr(dataset, "ijson", None)
+        elif dataset.ijson is None:
+            pytest.skip("ijson is not installed")
+        return request.param
+
+    def test_iter_delimited_tsv(self):
+        """Do we stream TSV rows as dictionaries?"""
+        rows = iter_delimited(TEST_DATA_DIR / "wikidata.tsv", dialect="excel-tab")
+        assert not isinstance(rows, list)
+        rows = list(rows)
+        assert len(rows) == 11
+        assert rows[0]["itemLabel"] == "Sierra Elvira"
+
+    def test_iter_delimited_sniffed(self):
+        """Do we sniff the dialect of a CSV file?"""
+        rows = list(iter_delimited(TEST_DATA_DIR / "wikidata.csv"))
+        assert len(rows) == 11
+        assert rows[1]["geonames_ids"] == "9534984"
+
+    def test_iter_delimited_late_utf8(self, tmp_path):
+        """Do we read UTF-8 that first appears after the sampled bytes?"""
+        path = tmp_path / "late.csv"
+        lines = ["id,name"] + [f"{n},plain" for n in range(200)] + ["200,Ἀθῆναι"]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        rows = list(iter_delimited(path))
+        assert rows[-1]["name"] == "Ἀθῆναι"
+
+    def test_iter_json_features(self, backend, tmp_path):
+        """Do we stream LPF features?"""
+        path = tmp_path / "lpf.json"
+        path.write_text(json.dumps(LPF), encoding="utf-8")
+        features = list(iter_json(path, "features.item"))
+        assert features == LPF["features"]
+        assert isinstance(features[0]["properties"]["x"], float)
+
+    def test_json_header(self, backend, tmp_path):
+        """Are header values read whether they come before or after the features?"""
+        path = tmp_path / "lpf.json"
+        document = {
+            "type": "FeatureCollection",
+            "@context": {"pl": "https://pleiades.stoa.org/places/"},
+            "citation": "Before",
+            "features": LPF["features"],
+        }
+        path.write_text(json.dumps(document), encoding="utf-8")
+        header = json_header(path, ["citation", "@context"])
+        assert header == {"citation": "Before", "@context": document["@context"]}
+        # LPF has its citation after the features
+        path.write_text(json.dumps(LPF), encoding="utf-8")
+        header = json_header(path, ["citation", "@context", "missing"])
+        assert header == {"citation": "Example", "@context": LPF["@context"]}
+        document = {
+            "type": "FeatureCollection",
+            "features": LPF["features"],
+            "@context": "https://example.org/context.jsonld",
+        }
+        path.write_text(json.dumps(document), encoding="utf-8")
+        header = json_header(path, ["citation", "@context"])
+        assert header == {"@context": "https://example.org/context.jsonld"}
+
+    def test_iter_json_pairs(self, backend, tmp_path):
+        """Do we stream key/value pairs from a keyed JSON object?"""
+        path = tmp_path / "keyed.json"
+        keyed = {"https://example.org/a": {"v": 1}, "https://example.org/b": {"v": 2}}
+        path.write_text(json.dumps(keyed), encoding="utf-8")
+        assert list(iter_json(path, "", pairs=True)) == list(keyed.items())
+
+    def test_iter_ndjson(self, tmp_path):
+        """Do we stream newline-delimited JSON?"""
+        path = tmp_path / "data.ndjson"
+        path.write_text('{"id": 1}\n{"id": 2}\n', encoding="utf-8")
+        assert [o["id"] for o in iter_ndjson(path)] == [1, 2]
+
+
+class TestFingerprintCache:
+
+    @pytest.fixture
+    def source(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            dataset, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        path = tmp_path / "wikidata.tsv"
+        shutil.copy(TEST_DATA_DIR / "wikidata.tsv", path)
+        return path
+
+    def test_cache_reused_when_fresh(self, source):
+        """Do we skip parsing when the source is unchanged?"""
+        first = WikidataDataset(path=source)
+        assert not first.loaded_from_cache
+        second = WikidataDataset(path=source)
+        assert second.loaded_from_cache
+        assert second.fingerprint == first.fingerprint
+        assert len(second) == 11
+
+    def test_cache_invalidated_by_change(self, source):
+        """Do we re-parse when the source file changes?"""
+        WikidataDataset(path=source)
+        with open(source, "a", encoding="utf-8") as f:
+            f.write("12345\thttp://www.wikidata.org/entity/Q1\tTest\t" + "\t" * 13)
+            f.write("\n")
+        wd = WikidataDataset(path=source)
+        assert not wd.loaded_from_cache
+        assert len(wd) == 12
+
+    def test_cache_damaged(self, source):
+        """Is a cache cut short after its header re-parsed, and rewritten whole?"""
+        first = WikidataDataset(path=source)
+        data = first.cache_path.read_bytes()
+        first.cache_path.write_bytes(data[: len(data) // 2])
+        wd = WikidataDataset(path=source)
+        assert not wd.loaded_from_cache
+        assert len(wd) == 11
+        assert wd.cache_path.read_bytes() == data
+        assert not wd.cache_path.with_suffix(".pickle.tmp").exists()
+        assert WikidataDataset(path=source).loaded_from_cache
+
+    def test_cache_content_hash(self, source):
+        """Does a content hash keep the cache fresh across a touch?"""
+        WikidataDataset(path=source, content_hash=True)
+        utime(source, ns=(0, 0))
+        assert WikidataDataset(path=source, content_hash=True).loaded_from_cache
+        assert not WikidataDataset(path=source).loaded_from_cache
+
+    def test_cache_refresh(self, source):
+        """Can we force a re-parse?"""
+        WikidataDataset(path=source)
+        assert not WikidataDataset(path=source, refresh=True).loaded_from_cache
+
+    def test_cache_restores_pleiades_index(self, source, monkeypatch):
+        """Do we restore the Pleiades index from cache instead of rebuilding it?"""
+        parsed = WikidataDataset(path=source)
+
+        def fail(self):
+            raise AssertionError("Pleiades index rebuilt from cached items")
+
+        monkeypatch.setattr(WikidataDataset, "_pindex", fail)
+        cached = WikidataDataset(path=source)
+        assert cached.loaded_from_cache
+        assert cached._pleiades_index == parsed._pleiades_index
+        assert (
+            cached.get_pleiades_matches().keys() == parsed.get_pleiades_matches().keys()
+        )
+
+    def test_cache_sqlite_store(self, source):
+        """Does the SQLite store answer like the parsed dataset?"""
+        parsed = WikidataDataset(path=source, cache_backend="sqlite")
+        cached = WikidataDataset(path=source, cache_backend="sqlite")
+        assert cached.loaded_from_cache
+        assert isinstance(cached._data, ItemStore)
+        assert len(cached) == len(parsed) == 11
+        uri = "http://www.wikidata.org/entity/Q18288969"
+        assert cached.get(uri).to_lpf_dict() == parsed.get(uri).to_lpf_dict()
+        assert isinstance(cached.get(uri), WikidataDataItem)
+        assert cached.get("http://www.wikidata.org/entity/Q0") is None
+        puri = "https://pleiades.stoa.org/places/216748"
+        assert cached.get_pleiades(puri) == parsed.get_pleiades(puri)
+        assert {
+            puri: [item.uri for item in items]
+            for puri, items in cached.get_pleiades_matches().items()
+        } == {
+            puri: [item.uri for item in items]
+            for puri, items in parsed.get_pleiades_matches().items()
+        }
+        assert cached.to_lpf_dict() == parsed.to_lpf_dict()
+        assert len(pickle.loads(pickle.dumps(cached))) == 11
+
+    def test_cache_sqlite_failures(self, tmp_path):
+        """Does a failed write leave no partial store, and a bare store ask to reload?"""
+        path = tmp_path / "store.sqlite"
+        with pytest.raises(AttributeError):
+            write_store(path, {}, {"x": object()}, {})
+        assert list(tmp_path.iterdir()) == []
+        sqlite3.connect(path).close()
+        with pytest.raises(CacheError):
+            ItemStore(path).item_class
+
+
+class TestLeanItems:
+
+    @pytest.fixture
+    def source(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            dataset, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        return TEST_DATA_DIR / "wikidata.tsv"
+
+    def test_items_are_slotted(self, source):
+        """Do items drop their raw records and share interned link strings?"""
+        wd = WikidataDataset(path=source)
+        items = list(wd._data.values())
+        for item in items:
+            assert not hasattr(item, "__dict__")
+            assert item._raw_data is None
+        netlocs = [k for item in items for k in item.links.keys()]
+        pleiades = [k for k in netlocs if k == "pleiades.stoa.org"]
+        assert len(pleiades) > 1
+        assert all(k is pleiades[0] for k in pleiades)
+
+    def test_raw_data_kept_when_debugging(self, source, monkeypatch):
+        monkeypatch.setattr(dataset.ITEM_LOGGER, "isEnabledFor", lambda level: True)
+        wd = WikidataDataset(path=source, refresh=True)
+        item = next(iter(wd._data.values()))
+        assert item._raw_data is not None
+        assert "_raw_data" not in pickle.dumps(item).decode("latin-1")
+        restored = pickle.loads(pickle.dumps(item))
+        assert restored._raw_data is None
+        assert restored.to_lpf_dict() == item.to_lpf_dict()
+
+    def test_lpf_memoized(self, source):
+        """Is the LPF form built once, copied safely, and rebuilt after a merge?"""
+        wd = WikidataDataset(path=source)
+        item = wd.get("http://www.wikidata.org/entity/Q18288969")
+        first = item.to_lpf_dict()
+        first["properties"]["reciprocal"] = True
+        second = item.to_lpf_dict()
+        assert "reciprocal" not in second["properties"]
+        assert second["links"] is first["links"]
+        item.merge_links({"pleiades.stoa.org": ["http://pleiades.stoa.org/places/1"]})
+        merged = item.to_lpf_dict()
+        assert {
+            "type": "closeMatch",
+            "identifier": "https://pleiades.stoa.org/places/1",
+        } in merged["links"]
+        assert len(merged["links"]) == len(second["links"]) + 1
@@ -11,6 +11,7 @@ Test the Generator module
 
 from pathlib import Path
 from pleiades_sidebar.generator import Generator
+from pleiades_sidebar.manifest import Manifest
 from pprint import pprint
 import pytest
 
@@ -39,3 +40,77 @@ class TestGenerator:
         g = Generator(namespaces=["wikidata"], use_cached=True)
         p = g.generate()
         assert len(p) == 11
+
+
+class TestGeneratorParallel:
+
+    @classmethod
+    def setup_class(cls):
+        cls.paths = {
+            "wikidata": TEST_DATA_DIR / "wikidata.tsv",
+            "manto": TEST_DATA_DIR / "nonexistent.csv",
+            "pleiades": TEST_DATA_DIR / "pleiades",
+        }
+
+    def test_generator_parallel_matches_serial(self):
+        """Do parallel and serial loading produce the same output?"""
+        serial = Generator(namespaces=["wikidata"], paths=self.paths)
+        parallel = Generator(
+            namespaces=["wikidata", "manto"],
+            paths=self.paths,
+            workers=2,
+            allow_partial=True,
+        )
+        assert list(parallel.datasets.keys()) == ["wikidata"]
+        assert parallel.generate() == serial.generate()
+
+    def test_generator_parallel_failure(self):
+        """Does a failing namespace fail the load, as it does in serial mode?"""
+        with pytest.raises(FileNotFoundError):
+            Generator(namespaces=["manto", "wikidata"], paths=self.paths, workers=2)
+        with pytest.raises(FileNotFoundError):
+            Generator(namespaces=["manto", "wikidata"], paths=self.paths)
+
+    def test_generator_parallel_partial(self):
+        """With a partial load allowed, is a failing namespace reported and skipped?"""
+        g = Generator(
+            namespaces=["manto", "wikidata"],
+            paths=self.paths,
+            workers=2,
+            allow_partial=True,
+        )
+        assert list(g.failed.keys()) == ["manto"]
+        assert isinstance(g.failed["manto"], FileNotFoundError)
+        assert len(g.datasets["wikidata"]) == 11
+
+    def test_generator_incremental(self, tmp_path):
+        """Does a second run with a manifest skip unchanged places?"""
+        manifest_path = tmp_path / "manifest.json"
+        g = Generator(namespaces=["wikidata"], paths=self.paths)
+        manifest = Manifest(manifest_path)
+        full, full_unrecip = g.generate(manifest=manifest)
+        manifest.save()
+        assert sorted(manifest.places.keys()) == sorted(full.keys())
+        manifest = Manifest(manifest_path)
+        changed, unrecip = g.generate(manifest=manifest)
+        assert changed == dict()
+        assert unrecip == full_unrecip
+        assert manifest.removed == list()
+        # different run settings change every place's inputs
+        manifest = Manifest(manifest_path, run_inputs={"format": "other"})
+        changed, unrecip = g.generate(manifest=manifest)
+        assert changed == full
+
+    def test_generator_streaming(self):
+        """Does iter_generate yield the same data as generate, in place order?"""
+        g = Generator(namespaces=["wikidata"], paths=self.paths)
+        sidebar, unrecip = g.generate()
+        streamed_unrecip = {"wikidata": list()}
+        places = list(
+            g.iter_generate(
+                unreciprocated_sink=lambda ns, d: streamed_unrecip[ns].append(d)
+            )
+        )
+        assert [puri for puri, _ in places] == sorted(sidebar.keys())
+        assert dict(places) == sidebar
+        assert streamed_unrecip == unrecip
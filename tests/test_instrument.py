@@ -0,0 +1,93 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the run instrumentation
+"""
+
+import json
+from pathlib import Path
+from pickle import dumps, loads
+from pleiades_sidebar import dataset
+from pleiades_sidebar.generator import Generator
+from pleiades_sidebar.instrument import Instruments, max_rss_bytes
+import tracemalloc
+
+TEST_DATA_DIR = Path("tests/data/")
+
+
+class TestInstruments:
+
+    def test_stages(self):
+        """Are calls, items and throughput recorded per stage?"""
+        instruments = Instruments()
+        for _ in range(2):
+            with instruments.stage("parse") as stage:
+                stage["items"] = 5
+        instruments.add("sort", 0.5, 10)
+        report = instruments.report()
+        assert report["stages"]["parse"]["calls"] == 2
+        assert report["stages"]["parse"]["items"] == 10
+        if max_rss_bytes() is not None:
+            assert report["stages"]["parse"]["peak_bytes"] > 0
+            assert report["stages"]["parse"]["peak_source"] == "max_rss"
+        assert report["stages"]["sort"]["items_per_second"] == 20.0
+        assert not report["tracemalloc"]
+
+    def test_nested_peaks(self):
+        """Does an enclosing stage's peak include what its inner stages allocated?"""
+        instruments = Instruments()
+        tracemalloc.start()
+        try:
+            with instruments.stage("outer"):
+                with instruments.stage("inner"):
+                    block = bytearray(1 << 20)
+                    del block
+                with instruments.stage("after"):
+                    pass
+        finally:
+            tracemalloc.stop()
+        stages = instruments.report()["stages"]
+        assert stages["inner"]["peak_bytes"] >= 1 << 20
+        assert stages["outer"]["peak_bytes"] >= stages["inner"]["peak_bytes"]
+        assert stages["after"]["peak_bytes"] < 1 << 20
+        assert stages["outer"]["peak_source"] == "tracemalloc"
+        assert instruments.report()["tracemalloc"]
+
+    def test_merge_and_pickle(self, tmp_path):
+        """Do instruments survive a trip to a worker process and merge by prefix?"""
+        other = Instruments()
+        with other.stage("parse", items=3):
+            pass
+        other = loads(dumps(other))
+        instruments = Instruments()
+        instruments.merge(other, prefix="wikidata.")
+        assert instruments.stages["wikidata.parse"]["items"] == 3
+        instruments.save(tmp_path / "report.json")
+        with open(tmp_path / "report.json", "r", encoding="utf-8") as f:
+            assert "wikidata.parse" in json.load(f)["stages"]
+        del f
+
+    def test_generator_stages(self, tmp_path, monkeypatch):
+        """Does a generator run record its loading and matching stages?"""
+        monkeypatch.setattr(
+            dataset, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        g = Generator(
+            namespaces=["wikidata"],
+            paths={
+                "wikidata": TEST_DATA_DIR / "wikidata.tsv",
+                "pleiades": TEST_DATA_DIR / "pleiades",
+            },
+        )
+        sidebar, _ = g.generate()
+        stages = g.instruments.stages
+        for name in ["load", "parse", "index", "cache_write"]:
+            assert stages[f"wikidata.{name}"]["items"] > 0
+        for name in ["items", "pleiades", "reciprocity", "sort"]:
+            assert stages[name]["calls"] == 1
+        assert stages["sort"]["items"] == sum(len(v) for v in sidebar.values())
@@ -0,0 +1,54 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the link key module
+"""
+
+from pleiades_sidebar.linkkey import LinkCanonicalizer
+import pytest
+
+
+class TestLinkCanonicalizer:
+
+    @classmethod
+    def setup_class(cls):
+        cls.canonicalizer = LinkCanonicalizer(maxsize=16)
+
+    @pytest.mark.parametrize(
+        "uri,key",
+        [
+            ("http://www.wikidata.org/entity/Q5685282", "wikidata.org:Q5685282"),
+            ("https://www.wikidata.org/wiki/Q5685282", "wikidata.org:Q5685282"),
+            ("https://www.geonames.org/9534984/", "geonames.org:9534984"),
+            (
+                "https://chronique.efa.gr/?r=topo_public&id=1234",
+                "chronique.efa.gr:1234",
+            ),
+            ("https://example.org/a/b?id=1&id=2", "example.org:b"),
+            ("https://example.org/place/7#names", "example.org:7"),
+            ("https://whgazetteer.org/places/123/detail", "whgazetteer.org:123"),
+            ("http://paths.uniroma1.it/atlas/places/42", "atlas.paths-erc.eu:42"),
+            ("https://example.org/", None),
+        ],
+    )
+    def test_key(self, uri, key):
+        """Do we get the expected key on both the fast and slow paths?"""
+        assert self.canonicalizer.key(uri) == key
+
+    def test_validate(self):
+        """Do we skip invalid reference URIs only when asked to validate?"""
+        assert self.canonicalizer.key("not a uri/123", validate=True) is None
+        assert self.canonicalizer.key("not a uri/123") == ":123"
+
+    def test_memo(self):
+        """Do we canonicalize each distinct URI only once?"""
+        canonicalizer = LinkCanonicalizer(maxsize=2)
+        for uri in ["https://a.org/1", "https://a.org/1", "https://b.org/2"]:
+            canonicalizer.key(uri)
+        info = canonicalizer.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
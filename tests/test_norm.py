@@ -0,0 +1,58 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test text normalization
+"""
+
+from pleiades_sidebar.norm import Normalizer
+from unicodedata import normalize
+
+CASES = {
+    "": "",
+    "Roma": "Roma",
+    " Roma": "Roma",
+    "Roma\t": "Roma",
+    "Via  Appia": "Via Appia",
+    "Via\nAppia\r\n": "Via Appia",
+    "a\x1fb": "a b",
+    "Ágora": "Ágora",
+    " Athenai Attike　": "Athenai Attike",
+    "Αθῆναι": "Αθῆναι",
+}
+
+
+class TestNormalizer:
+
+    def test_norm(self):
+        """Are space and Unicode normalized, by whichever route?"""
+        normalizer = Normalizer()
+        for _ in range(2):
+            for s, expected in CASES.items():
+                assert normalizer.norm(s) == expected
+                assert normalize("NFC", expected) == expected
+        stats = normalizer.stats()
+        assert stats["calls"] == 2 * len(CASES)
+        # "" and "Roma" take the ASCII fast path every time
+        assert stats["fast"] == 4
+        assert stats["normalized"] == len(CASES) - 2
+        assert stats["memo_hits"] == len(CASES) - 2
+
+    def test_memo_bound(self):
+        """Does the memo stay within its size?"""
+        normalizer = Normalizer(memo_size=3)
+        for i in range(10):
+            assert normalizer.norm(f" {i} ") == str(i)
+        assert len(normalizer._memo) <= 3
+
+    def test_batch(self):
+        """Are columns and rows normalized, leaving non-strings alone?"""
+        normalizer = Normalizer()
+        assert normalizer.norm_all(["a ", " b", "c"]) == ["a", "b", "c"]
+        row = {"name": " Roma ", "type": None, "id": 3}
+        assert normalizer.norm_fields(row) == {"name": "Roma", "type": None, "id": 3}
+        assert normalizer.norm_fields(row, ["type"]) == row
@@ -0,0 +1,141 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the Pleiades module
+"""
+
+import json
+from os import utime
+from pathlib import Path
+from pleiades_sidebar.pleiades import PleiadesDataset
+from pleiades_sidebar import pleiades_index
+from pleiades_sidebar.pleiades_index import PleiadesIndex
+import pytest
+import shutil
+
+TEST_DATA_DIR = Path("tests/data/")
+PURI = "https://pleiades.stoa.org/places/266040"
+
+
+class TestPleiadesIndex:
+
+    @pytest.fixture
+    def tree(self, tmp_path):
+        path = tmp_path / "pleiades"
+        shutil.copytree(TEST_DATA_DIR / "pleiades", path)
+        return path
+
+    def test_index_build(self, tree, tmp_path):
+        """Does a first build index every place?"""
+        index = PleiadesIndex(tree, tmp_path / "index.sqlite")
+        assert index.update() == {
+            "added": 3,
+            "updated": 0,
+            "removed": 0,
+            "unchanged": 0,
+        }
+        place = index.get("266040")
+        assert place["title"] == "Ilurco"
+        assert place["references"] == [
+            {"accessURI": "https://www.wikidata.org/wiki/Q5685282"}
+        ]
+        assert index.get("1") is None
+
+    def test_index_per_tree(self, tree, tmp_path, monkeypatch):
+        """Does each tree get a default index of its own?"""
+        monkeypatch.setattr(
+            pleiades_index, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        other = tmp_path / "other"
+        shutil.copytree(tree / "2", other / "2")
+        index = PleiadesIndex(tree)
+        index.update()
+        other_index = PleiadesIndex(other)
+        assert other_index.path != index.path
+        other_index.update()
+        assert PleiadesIndex(tree).update()["unchanged"] == 3
+
+    def test_index_incremental(self, tree, tmp_path):
+        """Do we re-read only changed files and drop removed ones?"""
+        index = PleiadesIndex(tree, tmp_path / "index.sqlite")
+        index.update()
+        ppath = tree / "2/6/6/0/266040.json"
+        place = json.loads(ppath.read_text(encoding="utf-8"))
+        place["title"] = "Ilurco (revised)"
+        ppath.write_text(json.dumps(place), encoding="utf-8")
+        utime(ppath, ns=(1, 1))
+        (tree / "5/1/1/3/511300.json").unlink()
+        assert index.update() == {
+            "added": 0,
+            "updated": 1,
+            "removed": 1,
+            "unchanged": 1,
+        }
+        assert index.get("266040")["title"] == "Ilurco (revised)"
+        assert index.get("511300") is None
+
+    def test_index_duplicate_pid(self, tree, tmp_path):
+        """Is a second file for a place skipped rather than failing the build?"""
+        copy = tree / "copy" / "266040.json"
+        copy.parent.mkdir()
+        shutil.copy(tree / "2/6/6/0/266040.json", copy)
+        index = PleiadesIndex(tree, tmp_path / "index.sqlite")
+        assert index.update()["added"] == 3
+        assert index.get("266040")["title"] == "Ilurco"
+
+    def test_index_reference_keys(self, tree, tmp_path):
+        """Do the index and the place files give the same reference keys?"""
+        ppath = tree / "2/6/6/0/266040.json"
+        place = json.loads(ppath.read_text(encoding="utf-8"))
+        place["references"] += [
+            {"accessURI": "http://wikidata.org/wiki/Q5685282/"},
+            {"accessURI": " https://www.example.org/places/42 "},
+            {"accessURI": "not a uri"},
+            {"accessURI": ""},
+        ]
+        ppath.write_text(json.dumps(place), encoding="utf-8")
+        direct = PleiadesDataset(tree)
+        indexed = PleiadesDataset(
+            tree, use_index=True, index_path=tmp_path / "index.sqlite"
+        )
+        assert indexed.reference_keys(PURI) == direct.reference_keys(PURI)
+        assert "wikidata.org:Q5685282" in indexed.reference_keys(PURI)
+        with pytest.raises(FileNotFoundError):
+            indexed.reference_keys("https://pleiades.stoa.org/places/1")
+
+    def test_dataset_from_index(self, tree, tmp_path):
+        """Does PleiadesDataset answer the same way from the index?"""
+        direct = PleiadesDataset(tree)
+        indexed = PleiadesDataset(
+            tree, use_index=True, index_path=tmp_path / "index.sqlite"
+        )
+        assert indexed.get(PURI)["title"] == direct.get(PURI)["title"]
+        assert [r["accessURI"] for r in indexed.get(PURI)["references"]] == [
+            r["accessURI"] for r in direct.get(PURI)["references"] if r["accessURI"]
+        ]
+        with pytest.raises(FileNotFoundError):
+            indexed.get("https://pleiades.stoa.org/places/1")
+
+
+class TestPleiadesDataset:
+
+    def test_lru_eviction(self):
+        """Do we keep only the most recently used places and count hits and misses?"""
+        pleiades = PleiadesDataset(TEST_DATA_DIR / "pleiades", max_places=2)
+        for pid in ["266040", "216748", "266040", "511300"]:
+            pleiades.get(f"https://pleiades.stoa.org/places/{pid}")
+        assert pleiades.stats() == {"hits": 1, "misses": 3, "cached": 2}
+        assert list(pleiades._places.keys()) == [
+            PURI,
+            "https://pleiades.stoa.org/places/511300",
+        ]
+
+    def test_projection(self):
+        """Do we keep only the requested fields?"""
+        pleiades = PleiadesDataset(TEST_DATA_DIR / "pleiades", fields=["title"])
+        assert pleiades.get(PURI) == {"title": "Ilurco"}
@@ -0,0 +1,47 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the reciprocity module
+"""
+
+from pathlib import Path
+from pleiades_sidebar.pleiades import PleiadesDataset
+from pleiades_sidebar.reciprocity import ReciprocityEngine
+from pleiades_sidebar.wikidata import WikidataDataset
+
+TEST_DATA_DIR = Path("tests/data/")
+
+
+class TestReciprocityEngine:
+
+    @classmethod
+    def setup_class(cls):
+        cls.datasets = {
+            "wikidata": WikidataDataset(path=TEST_DATA_DIR / "wikidata.tsv")
+        }
+        cls.engine = ReciprocityEngine(PleiadesDataset(TEST_DATA_DIR / "pleiades"))
+        cls.matches = cls.engine.join(cls.datasets)
+
+    def test_join(self):
+        """Do we flag reciprocated links and only keep places that exist?"""
+        assert sorted(
+            (puri, reciprocal) for puri, _, _, reciprocal in self.matches
+        ) == [
+            ("https://pleiades.stoa.org/places/216748", False),
+            ("https://pleiades.stoa.org/places/266040", True),
+            ("https://pleiades.stoa.org/places/511300", False),
+        ]
+
+    def test_tables(self):
+        """Do we keep track of every referenced place and the ones that are missing?"""
+        assert self.engine.match_count == 11
+        assert len(self.engine.places) == 11
+        assert len(self.engine.missing) == 8
+        assert self.engine.references["https://pleiades.stoa.org/places/266040"] == {
+            "wikidata.org:Q5685282"
+        }
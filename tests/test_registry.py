@@ -0,0 +1,98 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the dataset registry
+"""
+
+from importlib.metadata import EntryPoint
+from os import environ
+from pathlib import Path
+from pleiades_sidebar import dataset, registry
+from pleiades_sidebar.registry import (
+    ENTRY_POINT_GROUP,
+    DatasetRegistry,
+    env_path,
+)
+import pytest
+import subprocess
+import sys
+
+TEST_DATA_DIR = Path("tests/data/")
+
+
+class TestRegistry:
+
+    def test_lazy_import(self):
+        """Can the generator be imported without source paths or dataset modules?"""
+        env = {
+            k: v
+            for k, v in environ.items()
+            if not k.endswith("_PATH") or k in {"PATH", "PYTHONPATH"}
+        }
+        code = (
+            "import sys\n"
+            "from pleiades_sidebar.generator import Generator\n"
+            "assert 'pleiades_sidebar.nomisma' not in sys.modules\n"
+            "assert 'requests' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+    def test_builtin(self):
+        """Is a built-in dataset imported on lookup, and only once?"""
+        datasets = DatasetRegistry()
+        cls = datasets["wikidata"]
+        assert cls.__name__ == "WikidataDataset"
+        assert datasets["wikidata"] is cls
+        with pytest.raises(KeyError):
+            datasets["nonesuch"]
+
+    def test_entry_points(self, monkeypatch):
+        """Are datasets from other packages found, without displacing built-ins?"""
+        monkeypatch.setattr(
+            registry,
+            "entry_points",
+            lambda group: [
+                EntryPoint(
+                    name="mywikidata",
+                    value="pleiades_sidebar.wikidata:WikidataDataset",
+                    group=group,
+                ),
+                EntryPoint(
+                    name="nomisma",
+                    value="pleiades_sidebar.wikidata:WikidataDataset",
+                    group=group,
+                ),
+            ],
+        )
+        datasets = DatasetRegistry()
+        assert datasets["mywikidata"].__name__ == "WikidataDataset"
+        assert datasets["nomisma"].__name__ == "NomismaDataset"
+        assert "mywikidata" in list(datasets)
+        assert len(datasets) == len(registry.BUILTIN_DATASETS) + 1
+
+    def test_register(self):
+        """Can a dataset class be registered directly?"""
+        datasets = DatasetRegistry(builtin={}, group=ENTRY_POINT_GROUP + ".none")
+        datasets.register("other", "pleiades_sidebar.manto:MANTODataset")
+        assert datasets["other"].__name__ == "MANTODataset"
+        datasets.register("other", dict)
+        assert datasets["other"] is dict
+
+    def test_env_path(self, tmp_path, monkeypatch):
+        """Is a dataset's default source path read from the environment when used?"""
+        monkeypatch.setattr(
+            dataset, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        monkeypatch.delenv("WIKIDATA_PATH", raising=False)
+        with pytest.raises(ValueError):
+            env_path("WIKIDATA_PATH")
+        cls = registry.DATASETS["wikidata"]
+        with pytest.raises(ValueError):
+            cls()
+        monkeypatch.setenv("WIKIDATA_PATH", str(TEST_DATA_DIR / "wikidata.tsv"))
+        assert len(cls()) > 0
@@ -0,0 +1,47 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test output serialization profiles
+"""
+
+import json
+from pleiades_sidebar import serialize
+from pleiades_sidebar.serialize import Serializer
+import pytest
+
+DATA = [{"@id": "a", "properties": {"title": "Ἀθῆναι", "reciprocal": True}}]
+
+
+class TestSerializer:
+
+    def test_pretty_is_unchanged(self):
+        """Does the default profile match the long-standing output format?"""
+        s = Serializer()
+        assert s.dumps(DATA) == json.dumps(DATA, ensure_ascii=False, indent=4).encode(
+            "utf-8"
+        )
+        assert s.describe() == {"profile": "pretty", "backend": "json"}
+
+    def test_compact(self):
+        """Is compact output free of whitespace and equivalent when parsed?"""
+        s = Serializer("compact")
+        b = s.dumps(DATA)
+        assert b"\n" not in b and b", " not in b
+        assert json.loads(b) == DATA
+        assert s.backend == ("json" if serialize.orjson is None else "orjson")
+
+    def test_invalid_choices(self):
+        with pytest.raises(ValueError):
+            Serializer("tiny")
+        with pytest.raises(ValueError):
+            Serializer("compact", "simplejson")
+
+    @pytest.mark.skipif(serialize.orjson is not None, reason="orjson is installed")
+    def test_orjson_missing(self):
+        with pytest.raises(ImportError):
+            Serializer("compact", "orjson")
@@ -0,0 +1,132 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the synthetic corpus generator
+"""
+
+import json
+from pleiades_sidebar import context, dataset
+from pleiades_sidebar.generator import Generator
+from pleiades_sidebar.pleiades import PleiadesDataset
+from pleiades_sidebar.synthetic import NAMESPACES, SyntheticCorpus
+from pleiades_sidebar.whg import WHGDataItem, WHGDataset
+import pytest
+
+# the synthetic WHG file's JSON-LD context is inline, so nothing is fetched
+DATASET_OPTIONS = {"offline": True}
+
+
+class TestSyntheticCorpus:
+
+    @pytest.fixture
+    def corpus(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            dataset, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        monkeypatch.setattr(
+            context, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        corpus = SyntheticCorpus(places=50, reciprocity=0.5, duplicates=0.2, seed=1)
+        return corpus, corpus.write(tmp_path / "corpus")
+
+    def test_synthetic_reproducible(self, tmp_path):
+        """Does the same seed produce the same files?"""
+        first = SyntheticCorpus(places=20, seed=3).write(tmp_path / "a")
+        second = SyntheticCorpus(places=20, seed=3).write(tmp_path / "b")
+        for ns in NAMESPACES:
+            assert first[ns].read_bytes() == second[ns].read_bytes()
+
+    def test_synthetic_datasets_load(self, corpus):
+        """Does every dataset parse its synthetic file, merging duplicate items?"""
+        corpus, paths = corpus
+        g = Generator(NAMESPACES, paths=paths, dataset_options=DATASET_OPTIONS)
+        for ns in NAMESPACES:
+            assert len(g.datasets[ns]) == 50
+        sidebar, unreciprocated = g.generate()
+        pleiades = PleiadesDataset(paths["pleiades"])
+        for puri in sidebar.keys():
+            assert pleiades.get(puri)["uri"] == puri
+        reciprocated = sum(
+            1
+            for ditems in sidebar.values()
+            for d in ditems
+            if d["properties"]["reciprocal"]
+        )
+        assert reciprocated > 0
+        assert sum(len(ditems) for ditems in unreciprocated.values()) > 0
+
+    def test_synthetic_whg_features(self, corpus):
+        """Do the WHG features parse, with their Pleiades links?"""
+        corpus, paths = corpus
+        with open(paths["whg"], "r", encoding="utf-8") as f:
+            features = json.load(f)["features"]
+        del f
+        assert len(features) == 50
+        for feature in features:
+            item = WHGDataItem(feature, context=dict())
+            assert item.pleiades_uris
+            assert item.uri.endswith("/detail")
+
+    def test_whg_context_unresolved(self, corpus):
+        """Offline, is a context neither vendored nor cached a load-time error?"""
+        corpus, paths = corpus
+        with open(paths["whg"], "r", encoding="utf-8") as f:
+            document = json.load(f)
+        del f
+        document["@context"] = "https://example.org/unvendored-context.jsonld"
+        with open(paths["whg"], "w", encoding="utf-8") as f:
+            json.dump(document, f)
+        del f
+        with pytest.raises(ValueError):
+            WHGDataset(paths["whg"], offline=True)
+
+    def test_synthetic_rates(self, tmp_path, monkeypatch):
+        """With reciprocity 1 and no duplicates, is every match reciprocated once?"""
+        monkeypatch.setattr(
+            dataset, "user_cache_dir", lambda *args, **kwargs: str(tmp_path)
+        )
+        corpus = SyntheticCorpus(places=20, reciprocity=1.0, duplicates=0.0)
+        paths = corpus.write(tmp_path / "corpus", namespaces=["wikidata"])
+        assert corpus.stats["duplicates"] == 0
+        assert corpus.stats["reciprocated"] == corpus.stats["links"] == 20
+        sidebar, unreciprocated = Generator(["wikidata"], paths=paths).generate()
+        assert unreciprocated["wikidata"] == []
+        assert all(
+            d["properties"]["reciprocal"] for ditems in sidebar.values() for d in ditems
+        )
+        with pytest.raises(ValueError):
+            SyntheticCorpus(places=20, reciprocity=1.5)
+
+    def test_synthetic_parallel_parse(self, corpus):
+        """Does parsing in worker processes give the same datasets, in the same order?"""
+        corpus, paths = corpus
+        serial = Generator(NAMESPACES, paths=paths, dataset_options=DATASET_OPTIONS)
+        parallel = Generator(
+            NAMESPACES,
+            paths=paths,
+            dataset_options=dict(
+                DATASET_OPTIONS, refresh=True, parse_workers=2, parse_chunk_size=7
+            ),
+        )
+        for ns in NAMESPACES:
+            expected = serial.datasets[ns]._data
+            got = parallel.datasets[ns]._data
+            assert not parallel.datasets[ns].loaded_from_cache
+            assert list(got.keys()) == list(expected.keys())
+            for uri, item in expected.items():
+                assert got[uri].to_lpf_dict() == item.to_lpf_dict()
+                assert got[uri].links == item.links
+            assert (
+                parallel.datasets[ns]._pleiades_index
+                == serial.datasets[ns]._pleiades_index
+            )
+            # normalization done in the workers is counted in this process
+            assert (
+                parallel.instruments.stages[f"{ns}.norm"]["items"]
+                == serial.instruments.stages[f"{ns}.norm"]["items"]
+            )
@@ -0,0 +1,114 @@
+#
+# This file is part of pleiades_sidebar
+# by Tom Elliott for the Institute for the Study of the Ancient World
+# (c) Copyright 2025 by New York University
+# Licensed under the AGPL-3.0; see LICENSE.txt file.
+#
+
+"""
+Test the sidebar writer
+"""
+
+import json
+from pleiades_sidebar.writer import SidebarWriter
+
+SIDEBAR = {
+    "https://pleiades.stoa.org/places/266040": [{"@id": "a", "reciprocal": True}],
+    "https://pleiades.stoa.org/places/216748": [{"@id": "b", "reciprocal": False}],
+    "https://pleiades.stoa.org/places/216749": [{"@id": "c", "reciprocal": False}],
+    "https://pleiades.stoa.org/places/511300": [],
+}
+
+
+class TestSidebarWriter:
+
+    def test_writer_serial_and_parallel(self, tmp_path):
+        """Do serial and threaded writes produce the same sharded files?"""
+        for workers in (1, 4):
+            outpath = tmp_path / str(workers)
+            stats = SidebarWriter(outpath, workers=workers).write(SIDEBAR)
+            assert stats["written"] == 3
+            assert stats["skipped"] == 1
+            filepath = outpath / "2" / "1" / "6" / "216748.json"
+            with open(filepath, "r", encoding="utf-8") as f:
+                assert (
+                    json.load(f) == SIDEBAR["https://pleiades.stoa.org/places/216748"]
+                )
+            del f
+            assert not (outpath / "5" / "1" / "1" / "511300.json").exists()
+            assert not list(outpath.rglob("*.tmp"))
+
+    def test_writer_empty_overwrites_existing(self, tmp_path):
+        """Is an existing file overwritten when a place has no data?"""
+        writer = SidebarWriter(tmp_path)
+        filepath = writer.filepath("https://pleiades.stoa.org/places/511300")
+        filepath.parent.mkdir(parents=True)
+        filepath.write_text("[1]", encoding="utf-8")
+        stats = writer.write({"https://pleiades.stoa.org/places/511300": []})
+        assert stats["written"] == 1
+        assert filepath.read_text(encoding="utf-8") == "[]"
+
+    def test_writer_skips_unchanged(self, tmp_path):
+        """Are identical files left alone, with or without the sidecar index?"""
+        writer = SidebarWriter(tmp_path)
+        writer.write(SIDEBAR)
+        writer.save_index()
+        filepath = writer.filepath("https://pleiades.stoa.org/places/266040")
+        mtime_ns = filepath.stat().st_mtime_ns
+        for index_filename in (".write_index.json", None):
+            writer = SidebarWriter(tmp_path, index_filename=index_filename)
+            stats = writer.write(SIDEBAR)
+            assert stats["written"] == 0
+            assert stats["unchanged"] == 3
+            assert filepath.stat().st_mtime_ns == mtime_ns
+        changed = dict(SIDEBAR)
+        changed["https://pleiades.stoa.org/places/266040"] = [{"@id": "x"}]
+        stats = SidebarWriter(tmp_path).write(changed)
+        assert stats["written"] == 1
+        assert stats["unchanged"] == 2
+
+    def test_writer_index_mtime(self, tmp_path):
+        """Is a file modified behind the index's back compared byte for byte?"""
+        writer = SidebarWriter(tmp_path)
+        writer.write(SIDEBAR)
+        writer.save_index()
+        filepath = writer.filepath("https://pleiades.stoa.org/places/266040")
+        original = filepath.read_bytes()
+        # same size, different bytes, as an edit or another tool might leave it
+        filepath.write_bytes(original.replace(b'"a"', b'"z"'))
+        stats = SidebarWriter(tmp_path).write(SIDEBAR)
+        assert stats["written"] == 1
+        assert stats["unchanged"] == 2
+        assert filepath.read_bytes() == original
+
+    def test_writer_remove(self, tmp_path):
+        """Are removed places counted only when they had a file?"""
+        writer = SidebarWriter(tmp_path)
+        writer.write(SIDEBAR)
+        count = writer.remove(
+            [
+                "https://pleiades.stoa.org/places/266040",
+                "https://pleiades.stoa.org/places/511300",
+            ]
+        )
+        assert count == 1
+        assert writer.stats["removed"] == 1
+        assert not writer.filepath("https://pleiades.stoa.org/places/266040").exists()
+
+    def test_writer_array_file(self, tmp_path):
+        """Is an array written item by item identical to one written whole?"""
+        items = [d for data in SIDEBAR.values() for d in data]
+        writer = SidebarWriter(tmp_path)
+        writer.write_file(tmp_path / "whole.json", items)
+        for data in (items, []):
+            array = writer.open_array(tmp_path / "streamed.json")
+            for item in data:
+                array.append(item)
+            assert array.close() == "written"
+            writer.write_file(tmp_path / "whole.json", data)
+            assert (tmp_path / "streamed.json").read_bytes() == (
+                tmp_path / "whole.json"
+            ).read_bytes()
+        array = writer.open_array(tmp_path / "streamed.json")
+        assert array.close() == "unchanged"
+        assert not list(tmp_path.glob(".*.tmp"))